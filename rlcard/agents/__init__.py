@@ -13,6 +13,8 @@ if 'torch' in installed_packages:
     from rlcard.agents.nfsp_agent_pytorch import NFSPAgent as NFSPAgentPytorch
 
 from rlcard.agents.cfr_agent import CFRAgent
+from rlcard.agents.mccfr_agent import ExternalSamplingCFRAgent, OutcomeSamplingCFRAgent
+from rlcard.agents.parallel_cfr_agent import ParallelCFRAgent
 from rlcard.agents.holdem_nl_human_agent import HumanAgent as NolimitholdemHumanAgent
 from rlcard.agents.leduc_holdem_human_agent import HumanAgent as LeducholdemHumanAgent
 from rlcard.agents.random_agent import RandomAgent
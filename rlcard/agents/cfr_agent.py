@@ -1,31 +1,61 @@
 import numpy as np
-import collections
 
+import collections
 import os
 import pickle
 
 from rlcard.utils.utils import *
+from rlcard.utils.game_tree import GameTree, chance_key
 
 class CFRAgent():
     ''' Implement CFR algorithm
     '''
 
-    def __init__(self, env, model_path='./cfr_model'):
+    def __init__(self, env, model_path='./cfr_model', variant='vanilla', alternating=False,
+                 alpha=1.5, beta=0.0, gamma=2.0, cache_tree=False, tree_cache_size=4096):
         ''' Initilize Agent
 
         Args:
             env (Env): Env class
+            model_path (str): The path to save/load the model
+            variant (str): The CFR variant. The value can be 'vanilla', 'cfr+'
+              (negative regrets are floored at zero), 'linear' (regrets and
+              average policy weighted by the iteration) or 'discounted' (DCFR)
+            alternating (boolean): True if the policy is updated after the
+              traversal of each player instead of after all the traversals
+            alpha (float): The discount exponent of positive regrets in DCFR
+            beta (float): The discount exponent of negative regrets in DCFR
+            gamma (float): The discount exponent of the average policy in DCFR
+            cache_tree (boolean): True if the game tree of each chance outcome
+              is built once into an array-backed GameTree and the later
+              traversals of the same outcome sweep the arrays. The chance
+              outcome is keyed by chance_key, so the environment should
+              implement get_perfect_information
+            tree_cache_size (int): The maximum number of cached game trees. The
+              least recently used tree is evicted from a full cache
         '''
+        if variant not in ('vanilla', 'cfr+', 'linear', 'discounted'):
+            raise ValueError("'variant' should be one of 'vanilla', 'cfr+', 'linear' and 'discounted'.")
         self.use_raw = False
         self.env = env
         self.model_path = model_path
-
-        # A policy is a dict state_str -> action probabilities
-        self.policy = collections.defaultdict(list)
-        self.average_policy = collections.defaultdict(np.array)
-
-        # Regret is a dict state_str -> action regrets
-        self.regrets = collections.defaultdict(np.array)
+        self.variant = variant
+        self.alternating = alternating
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+        self.cache_tree = cache_tree
+
+        # The regrets, the policy and the average policy of all the
+        # information sets are stored in an array-backed table
+        self.table = InfosetTable(self.env.action_num)
+
+        # The cached game trees in the order of use, chance key -> GameTree.
+        # The key covers the cards dealt in the game, whose number is known
+        # once a tree has been built
+        self.trees = collections.OrderedDict()
+        self.tree_cache_size = tree_cache_size
+        self.dealt_num = None
 
         self.iteration = 0
 
@@ -36,13 +66,40 @@ class CFRAgent():
         # Firstly, tranvers tree to compute counterfactual regret for each player
         # The regrets are recorded in traversal
         for player_id in range(self.env.player_num):
-            self.env.reset()
-            probs = np.ones(self.env.player_num)
-            self.traverse_tree(probs, player_id)
+            self.traverse(player_id)
+
+            # With alternating updates, the next player responds to the updated policy
+            if self.alternating:
+                self.update_policy()
+
+        self.apply_variant()
 
         # Update policy
         self.update_policy()
 
+    def traverse(self, player_id):
+        ''' Deal a new game and traverse its tree for a player
+
+        Args:
+            player_id (int): The player to update
+        '''
+        self.env.reset()
+        if self.cache_tree:
+            self.get_tree().update(self.table, player_id, self.average_weight())
+        else:
+            probs = np.ones(self.env.player_num)
+            self.traverse_tree(probs, player_id)
+
+    def apply_variant(self):
+        ''' Apply the regret flooring or discounting of the variant
+        '''
+        if self.variant == 'cfr+':
+            self.table.floor_regrets()
+        elif self.variant == 'linear':
+            self.table.discount(self.iteration, 1.0, 1.0, 1.0)
+        elif self.variant == 'discounted':
+            self.table.discount(self.iteration, self.alpha, self.beta, self.gamma)
+
     def traverse_tree(self, probs, player_id):
         ''' Traverse the game tree, update the regrets
 
@@ -58,23 +115,21 @@ class CFRAgent():
 
         current_player = self.env.get_player_id()
 
-        action_utilities = {}
-        state_utility = np.zeros(self.env.player_num)
         obs, legal_actions = self.get_state(current_player)
-        action_probs = self.action_probs(obs, legal_actions, self.policy)
+        index = self.table.intern(obs)
+        action_probs = remove_illegal(self.table.policy[index], legal_actions)
 
-        for action in legal_actions:
-            action_prob = action_probs[action]
+        action_utilities = np.zeros((len(legal_actions), self.env.player_num))
+        for i, action in enumerate(legal_actions):
             new_probs = probs.copy()
-            new_probs[current_player] *= action_prob
+            new_probs[current_player] *= action_probs[action]
 
             # Keep traversing the child state
             self.env.step(action)
-            utility = self.traverse_tree(new_probs, player_id)
+            action_utilities[i] = self.traverse_tree(new_probs, player_id)
             self.env.step_back()
 
-            state_utility += action_prob * utility
-            action_utilities[action] = utility
+        state_utility = action_probs[legal_actions].dot(action_utilities)
 
         if not current_player == player_id:
             return state_utility
@@ -85,41 +140,49 @@ class CFRAgent():
                                 np.prod(probs[current_player + 1:]))
         player_state_utility = state_utility[current_player]
 
-        if obs not in self.regrets:
-            self.regrets[obs] = np.zeros(self.env.action_num)
-        if obs not in self.average_policy:
-            self.average_policy[obs] = np.zeros(self.env.action_num)
-        for action in legal_actions:
-            action_prob = action_probs[action]
-            regret = counterfactual_prob * (action_utilities[action][current_player]
-                    - player_state_utility)
-            self.regrets[obs][action] += regret
-            self.average_policy[obs][action] += self.iteration * player_prob * action_prob
+        self.table.regrets[index, legal_actions] += counterfactual_prob * \
+            (action_utilities[:, current_player] - player_state_utility)
+        self.table.average_policy[index, legal_actions] += self.average_weight() * player_prob * action_probs[legal_actions]
         return state_utility
 
-    def update_policy(self):
-        ''' Update policy based on the current regrets
-        '''
-        for obs in self.regrets:
-            self.policy[obs] = self.regret_matching(obs)
+    def get_tree(self):
+        ''' Get the cached game tree of the current chance outcome. The tree
+            is built on the first visit of the outcome
 
-    def regret_matching(self, obs):
-        ''' Apply regret matching
+        Returns:
+            (GameTree): The game tree
+        '''
+        key = chance_key(self.env, self.dealt_num)
+        tree = self.trees.get(key)
+        if tree is not None:
+            self.trees.move_to_end(key)
+            return tree
+        tree = GameTree(self.env, self.table.intern)
+        if self.dealt_num is None or tree.dealt_num > self.dealt_num:
+            # The keys of the cached trees did not cover all the dealt cards
+            self.dealt_num = tree.dealt_num
+            self.trees.clear()
+            key = chance_key(self.env, self.dealt_num)
+        self.trees[key] = tree
+        while len(self.trees) > self.tree_cache_size:
+            self.trees.popitem(last=False)
+        return tree
+
+    def average_weight(self):
+        ''' Get the weight of the current iteration in the average policy.
+            Linear CFR and DCFR discount the accumulated average policy instead
 
-        Args:
-            obs (string): The state_str
+        Returns:
+            (float): The weight
         '''
-        regret = self.regrets[obs]
-        positive_regret_sum = sum([r for r in regret if r > 0])
+        if self.variant in ('linear', 'discounted'):
+            return 1.0
+        return self.iteration
 
-        action_probs = np.zeros(self.env.action_num)
-        if positive_regret_sum > 0:
-            for action in range(self.env.action_num):
-                action_probs[action] = max(0.0, regret[action] / positive_regret_sum)
-        else:
-            for action in range(self.env.action_num):
-                action_probs[action] = 1.0 / self.env.action_num
-        return action_probs
+    def update_policy(self):
+        ''' Update policy based on the current regrets
+        '''
+        self.table.regret_matching()
 
     def action_probs(self, obs, legal_actions, policy):
         ''' Obtain the action probabilities of the current state
@@ -127,19 +190,17 @@ class CFRAgent():
         Args:
             obs (str): state_str
             legal_actions (list): List of leagel actions
-            player_id (int): The current player
-            policy (dict): The used policy
+            policy (numpy.array): The used policy table, i.e., self.table.policy
+              or self.table.average_policy
 
         Returns:
-            (tuple) that contains:
-                action_probs(numpy.array): The action probabilities
-                legal_actions (list): Indices of legal actions
+            action_probs(numpy.array): The action probabilities
         '''
-        if obs not in policy.keys():
+        index = self.table.lookup(obs)
+        if index is None:
             action_probs = np.array([1.0/self.env.action_num for _ in range(self.env.action_num)])
-            self.policy[obs] = action_probs
         else:
-            action_probs = policy[obs]
+            action_probs = policy[index]
         action_probs = remove_illegal(action_probs, legal_actions)
         return action_probs
 
@@ -152,7 +213,7 @@ class CFRAgent():
         Returns:
             action (int): Predicted action
         '''
-        probs = self.action_probs(state['obs'].tostring(), state['legal_actions'], self.average_policy)
+        probs = self.action_probs(state['obs'].tobytes(), state['legal_actions'], self.table.average_policy)
         action = np.random.choice(len(probs), p=probs)
         return action, probs
 
@@ -168,49 +229,326 @@ class CFRAgent():
                 legal_actions (list): Indices of legal actions
         '''
         state = self.env.get_state(player_id)
-        return state['obs'].tostring(), state['legal_actions']
+        return state['obs'].tobytes(), state['legal_actions']
 
-    def save(self):
+    @property
+    def policy(self):
+        ''' (dict): The current policy, state_str -> action probabilities
+        '''
+        return self.table.to_dict(self.table.policy)
+
+    @property
+    def average_policy(self):
+        ''' (dict): The accumulated average policy, state_str -> action probabilities
+        '''
+        return self.table.to_dict(self.table.average_policy)
+
+    @property
+    def regrets(self):
+        ''' (dict): The cumulative regrets, state_str -> action regrets
+        '''
+        return self.table.to_dict(self.table.regrets)
+
+    def save(self, compact=False):
         ''' Save model
+
+        Args:
+            compact (boolean): True if the table is saved in the compact format
+              of InfosetTable.save instead of the pickled dicts
         '''
         if not os.path.exists(self.model_path):
             os.makedirs(self.model_path)
 
-        policy_file = open(os.path.join(self.model_path, 'policy.pkl'),'wb')
-        pickle.dump(self.policy, policy_file)
-        policy_file.close()
+        if compact:
+            self.table.save(self.model_path)
+        else:
+            # The compact format takes precedence in load, so an old one is removed
+            keys_path = os.path.join(self.model_path, 'keys.npy')
+            if os.path.exists(keys_path):
+                os.remove(keys_path)
 
-        average_policy_file = open(os.path.join(self.model_path, 'average_policy.pkl'),'wb')
-        pickle.dump(self.average_policy, average_policy_file)
-        average_policy_file.close()
+            policy_file = open(os.path.join(self.model_path, 'policy.pkl'),'wb')
+            pickle.dump(self.policy, policy_file)
+            policy_file.close()
 
-        regrets_file = open(os.path.join(self.model_path, 'regrets.pkl'),'wb')
-        pickle.dump(self.regrets, regrets_file)
-        regrets_file.close()
+            average_policy_file = open(os.path.join(self.model_path, 'average_policy.pkl'),'wb')
+            pickle.dump(self.average_policy, average_policy_file)
+            average_policy_file.close()
+
+            regrets_file = open(os.path.join(self.model_path, 'regrets.pkl'),'wb')
+            pickle.dump(self.regrets, regrets_file)
+            regrets_file.close()
 
         iteration_file = open(os.path.join(self.model_path, 'iteration.pkl'),'wb')
         pickle.dump(self.iteration, iteration_file)
         iteration_file.close()
 
-    def load(self):
-        ''' Load model
+    def load(self, mmap_mode='r'):
+        ''' Load model. The compact format is used if the model path contains it
+
+        Args:
+            mmap_mode (str): The mode to memory-map the compact format, e.g., 'r'.
+              The memory-mapped table is read-only and the pages are shared by
+              all the processes loading the model. If None, the table is loaded
+              into memory and can be trained further
         '''
         if not os.path.exists(self.model_path):
             return
 
+        iteration_file = open(os.path.join(self.model_path, 'iteration.pkl'),'rb')
+        self.iteration = pickle.load(iteration_file)
+        iteration_file.close()
+
+        if os.path.exists(os.path.join(self.model_path, 'keys.npy')):
+            self.table = CompactInfosetTable(self.model_path, mmap_mode)
+            if mmap_mode is None:
+                self.table = self.table.to_table()
+            return
+
         policy_file = open(os.path.join(self.model_path, 'policy.pkl'),'rb')
-        self.policy = pickle.load(policy_file)
+        policy = pickle.load(policy_file)
         policy_file.close()
 
         average_policy_file = open(os.path.join(self.model_path, 'average_policy.pkl'),'rb')
-        self.average_policy = pickle.load(average_policy_file)
+        average_policy = pickle.load(average_policy_file)
         average_policy_file.close()
 
         regrets_file = open(os.path.join(self.model_path, 'regrets.pkl'),'rb')
-        self.regrets = pickle.load(regrets_file)
+        regrets = pickle.load(regrets_file)
         regrets_file.close()
 
-        iteration_file = open(os.path.join(self.model_path, 'iteration.pkl'),'rb')
-        self.iteration = pickle.load(iteration_file)
-        iteration_file.close()
+        self.table = InfosetTable.from_dicts(self.env.action_num, policy, average_policy, regrets)
+
+class InfosetTable(object):
+    ''' An array-backed table of information sets. Each information set is
+        interned to an integer index once. The regrets, the current policy and
+        the average policy are stored in contiguous arrays of shape
+        (num_infosets, action_num), so that regret matching can be applied
+        to the whole table at once.
+    '''
+
+    def __init__(self, action_num, capacity=1024):
+        ''' Initialize the table
+
+        Args:
+            action_num (int): The size of the action space
+            capacity (int): The number of rows allocated in advance. The
+              arrays grow automatically when the table is full
+        '''
+        self.action_num = action_num
+        self.index = {}
+        self.keys = []
+        self.regrets = np.zeros((capacity, action_num))
+        self.policy = np.full((capacity, action_num), 1.0 / action_num)
+        self.average_policy = np.zeros((capacity, action_num))
 
+    def __len__(self):
+        return len(self.keys)
+
+    def intern(self, key):
+        ''' Get the index of an information set. A new row is added if the
+            information set has not been seen before
+
+        Args:
+            key (bytes): The state_str of the information set
+
+        Returns:
+            (int): The index of the information set
+        '''
+        index = self.index.get(key)
+        if index is None:
+            index = len(self.keys)
+            if index == self.regrets.shape[0]:
+                self._grow()
+            self.index[key] = index
+            self.keys.append(key)
+        return index
+
+    def lookup(self, key):
+        ''' Get the index of an information set without adding it
+
+        Args:
+            key (bytes): The state_str of the information set
+
+        Returns:
+            (int): The index of the information set, or None if it has not been seen
+        '''
+        return self.index.get(key)
+
+    def _grow(self):
+        ''' Double the capacity of the arrays
+        '''
+        capacity = self.regrets.shape[0]
+        self.regrets = np.concatenate([self.regrets, np.zeros((capacity, self.action_num))])
+        self.policy = np.concatenate([self.policy, np.full((capacity, self.action_num), 1.0 / self.action_num)])
+        self.average_policy = np.concatenate([self.average_policy, np.zeros((capacity, self.action_num))])
+
+    def regret_matching(self, index=None):
+        ''' Apply regret matching to all the information sets in one pass,
+            or only to the given information set
+
+        Args:
+            index (int): The index of the information set. If None, all the
+              information sets are updated
+
+        Returns:
+            (numpy.array): The updated policy of the information set if the index is given
+        '''
+        if index is not None:
+            positive_regrets = np.maximum(self.regrets[index], 0.0)
+            positive_regret_sum = positive_regrets.sum()
+            if positive_regret_sum > 0:
+                self.policy[index] = positive_regrets / positive_regret_sum
+            else:
+                self.policy[index] = 1.0 / self.action_num
+            return self.policy[index]
+
+        n = len(self.keys)
+        positive_regrets = np.maximum(self.regrets[:n], 0.0)
+        positive_regret_sums = positive_regrets.sum(axis=1, keepdims=True)
+        self.policy[:n] = np.where(positive_regret_sums > 0,
+                                   positive_regrets / np.where(positive_regret_sums > 0, positive_regret_sums, 1.0),
+                                   1.0 / self.action_num)
+
+    def floor_regrets(self):
+        ''' Floor the negative regrets at zero, as in CFR+
+        '''
+        n = len(self.keys)
+        np.maximum(self.regrets[:n], 0.0, out=self.regrets[:n])
+
+    def discount(self, iteration, alpha, beta, gamma):
+        ''' Discount the regrets and the average policy, as in DCFR. The
+            positive regrets are multiplied by t^alpha/(t^alpha+1), the negative
+            regrets by t^beta/(t^beta+1) and the average policy by (t/(t+1))^gamma
+
+        Args:
+            iteration (int): The current iteration t
+            alpha (float): The discount exponent of positive regrets
+            beta (float): The discount exponent of negative regrets
+            gamma (float): The discount exponent of the average policy
+        '''
+        n = len(self.keys)
+        positive_weight = iteration ** alpha / (iteration ** alpha + 1.0)
+        negative_weight = iteration ** beta / (iteration ** beta + 1.0)
+        self.regrets[:n] *= np.where(self.regrets[:n] > 0, positive_weight, negative_weight)
+        self.average_policy[:n] *= (iteration / (iteration + 1.0)) ** gamma
+
+    def to_dict(self, array):
+        ''' Convert one of the arrays to a dict
+
+        Args:
+            array (numpy.array): self.regrets, self.policy or self.average_policy
+
+        Returns:
+            (dict): A dict state_str -> row of the array
+        '''
+        return {key: array[index].copy() for index, key in enumerate(self.keys)}
+
+    @classmethod
+    def from_dicts(cls, action_num, policy, average_policy, regrets):
+        ''' Build a table from the dicts of the pickled models
+
+        Args:
+            action_num (int): The size of the action space
+            policy (dict): state_str -> action probabilities
+            average_policy (dict): state_str -> accumulated action probabilities
+            regrets (dict): state_str -> action regrets
+
+        Returns:
+            (InfosetTable): The table
+        '''
+        table = cls(action_num, capacity=max(len(policy), len(average_policy), len(regrets), 1))
+        for key in list(policy) + list(average_policy) + list(regrets):
+            table.intern(key)
+        for key, value in policy.items():
+            table.policy[table.index[key]] = value
+        for key, value in average_policy.items():
+            table.average_policy[table.index[key]] = value
+        for key, value in regrets.items():
+            table.regrets[table.index[key]] = value
+        return table
+
+    def save(self, path):
+        ''' Save the table in a compact columnar format: keys.npy holds the
+            sorted state_str of the information sets as fixed-length bytes,
+            and policy.npy, average_policy.npy and regrets.npy hold float32
+            matrices whose rows follow the sorted keys. The files can be
+            memory-mapped by CompactInfosetTable
+
+        Args:
+            path (str): The directory to save the files
+        '''
+        n = len(self.keys)
+        keys = np.array(self.keys, dtype=bytes) if n > 0 else np.zeros(0, dtype='S1')
+        order = np.argsort(keys, kind='stable')
+        np.save(os.path.join(path, 'keys.npy'), keys[order])
+        np.save(os.path.join(path, 'policy.npy'), self.policy[:n][order].astype(np.float32))
+        np.save(os.path.join(path, 'average_policy.npy'), self.average_policy[:n][order].astype(np.float32))
+        np.save(os.path.join(path, 'regrets.npy'), self.regrets[:n][order].astype(np.float32))
+
+class CompactInfosetTable(object):
+    ''' A read-only table of information sets loaded from the compact format
+        of InfosetTable.save. The arrays can be memory-mapped, so that loading
+        is instant and the pages are shared between processes. An information
+        set is looked up with a binary search over the sorted keys.
+    '''
+
+    def __init__(self, path, mmap_mode='r'):
+        ''' Load the table
+
+        Args:
+            path (str): The directory of the files
+            mmap_mode (str): The mode of np.load, e.g., 'r'. If None, the arrays are read into memory
+        '''
+        self.sorted_keys = np.load(os.path.join(path, 'keys.npy'), mmap_mode=mmap_mode)
+        self.policy = np.load(os.path.join(path, 'policy.npy'), mmap_mode=mmap_mode)
+        self.average_policy = np.load(os.path.join(path, 'average_policy.npy'), mmap_mode=mmap_mode)
+        self.regrets = np.load(os.path.join(path, 'regrets.npy'), mmap_mode=mmap_mode)
+        self.action_num = self.policy.shape[1]
+
+    def __len__(self):
+        return self.sorted_keys.shape[0]
+
+    @property
+    def keys(self):
+        ''' (list): The state_str of the information sets, in the order of the rows.
+            NumPy strips the trailing null bytes of fixed-length bytes, so they are padded back
+        '''
+        itemsize = self.sorted_keys.dtype.itemsize
+        return [bytes(key).ljust(itemsize, b'\0') for key in self.sorted_keys]
+
+    def lookup(self, key):
+        ''' Get the index of an information set
+
+        Args:
+            key (bytes): The state_str of the information set
+
+        Returns:
+            (int): The index of the information set, or None if it is not in the table
+        '''
+        if len(key) > self.sorted_keys.dtype.itemsize:
+            return None
+        index = int(np.searchsorted(self.sorted_keys, key))
+        if index < len(self) and self.sorted_keys[index] == key.rstrip(b'\0'):
+            return index
+        return None
+
+    def to_dict(self, array):
+        ''' Convert one of the arrays to a dict
+
+        Args:
+            array (numpy.array): self.regrets, self.policy or self.average_policy
+
+        Returns:
+            (dict): A dict state_str -> row of the array
+        '''
+        return {key: np.array(array[index], dtype=np.float64) for index, key in enumerate(self.keys)}
+
+    def to_table(self):
+        ''' Copy the table into an InfosetTable, e.g., to continue training
+
+        Returns:
+            (InfosetTable): The table
+        '''
+        return InfosetTable.from_dicts(self.action_num, self.to_dict(self.policy),
+                                       self.to_dict(self.average_policy), self.to_dict(self.regrets))
@@ -33,12 +33,14 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import os
 import sys
 import collections
 import random
 import numpy as np
 import tensorflow as tf
 
+from rlcard.utils.storage import ArrayStorage
 from rlcard.utils.utils import remove_illegal
 
 sys.setrecursionlimit(10000000)
@@ -73,7 +75,9 @@ class DeepCFR():
              learning_rate=1e-4,
              batch_size_advantage=16,
              batch_size_strategy=16,
-             memory_capacity=int(1e7)):
+             memory_capacity=int(1e7),
+             memory_path=None,
+             batch_traversal=False):
         ''' Initialize the Deep CFR
 
         Args:
@@ -88,6 +92,11 @@ class DeepCFR():
             batch_size_strategy (int or None): Batch size to sample from strategy
             memories
             memory_capacity (int): Number af samples that can be stored in memory
+            memory_path (str): The directory to store the memories in memory-mapped
+              arrays, or None to keep them in memory
+            batch_traversal (boolean): Traverse the game trees of all the
+              traversals breadth-first from snapshots, and evaluate the
+              advantage networks on each level of the trees in one batch
         '''
         self.use_raw = False
         self._env = env
@@ -96,6 +105,7 @@ class DeepCFR():
         self._batch_size_strategy = batch_size_strategy
         self._num_players = env.player_num
         self._num_step = num_step
+        self._batch_traversal = batch_traversal
         self.advantage_losses = collections.defaultdict(list)
         self.traverse = []
 
@@ -139,7 +149,9 @@ class DeepCFR():
                     name="action_ph_" + str(p)))
 
         # Define strategy network, loss & memory.
-        self._strategy_memories = FixedSizeRingBuffer(memory_capacity)
+        self._strategy_memories = FixedSizeRingBuffer(
+                memory_capacity, None if memory_path is None else os.path.join(memory_path, 'strategy'),
+                array_storage=True)
 
         fc = self._info_state_ph
         for dim in list(policy_network_layers):
@@ -158,7 +170,10 @@ class DeepCFR():
 
         # Define advantage network, loss & memory. (One per player)
         self._advantage_memories = [
-            FixedSizeRingBuffer(memory_capacity) for _ in range(self._num_players)
+            FixedSizeRingBuffer(memory_capacity, None if memory_path is None else
+                                os.path.join(memory_path, 'advantage_' + str(p)),
+                                array_storage=True)
+            for p in range(self._num_players)
         ]
         self._advantage_outputs = []
         with tf.variable_scope('advantage'):
@@ -199,11 +214,14 @@ class DeepCFR():
         init_state, init_player = self._env.reset()
         self._root_node = init_state
         for p in range(self._num_players):
-            while init_player != p:
-                init_state, init_player = self._env.reset()
-                self._root_node = init_state
-            for _ in range(self._num_traversals):
-                self._traverse_game_tree(self._root_node, init_player)
+            if self._batch_traversal:
+                self._traverse_game_trees(p)
+            else:
+                while init_player != p:
+                    init_state, init_player = self._env.reset()
+                    self._root_node = init_state
+                for _ in range(self._num_traversals):
+                    self._traverse_game_tree(self._root_node, init_player)
 
             # Re-initialize advantage networks and train from scratch.
             self.reinitialize_advantage_networks()
@@ -343,6 +361,120 @@ class DeepCFR():
                     self._iteration, strategy))
             return self._traverse_game_tree(child_state, player)
 
+    def _traverse_game_trees(self, player):
+        ''' Performs all the traversals of one step breadth-first.
+
+        Each traversal deals a new game. The nodes of each level of the trees
+        are queued as snapshots of the environment, and the advantage networks
+        are evaluated on all the queued information sets at once. The values
+        are then backed up from the leaves, and the memories are populated
+        with one batch each.
+
+        Args:
+            player (int): Player index for the traversals.
+        '''
+        env = self._env
+        # The children of each node, i.e., all the legal actions of the
+        # traverser or the sampled action of the other players
+        children = []
+        sampled = []
+        strategies = []
+        values = []
+        obs = []
+        legal_actions = []
+
+        def add_node(state):
+            children.append([])
+            sampled.append(False)
+            strategies.append(None)
+            obs.append(state['obs'].flatten())
+            legal_actions.append(state['legal_actions'])
+            if env.is_over():
+                values.append(env.get_payoffs()[player])
+                return None
+            values.append(None)
+            return len(values) - 1, env.get_player_id(), env.get_snapshot()
+
+        queue = []
+        for _ in range(self._num_traversals):
+            state, _ = env.reset()
+            queue.append(add_node(state))
+        strategy_rows = []
+        while queue:
+            nodes, players, snapshots = zip(*queue)
+            nodes = np.array(nodes)
+            players = np.array(players)
+            advantages = np.array(self._session.run(
+                self._advantage_outputs, feed_dict={self._info_state_ph: np.array([obs[node] for node in nodes])}))
+            legal_mask = np.zeros((len(nodes), self._num_actions))
+            for i, node in enumerate(nodes):
+                legal_mask[i, legal_actions[node]] = 1
+            node_strategies = self._regret_matching(advantages[players, np.arange(len(nodes))], legal_mask)
+            # Sample the actions of the other players by inverting the cumulative probabilities
+            cumulative = node_strategies.cumsum(axis=1)
+            sampled_actions = (cumulative > np.random.random_sample((len(nodes), 1)) * cumulative[:, -1:]).argmax(axis=1)
+
+            queue = []
+            for node, current_player, snapshot, strategy, sampled_action in zip(
+                    nodes, players, snapshots, node_strategies, sampled_actions):
+                strategies[node] = strategy
+                if current_player == player:
+                    actions = legal_actions[node]
+                else:
+                    actions = [sampled_action]
+                    sampled[node] = True
+                    strategy_rows.append(node)
+                for action in actions:
+                    env.restore(snapshot)
+                    child_state, _ = env.step(action)
+                    children[node].append(len(values))
+                    child = add_node(child_state)
+                    if child is not None:
+                        queue.append(child)
+
+        # Children are added after their parents, so each node is backed up after its children
+        advantage_rows, advantage_actions, sampled_regrets = [], [], []
+        for node in reversed(range(len(values))):
+            if values[node] is not None:
+                continue
+            child_values = np.array([values[child] for child in children[node]])
+            if sampled[node]:
+                values[node] = child_values[0]
+                continue
+            actions = legal_actions[node]
+            values[node] = np.dot(strategies[node][actions], child_values)
+            advantage_rows.extend([node] * len(actions))
+            advantage_actions.extend(actions)
+            sampled_regrets.extend(child_values - values[node])
+
+        obs = np.array(obs, dtype=np.float32)
+        self._advantage_memories[player].add_batch(AdvantageMemory(
+            info_state=obs[advantage_rows],
+            iteration=np.full(len(advantage_rows), self._iteration),
+            advantage=np.array(sampled_regrets, dtype=np.float32),
+            action=np.array(advantage_actions)))
+        self._strategy_memories.add_batch(StrategyMemory(
+            info_state=obs[strategy_rows],
+            iteration=np.full(len(strategy_rows), self._iteration),
+            strategy_action_probs=np.array([strategies[node] for node in strategy_rows], dtype=np.float32)))
+
+    def _regret_matching(self, advantages, legal_mask):
+        ''' Returns the policies of a batch of info states by regret-matching.
+            The policy is uniform over the legal actions if no advantage is positive.
+
+        Args:
+            advantages (numpy.array): The advantages of the actions of the info states
+            legal_mask (numpy.array): 1 for the legal actions of the info states and 0 otherwise
+
+        Returns:
+            (numpy.array): The probabilities of the actions of the info states
+        '''
+        advantages = np.maximum(advantages, 0.) * legal_mask
+        cumulative_regret = advantages.sum(axis=1, keepdims=True)
+        uniform = legal_mask / legal_mask.sum(axis=1, keepdims=True)
+        return np.where(cumulative_regret > 0.,
+                        advantages / np.maximum(cumulative_regret, 1e-12), uniform)
+
     def _sample_action_from_advantage(self, state, player):
         ''' Returns an info state policy by applying regret-matching.
 
@@ -396,29 +528,21 @@ class DeepCFR():
         Returns:
             loss advantages (float): The average loss over the advantage network.
         '''
-        if self._batch_size_advantage and self._batch_size_advantage < len(self._advantage_memories[player]._data):
-            samples = self._advantage_memories[player].sample(self._batch_size_advantage)
-        else:
-            samples = self._advantage_memories[player]
-        info_states = []
-        advantages = []
-        iterations = []
-        acts = []
-        for s in samples:
-            info_states.append(s.info_state)
-            advantages.append(s.advantage)
-            iterations.append(s.iteration)
-            acts.append(s.action)
-        if info_states == []:
-            return None
+        memory = self._advantage_memories[player]
         # Ensure some samples have been gathered.
+        if not len(memory):
+            return None
+        if self._batch_size_advantage and self._batch_size_advantage < len(memory):
+            samples = memory.sample_batch(self._batch_size_advantage)
+        else:
+            samples = memory.get_batch()
         loss_advantages, _ = self._session.run(
             [self._loss_advantages[player], self._learn_step_advantages[player]],
             feed_dict={
-                self._info_state_ph: np.array(info_states),
-                self._advantage_ph[player]: np.array(advantages),
-                self._action_ph[player]: np.array(acts),
-                self._iter_ph: np.array(iterations)
+                self._info_state_ph: samples.info_state,
+                self._advantage_ph[player]: samples.advantage,
+                self._action_ph[player]: samples.action,
+                self._iter_ph: samples.iteration
             })
         return loss_advantages
 
@@ -428,25 +552,19 @@ class DeepCFR():
         Returns:
             The average loss obtained on this batch of transitions or `None`.
         '''
-        if self._batch_size_strategy and self._batch_size_strategy < len(self._strategy_memories._data):
-            samples = self._strategy_memories.sample(self._batch_size_strategy)
-        else:
-            samples = self._strategy_memories
-        info_states = []
-        action_probs = []
-        iterations = []
-        for s in samples:
-            info_states.append(s.info_state)
-            action_probs.append(s.strategy_action_probs)
-            iterations.append(s.iteration)
-        if info_states == []:
+        memory = self._strategy_memories
+        if not len(memory):
             return None
+        if self._batch_size_strategy and self._batch_size_strategy < len(memory):
+            samples = memory.sample_batch(self._batch_size_strategy)
+        else:
+            samples = memory.get_batch()
         loss_strategy, _ = self._session.run(
             [self._loss_policy, self._learn_step_policy],
             feed_dict={
-                self._info_state_ph: np.array(info_states),
-                self._action_probs_ph: np.array(np.squeeze(action_probs)),
-                self._iter_ph: np.array(iterations),
+                self._info_state_ph: samples.info_state,
+                self._action_probs_ph: samples.strategy_action_probs,
+                self._iter_ph: samples.iteration,
             })
         return loss_strategy
 
@@ -456,15 +574,30 @@ class FixedSizeRingBuffer(object):
     Stored transitions can be sampled uniformly.
 
     The underlying datastructure is a ring buffer, allowing 0(1) adding and
-    sampling.
+    sampling. With array storage or a storage path, the elements must be
+    namedtuples of fixed shapes, and they are stored in preallocated arrays,
+    which are memory-mapped with a storage path.
     '''
-    def __init__(self, replay_buffer_capacity):
+    def __init__(self, replay_buffer_capacity, storage_path=None, storage_mode='w+', array_storage=False):
         ''' Initialize the buffer
+
+        Args:
+            replay_buffer_capacity (int): The maximum number of elements
+            storage_path (str): The directory of the memory-mapped arrays, or
+              None to keep the elements in a list
+            storage_mode (str): 'w+' to create the arrays, 'r+' to continue
+              with a saved buffer, or 'r' to sample from it read-only
+            array_storage (boolean): Store the elements in arrays instead of a
+              list, which is implied by a storage path
         '''
 
         self._replay_buffer_capacity = replay_buffer_capacity
-        self._data = []
-        self._next_entry_index = 0
+        if storage_path is None and not array_storage:
+            self._data = []
+            self._next_entry_index = 0
+        else:
+            self._data = ArrayStorage(replay_buffer_capacity, storage_path, storage_mode)
+            self._next_entry_index = self._data.meta.get('next_entry_index', 0)
 
     def add(self, element):
         '''Adds `element` to the buffer.
@@ -497,17 +630,84 @@ class FixedSizeRingBuffer(object):
         if len(self._data) < num_samples:
             raise ValueError("{} elements could not be sampled from size {}".format(
                 num_samples, len(self._data)))
-        return random.sample(self._data, num_samples)
+        if isinstance(self._data, list):
+            return random.sample(self._data, num_samples)
+        return self._data.get_records(np.array(random.sample(range(len(self._data)), num_samples)))
+
+    def add_batch(self, elements):
+        ''' Adds a batch of elements to the buffer, writing each field at once.
+
+        If the buffer is full, the oldest elements will be replaced.
+
+        Args:
+            elements (namedtuple): The fields of the elements, each stacked along the first axis
+        '''
+        elements = type(elements)(*(np.asarray(values) for values in elements))
+        num = len(elements[0])
+        if isinstance(self._data, list):
+            for element in zip(*elements):
+                self.add(type(elements)(*element))
+            return
+        fill_num = max(min(num, self._replay_buffer_capacity - len(self._data)), 0)
+        if fill_num:
+            self._data.extend(type(elements)(*(values[:fill_num] for values in elements)))
+        if fill_num < num:
+            # Only the last elements are kept if the batch exceeds the capacity
+            rows = np.arange(max(fill_num, num - self._replay_buffer_capacity), num)
+            self._next_entry_index = int(self._next_entry_index)
+            idx = (self._next_entry_index + rows - fill_num) % self._replay_buffer_capacity
+            self._data.set_columns(idx, type(elements)(*(values[rows] for values in elements)))
+            self._next_entry_index = (self._next_entry_index + num - fill_num) % self._replay_buffer_capacity
+
+    def sample_batch(self, num_samples):
+        ''' Returns `num_samples` uniformly sampled from the buffer as stacked arrays.
+
+        Args:
+            num_samples (int): number of samples to draw.
+
+        Returns:
+            (namedtuple): The arrays of the fields of the elements, stacked along the first axis
+
+        Raises:
+            ValueError: If there are less than `num_samples` elements in the buffer
+        '''
+        if len(self._data) < num_samples:
+            raise ValueError("{} elements could not be sampled from size {}".format(
+                num_samples, len(self._data)))
+        if isinstance(self._data, list):
+            samples = random.sample(self._data, num_samples)
+            return type(samples[0])(*(np.array(values) for values in zip(*samples)))
+        return self._data.get_columns(np.array(random.sample(range(len(self._data)), num_samples)))
+
+    def get_batch(self):
+        ''' Returns all the elements of the buffer as stacked arrays. With array
+            storage, the arrays are slices of the storage without copying
+
+        Returns:
+            (namedtuple): The arrays of the fields of the elements, stacked along the first axis
+        '''
+        if isinstance(self._data, list):
+            return type(self._data[0])(*(np.array(values) for values in zip(*self._data)))
+        return self._data.get_columns(slice(0, len(self._data)))
 
     def clear(self):
         ''' Clear the buffer
         '''
-        self._data = []
+        if isinstance(self._data, list):
+            self._data = []
+        else:
+            self._data.clear()
         self._next_entry_index = 0
 
+    def flush(self):
+        ''' Write the memory-mapped arrays and the counters to the files
+        '''
+        if not isinstance(self._data, list):
+            self._data.meta['next_entry_index'] = self._next_entry_index
+            self._data.flush()
+
     def __len__(self):
         return len(self._data)
 
     def __iter__(self):
         return iter(self._data)
-
@@ -24,15 +24,12 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 '''
 
-import random
 import numpy as np
 import tensorflow as tf
-from collections import namedtuple
 
+from rlcard.utils.storage import ArrayStorage
 from rlcard.utils.utils import remove_illegal
 
-Transition = namedtuple('Transition', ['state', 'action', 'reward', 'next_state', 'done'])
-
 
 class DQNAgent(object):
 
@@ -51,7 +48,11 @@ class DQNAgent(object):
                  state_shape=None,
                  train_every=1,
                  mlp_layers=None,
-                 learning_rate=0.00005):
+                 learning_rate=0.00005,
+                 prioritized_replay=False,
+                 prioritized_replay_alpha=0.6,
+                 prioritized_replay_beta=0.4,
+                 replay_memory_path=None):
 
         '''
         Q-Learning algorithm for off-policy TD control using Function Approximation.
@@ -78,6 +79,12 @@ class DQNAgent(object):
             train_every (int): Train the network every X steps.
             mlp_layers (list): The layer number and the dimension of each layer in MLP
             learning_rate (float): The learning rate of the DQN agent.
+            prioritized_replay (boolean): Sample the transitions by the priorities of their TD errors
+            prioritized_replay_alpha (float): How much the priorities are used, where 0 is uniform
+            prioritized_replay_beta (float): The initial exponent of the importance-sampling weights,
+              which is annealed to 1 over epsilon_decay_steps
+            replay_memory_path (str): The directory to store the replay memory in
+              memory-mapped arrays, or None to keep it in memory
         '''
         self.use_raw = False
         self.sess = sess
@@ -104,7 +111,13 @@ class DQNAgent(object):
         self.target_estimator = Estimator(scope=self.scope+"_target_q", action_num=action_num, learning_rate=learning_rate, state_shape=state_shape, mlp_layers=mlp_layers)
 
         # Create replay memory
-        self.memory = Memory(replay_memory_size, batch_size)
+        self.prioritized_replay = prioritized_replay
+        if prioritized_replay:
+            self.memory = PrioritizedMemory(replay_memory_size, batch_size, action_num, prioritized_replay_alpha,
+                                            storage_path=replay_memory_path)
+            self.betas = np.linspace(prioritized_replay_beta, 1.0, epsilon_decay_steps)
+        else:
+            self.memory = Memory(replay_memory_size, batch_size, action_num, replay_memory_path)
 
     def feed(self, ts):
         ''' Store data in to replay buffer and train the agent. There are two stages.
@@ -115,7 +128,7 @@ class DQNAgent(object):
             ts (list): a list of 5 elements that represent the transition
         '''
         (state, action, reward, next_state, done) = tuple(ts)
-        self.feed_memory(state['obs'], action, reward, next_state['obs'], done)
+        self.feed_memory(state['obs'], action, reward, next_state['obs'], done, next_state['legal_actions'])
         self.total_t += 1
         tmp = self.total_t - self.replay_memory_init_size
         if tmp>=0 and tmp%self.train_every == 0:
@@ -166,23 +179,83 @@ class DQNAgent(object):
         A[best_action] += (1.0 - epsilon)
         return A
 
+    def batch_step(self, states):
+        ''' Predict the actions of a batch of states for generating training data.
+            Only one forward pass is made for the whole batch.
+
+        Args:
+            states (list): a list of state dicts
+
+        Returns:
+            actions (list): a list of action ids
+        '''
+        A = self.batch_predict(np.array([state['obs'] for state in states]))
+        actions = []
+        for probs, state in zip(A, states):
+            probs = remove_illegal(probs, state['legal_actions'])
+            actions.append(np.random.choice(np.arange(len(probs)), p=probs))
+        return actions
+
+    def batch_eval_step(self, states):
+        ''' Predict the actions of a batch of states for evaluation purpose.
+            Only one forward pass is made for the whole batch.
+
+        Args:
+            states (list): a list of state dicts
+
+        Returns:
+            actions (list): a list of action ids
+            probs (list): a list of probabilities for each state
+        '''
+        q_values = self.q_estimator.predict(self.sess, np.array([state['obs'] for state in states]))
+        actions, probs = [], []
+        for q_value, state in zip(q_values, states):
+            prob = remove_illegal(np.exp(q_value), state['legal_actions'])
+            actions.append(np.argmax(prob))
+            probs.append(prob)
+        return actions, probs
+
+    def batch_predict(self, states):
+        ''' Predict the action probabilities of a batch of states
+
+        Args:
+            states (numpy.array): a batch of states
+
+        Returns:
+            A (numpy.array): a 2-d array where each row represents the action probabilities
+        '''
+        epsilon = self.epsilons[min(self.total_t, self.epsilon_decay_steps-1)]
+        A = np.ones((len(states), self.action_num), dtype=float) * epsilon / self.action_num
+        q_values = self.q_estimator.predict(self.sess, states)
+        best_actions = np.argmax(q_values, axis=1)
+        A[np.arange(len(states)), best_actions] += (1.0 - epsilon)
+        return A
+
     def train(self):
         ''' Train the network
 
         Returns:
             loss (float): The loss of the current batch.
         '''
-        state_batch, action_batch, reward_batch, next_state_batch, done_batch = self.memory.sample()
+        if self.prioritized_replay:
+            beta = self.betas[min(self.total_t, self.epsilon_decay_steps-1)]
+            state_batch, action_batch, reward_batch, next_state_batch, done_batch, legal_actions_batch, \
+                weights, indexes = self.memory.sample(beta)
+        else:
+            state_batch, action_batch, reward_batch, next_state_batch, done_batch, legal_actions_batch = self.memory.sample()
+            weights = None
         # Calculate q values and targets (Double DQN)
         q_values_next = self.q_estimator.predict(self.sess, next_state_batch)
+        q_values_next = np.where(legal_actions_batch, q_values_next, -np.inf)
         best_actions = np.argmax(q_values_next, axis=1)
         q_values_next_target = self.target_estimator.predict(self.sess, next_state_batch)
         target_batch = reward_batch + np.invert(done_batch).astype(np.float32) * \
             self.discount_factor * q_values_next_target[np.arange(self.batch_size), best_actions]
 
-        # Perform gradient descent update
-        state_batch = np.array(state_batch)
-        loss = self.q_estimator.update(self.sess, state_batch, action_batch, target_batch)
+        # Perform gradient descent update and refresh the priorities with the TD errors
+        loss, action_predictions = self.q_estimator.update(self.sess, state_batch, action_batch, target_batch, weights)
+        if self.prioritized_replay:
+            self.memory.update_priorities(indexes, target_batch - action_predictions)
         print('\rINFO - Agent {}, step {}, rl-loss: {}'.format(self.scope, self.total_t, loss), end='')
 
 
@@ -193,7 +266,7 @@ class DQNAgent(object):
 
         self.train_t += 1
 
-    def feed_memory(self, state, action, reward, next_state, done):
+    def feed_memory(self, state, action, reward, next_state, done, legal_actions=None):
         ''' Feed transition to memory
 
         Args:
@@ -202,8 +275,9 @@ class DQNAgent(object):
             reward (float): the reward received
             next_state (numpy.array): the next state after performing the action
             done (boolean): whether the episode is finished
+            legal_actions (list): the legal actions of the next state
         '''
-        self.memory.save(state, action, reward, next_state, done)
+        self.memory.save(state, action, reward, next_state, done, legal_actions)
 
     def copy_params_op(self, global_vars):
         ''' Copys the variables of two estimator to others.
@@ -258,6 +332,8 @@ class Estimator():
         self.y_pl = tf.placeholder(shape=[None], dtype=tf.float32, name="y")
         # Integer id of which action was selected
         self.actions_pl = tf.placeholder(shape=[None], dtype=tf.int32, name="actions")
+        # Importance-sampling weights of prioritized replay
+        self.weights_pl = tf.placeholder_with_default(tf.ones_like(self.y_pl), shape=[None], name="weights")
         # Boolean to indicate whether is training or not
         self.is_train = tf.placeholder(tf.bool, name="is_train")
 
@@ -278,7 +354,7 @@ class Estimator():
 
         # Calculate the loss
         self.losses = tf.squared_difference(self.y_pl, self.action_predictions)
-        self.loss = tf.reduce_mean(self.losses)
+        self.loss = tf.reduce_mean(self.weights_pl * self.losses)
 
     def predict(self, sess, s):
         ''' Predicts action values.
@@ -294,7 +370,7 @@ class Estimator():
         '''
         return sess.run(self.predictions, { self.X_pl: s, self.is_train:False})
 
-    def update(self, sess, s, a, y):
+    def update(self, sess, s, a, y, weights=None):
         ''' Updates the estimator towards the given targets.
 
         Args:
@@ -302,30 +378,53 @@ class Estimator():
           s (list): State input of shape [batch_size, 4, 160, 160, 3]
           a (list): Chosen actions of shape [batch_size]
           y (list): Targets of shape [batch_size]
+          weights (list): Importance-sampling weights of the squared errors of shape [batch_size]
 
         Returns:
-          The calculated loss on the batch.
+          The calculated loss on the batch, and the Q-values of the chosen
+          actions before the update, of shape [batch_size]
         '''
         feed_dict = { self.X_pl: s, self.y_pl: y, self.actions_pl: a, self.is_train: True}
-        _, _, loss = sess.run(
-                [tf.contrib.framework.get_global_step(), self.train_op, self.loss],
+        if weights is not None:
+            feed_dict[self.weights_pl] = weights
+        _, _, loss, action_predictions = sess.run(
+                [tf.contrib.framework.get_global_step(), self.train_op, self.loss, self.action_predictions],
                 feed_dict)
-        return loss
+        return loss, action_predictions
 
 class Memory(object):
-    ''' Memory for saving transitions
+    ''' Memory for saving transitions. The transitions are stored in arrays that
+        are preallocated on the first save, with the shape and the dtype of the
+        first state, and the oldest transition is overwritten when it is full.
+        With a storage path, the arrays are memory-mapped files
     '''
 
-    def __init__(self, memory_size, batch_size):
+    def __init__(self, memory_size, batch_size, action_num=None, storage_path=None, storage_mode='w+'):
         ''' Initialize
         Args:
             memory_size (int): the size of the memroy buffer
+            batch_size (int): the number of transitions of a sample
+            action_num (int): the number of actions. If given, the legal actions
+              of the next states are saved as a mask
+            storage_path (str): the directory of the memory-mapped arrays, or
+              None to keep them in memory
+            storage_mode (str): 'w+' to create the arrays, 'r+' to continue
+              with saved arrays, or 'r' to sample from them read-only
         '''
         self.memory_size = memory_size
         self.batch_size = batch_size
-        self.memory = []
+        self.action_num = action_num
+        self.storage = ArrayStorage(memory_size, storage_path, storage_mode)
+        self.states = self.actions = self.rewards = self.next_states = self.dones = self.legal_actions = None
+        if self.storage.columns is not None:
+            self._bind_columns()
+        self.size = len(self.storage)
+        self.pointer = self.storage.meta.get('pointer', self.size % max(memory_size, 1))
+
+    def __len__(self):
+        return self.size
 
-    def save(self, state, action, reward, next_state, done):
+    def save(self, state, action, reward, next_state, done, legal_actions=None):
         ''' Save transition into memory
 
         Args:
@@ -334,24 +433,193 @@ class Memory(object):
             reward (float): the reward received
             next_state (numpy.array): the next state after performing the action
             done (boolean): whether the episode is finished
+            legal_actions (list): the legal actions of the next state. All the
+              actions are legal if it is None
         '''
-        if len(self.memory) == self.memory_size:
-            self.memory.pop(0)
-        transition = Transition(state, action, reward, next_state, done)
-        self.memory.append(transition)
+        if self.states is None:
+            state = np.asarray(state)
+            fields = [('states', state.shape, state.dtype),
+                      ('actions', (), np.int64),
+                      ('rewards', (), np.float32),
+                      ('next_states', state.shape, state.dtype),
+                      ('dones', (), bool)]
+            if self.action_num is not None:
+                fields.append(('legal_actions', (self.action_num,), bool))
+            self.storage.allocate('Transition', fields)
+            self._bind_columns()
+        index = self.pointer
+        self.states[index] = state
+        self.actions[index] = action
+        self.rewards[index] = reward
+        self.next_states[index] = next_state
+        self.dones[index] = done
+        if self.legal_actions is not None:
+            if legal_actions is None:
+                self.legal_actions[index] = True
+            else:
+                self.legal_actions[index] = False
+                self.legal_actions[index, list(legal_actions)] = True
+        self.pointer = (index + 1) % self.memory_size
+        self.size = min(self.size + 1, self.memory_size)
+
+    def flush(self):
+        ''' Write the memory-mapped arrays and the write pointer to the files
+        '''
+        self.storage.size = self.size
+        self.storage.meta['pointer'] = self.pointer
+        self.storage.flush()
+
+    def _bind_columns(self):
+        columns = self.storage.columns
+        self.states, self.actions, self.rewards = columns['states'], columns['actions'], columns['rewards']
+        self.next_states, self.dones = columns['next_states'], columns['dones']
+        self.legal_actions = columns.get('legal_actions')
 
     def sample(self):
-        ''' Sample a minibatch from the replay memory
+        ''' Sample a minibatch from the replay memory. The transitions are drawn
+            uniformly with replacement and gathered with one index array
 
         Returns:
-            state_batch (list): a batch of states
-            action_batch (list): a batch of actions
-            reward_batch (list): a batch of rewards
-            next_state_batch (list): a batch of states
-            done_batch (list): a batch of dones
+            state_batch (numpy.array): a batch of states
+            action_batch (numpy.array): a batch of actions
+            reward_batch (numpy.array): a batch of rewards
+            next_state_batch (numpy.array): a batch of states
+            done_batch (numpy.array): a batch of dones
+            legal_actions_batch (numpy.array): a batch of masks of the legal
+              actions of the next states, or None without action_num
+        '''
+        indexes = np.random.randint(self.size, size=self.batch_size)
+        legal_actions_batch = None if self.legal_actions is None else self.legal_actions[indexes]
+        return self.states[indexes], self.actions[indexes], self.rewards[indexes], \
+            self.next_states[indexes], self.dones[indexes], legal_actions_batch
+
+class SumTree(object):
+    ''' A binary tree stored in an array, where every node holds the sum of the
+        priorities of its leaves. Sampling a leaf with probability proportional
+        to its priority and updating a priority take O(log n) time, and both
+        are done for a whole batch with array operations
+    '''
+
+    def __init__(self, capacity):
+        ''' Initialize
+        Args:
+            capacity (int): the number of leaves
+        '''
+        self.capacity = capacity
+        # the children of node i are 2i+1 and 2i+2, and leaf j is node offset+j,
+        # where the leaves are padded to a power of two to keep them in order
+        self.offset = (1 << (capacity - 1).bit_length()) - 1
+        self.tree = np.zeros(2 * self.offset + 1)
+
+    def total(self):
+        return self.tree[0]
+
+    def get(self, indexes):
+        return self.tree[np.asarray(indexes) + self.offset]
+
+    def update(self, indexes, priorities):
+        ''' Set the priorities of the leaves and the sums of their ancestors
+
+        Args:
+            indexes (numpy.array): the indexes of the leaves
+            priorities (numpy.array): the new priorities
+        '''
+        # keep the last priority of repeated leaves
+        nodes, last = np.unique(np.asarray(indexes)[::-1] + self.offset, return_index=True)
+        priorities = np.broadcast_to(priorities, np.shape(indexes))[::-1][last]
+        deltas = priorities - self.tree[nodes]
+        self.tree[nodes] = priorities
+        while len(nodes):
+            keep = nodes > 0
+            nodes, deltas = (nodes[keep] - 1) // 2, deltas[keep]
+            np.add.at(self.tree, nodes, deltas)
+
+    def find(self, values):
+        ''' Find the leaves where the cumulative sums of the priorities reach the values
+
+        Args:
+            values (numpy.array): the values in [0, total)
+
+        Returns:
+            indexes (numpy.array): the indexes of the leaves
+        '''
+        values = np.array(values, dtype=float)
+        nodes = np.zeros(len(values), dtype=np.int64)
+        inner = nodes < self.offset
+        while inner.any():
+            left = 2 * nodes[inner] + 1
+            left_sums = self.tree[left]
+            right = values[inner] >= left_sums
+            values[inner] -= np.where(right, left_sums, 0)
+            nodes[inner] = left + right
+            inner = nodes < self.offset
+        return nodes - self.offset
+
+class PrioritizedMemory(Memory):
+    ''' Memory for prioritized experience replay. Transitions are sampled with
+        probabilities proportional to their priorities, the TD errors raised to
+        the power of alpha, and new transitions get the maximum priority so far
+    '''
+
+    def __init__(self, memory_size, batch_size, action_num=None, alpha=0.6, epsilon=1e-6,
+                 storage_path=None, storage_mode='w+'):
+        ''' Initialize
+        Args:
+            memory_size (int): the size of the memroy buffer
+            batch_size (int): the number of transitions of a sample
+            action_num (int): the number of actions
+            alpha (float): how much the priorities are used, where 0 is uniform
+            epsilon (float): the priority added to the absolute TD errors
+            storage_path (str): the directory of the memory-mapped arrays, as in
+              Memory. The priorities are kept in memory and start equal
+            storage_mode (str): the mode of the memory-mapped arrays
+        '''
+        super(PrioritizedMemory, self).__init__(memory_size, batch_size, action_num, storage_path, storage_mode)
+        self.alpha = alpha
+        self.epsilon = epsilon
+        self.max_priority = 1.0
+        self.tree = SumTree(max(memory_size, 1))
+        if self.size:
+            self.tree.update(np.arange(self.size), self.max_priority)
+
+    def save(self, state, action, reward, next_state, done, legal_actions=None):
+        index = self.pointer
+        super(PrioritizedMemory, self).save(state, action, reward, next_state, done, legal_actions)
+        self.tree.update([index], self.max_priority)
+
+    def sample(self, beta=0.4):
+        ''' Sample a minibatch, with one transition from each of batch_size
+            segments of equal priority mass
+
+        Args:
+            beta (float): the exponent of the importance-sampling weights, where 1
+              fully compensates the non-uniform probabilities
+
+        Returns:
+            The batches of Memory.sample, followed by
+            weights (numpy.array): the importance-sampling weights, normalized by their maximum
+            indexes (numpy.array): the indexes of the transitions, for update_priorities
+        '''
+        segment = self.tree.total() / self.batch_size
+        values = (np.arange(self.batch_size) + np.random.random_sample(self.batch_size)) * segment
+        indexes = np.minimum(self.tree.find(values), self.size - 1)
+        probs = self.tree.get(indexes) / self.tree.total()
+        weights = (self.size * probs) ** -beta
+        weights = (weights / weights.max()).astype(np.float32)
+        legal_actions_batch = None if self.legal_actions is None else self.legal_actions[indexes]
+        return self.states[indexes], self.actions[indexes], self.rewards[indexes], \
+            self.next_states[indexes], self.dones[indexes], legal_actions_batch, weights, indexes
+
+    def update_priorities(self, indexes, td_errors):
+        ''' Update the priorities of sampled transitions from their new TD errors
+
+        Args:
+            indexes (numpy.array): the indexes returned by sample
+            td_errors (numpy.array): the TD errors of the transitions
         '''
-        samples = random.sample(self.memory, self.batch_size)
-        return map(np.array, zip(*samples))
+        priorities = (np.abs(td_errors) + self.epsilon) ** self.alpha
+        self.tree.update(indexes, priorities)
+        self.max_priority = max(self.max_priority, priorities.max())
 
 def copy_model_parameters(sess, estimator1, estimator2):
     ''' Copys the model parameters of one estimator to another.
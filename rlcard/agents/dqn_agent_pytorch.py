@@ -28,14 +28,11 @@ SOFTWARE.
 import numpy as np
 import torch
 import torch.nn as nn
-from collections import namedtuple
 from copy import deepcopy
 
-from rlcard.agents.dqn_agent import Memory
+from rlcard.agents.dqn_agent import Memory, PrioritizedMemory
 from rlcard.utils.utils import remove_illegal
 
-Transition = namedtuple('Transition', ['state', 'action', 'reward', 'next_state', 'done'])
-
 
 class DQNAgent(object):
     '''
@@ -57,7 +54,11 @@ class DQNAgent(object):
                  train_every=1,
                  mlp_layers=None,
                  learning_rate=0.00005,
-                 device=None):
+                 device=None,
+                 prioritized_replay=False,
+                 prioritized_replay_alpha=0.6,
+                 prioritized_replay_beta=0.4,
+                 replay_memory_path=None):
 
         '''
         Q-Learning algorithm for off-policy TD control using Function Approximation.
@@ -83,6 +84,12 @@ class DQNAgent(object):
             mlp_layers (list): The layer number and the dimension of each layer in MLP
             learning_rate (float): The learning rate of the DQN agent.
             device (torch.device): whether to use the cpu or gpu
+            prioritized_replay (boolean): Sample the transitions by the priorities of their TD errors
+            prioritized_replay_alpha (float): How much the priorities are used, where 0 is uniform
+            prioritized_replay_beta (float): The initial exponent of the importance-sampling weights,
+              which is annealed to 1 over epsilon_decay_steps
+            replay_memory_path (str): The directory to store the replay memory in
+              memory-mapped arrays, or None to keep it in memory
         '''
         self.use_raw = False
         self.scope = scope
@@ -116,7 +123,13 @@ class DQNAgent(object):
             mlp_layers=mlp_layers, device=self.device)
 
         # Create replay memory
-        self.memory = Memory(replay_memory_size, batch_size)
+        self.prioritized_replay = prioritized_replay
+        if prioritized_replay:
+            self.memory = PrioritizedMemory(replay_memory_size, batch_size, action_num, prioritized_replay_alpha,
+                                            storage_path=replay_memory_path)
+            self.betas = np.linspace(prioritized_replay_beta, 1.0, epsilon_decay_steps)
+        else:
+            self.memory = Memory(replay_memory_size, batch_size, action_num, replay_memory_path)
 
     def feed(self, ts):
         ''' Store data in to replay buffer and train the agent. There are two stages.
@@ -127,7 +140,7 @@ class DQNAgent(object):
             ts (list): a list of 5 elements that represent the transition
         '''
         (state, action, reward, next_state, done) = tuple(ts)
-        self.feed_memory(state['obs'], action, reward, next_state['obs'], done)
+        self.feed_memory(state['obs'], action, reward, next_state['obs'], done, next_state['legal_actions'])
         self.total_t += 1
         tmp = self.total_t - self.replay_memory_init_size
         if tmp>=0 and tmp%self.train_every == 0:
@@ -179,16 +192,76 @@ class DQNAgent(object):
         A[best_action] += (1.0 - epsilon)
         return A
 
+    def batch_step(self, states):
+        ''' Predict the actions of a batch of states for generating training data.
+            Only one forward pass is made for the whole batch.
+
+        Args:
+            states (list): a list of state dicts
+
+        Returns:
+            actions (list): a list of action ids
+        '''
+        A = self.batch_predict(np.array([state['obs'] for state in states]))
+        actions = []
+        for probs, state in zip(A, states):
+            probs = remove_illegal(probs, state['legal_actions'])
+            actions.append(np.random.choice(np.arange(len(probs)), p=probs))
+        return actions
+
+    def batch_eval_step(self, states):
+        ''' Predict the actions of a batch of states for evaluation purpose.
+            Only one forward pass is made for the whole batch.
+
+        Args:
+            states (list): a list of state dicts
+
+        Returns:
+            actions (list): a list of action ids
+            probs (list): a list of probabilities for each state
+        '''
+        q_values = self.q_estimator.predict_nograd(np.array([state['obs'] for state in states]))
+        actions, probs = [], []
+        for q_value, state in zip(q_values, states):
+            prob = remove_illegal(np.exp(q_value), state['legal_actions'])
+            actions.append(np.argmax(prob))
+            probs.append(prob)
+        return actions, probs
+
+    def batch_predict(self, states):
+        ''' Predict the action probabilities of a batch of states but have
+            them disconnected from the computation graph
+
+        Args:
+            states (numpy.array): a batch of states
+
+        Returns:
+            A (numpy.array): a 2-d array where each row represents the action probabilities
+        '''
+        epsilon = self.epsilons[min(self.total_t, self.epsilon_decay_steps-1)]
+        A = np.ones((len(states), self.action_num), dtype=float) * epsilon / self.action_num
+        q_values = self.q_estimator.predict_nograd(states)
+        best_actions = np.argmax(q_values, axis=1)
+        A[np.arange(len(states)), best_actions] += (1.0 - epsilon)
+        return A
+
     def train(self):
         ''' Train the network
 
         Returns:
             loss (float): The loss of the current batch.
         '''
-        state_batch, action_batch, reward_batch, next_state_batch, done_batch = self.memory.sample()
+        if self.prioritized_replay:
+            beta = self.betas[min(self.total_t, self.epsilon_decay_steps-1)]
+            state_batch, action_batch, reward_batch, next_state_batch, done_batch, legal_actions_batch, \
+                weights, indexes = self.memory.sample(beta)
+        else:
+            state_batch, action_batch, reward_batch, next_state_batch, done_batch, legal_actions_batch = self.memory.sample()
+            weights = None
 
         # Calculate best next actions using Q-network (Double DQN)
         q_values_next = self.q_estimator.predict_nograd(next_state_batch)
+        q_values_next = np.where(legal_actions_batch, q_values_next, -np.inf)
         best_actions = np.argmax(q_values_next, axis=1)
 
         # Evaluate best next actions using Target-network (Double DQN)
@@ -196,10 +269,10 @@ class DQNAgent(object):
         target_batch = reward_batch + np.invert(done_batch).astype(np.float32) * \
             self.discount_factor * q_values_next_target[np.arange(self.batch_size), best_actions]
 
-        # Perform gradient descent update
-        state_batch = np.array(state_batch)
-
-        loss = self.q_estimator.update(state_batch, action_batch, target_batch)
+        # Perform gradient descent update and refresh the priorities with the TD errors
+        loss, action_predictions = self.q_estimator.update(state_batch, action_batch, target_batch, weights)
+        if self.prioritized_replay:
+            self.memory.update_priorities(indexes, target_batch - action_predictions)
         print('\rINFO - Agent {}, step {}, rl-loss: {}'.format(self.scope, self.total_t, loss), end='')
 
         # Update the target estimator
@@ -209,7 +282,7 @@ class DQNAgent(object):
 
         self.train_t += 1
 
-    def feed_memory(self, state, action, reward, next_state, done):
+    def feed_memory(self, state, action, reward, next_state, done, legal_actions=None):
         ''' Feed transition to memory
 
         Args:
@@ -218,8 +291,9 @@ class DQNAgent(object):
             reward (float): the reward received
             next_state (numpy.array): the next state after performing the action
             done (boolean): whether the episode is finished
+            legal_actions (list): the legal actions of the next state
         '''
-        self.memory.save(state, action, reward, next_state, done)
+        self.memory.save(state, action, reward, next_state, done, legal_actions)
 
     def get_state_dict(self):
         ''' Get the state dict to save models
@@ -302,7 +376,7 @@ class Estimator(object):
             q_as = self.qnet(s).cpu().numpy()
         return q_as
 
-    def update(self, s, a, y):
+    def update(self, s, a, y, weights=None):
         ''' Updates the estimator towards the given targets.
             In this case y is the target-network estimated
             value of the Q-network optimal actions, which
@@ -312,9 +386,11 @@ class Estimator(object):
           s (np.ndarray): (batch, state_shape) state representation
           a (np.ndarray): (batch,) integer sampled actions
           y (np.ndarray): (batch,) value of optimal actions according to Q-target
+          weights (np.ndarray): (batch,) importance-sampling weights of the squared errors
 
         Returns:
-          The calculated loss on the batch.
+          The calculated loss on the batch, and the Q-values of the
+          sampled actions before the update, of shape (batch,)
         '''
         self.optimizer.zero_grad()
 
@@ -331,14 +407,18 @@ class Estimator(object):
         Q = torch.gather(q_as, dim=-1, index=a.unsqueeze(-1)).squeeze(-1)
 
         # update model
-        batch_loss = self.mse_loss(Q, y)
+        if weights is None:
+            batch_loss = self.mse_loss(Q, y)
+        else:
+            weights = torch.from_numpy(weights).float().to(self.device)
+            batch_loss = torch.mean(weights * (Q - y) ** 2)
         batch_loss.backward()
         self.optimizer.step()
         batch_loss = batch_loss.item()
 
         self.qnet.eval()
 
-        return batch_loss
+        return batch_loss, Q.detach().cpu().numpy()
 
 
 class EstimatorNetwork(nn.Module):
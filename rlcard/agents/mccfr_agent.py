@@ -0,0 +1,142 @@
+''' Monte Carlo CFR agents
+
+See the paper http://mlanctot.info/files/papers/nips09mccfr.pdf for more details.
+'''
+
+import numpy as np
+
+from rlcard.agents.cfr_agent import CFRAgent
+from rlcard.utils.utils import *
+
+class ExternalSamplingCFRAgent(CFRAgent):
+    ''' Implement external sampling MCCFR. In each traversal, all the actions
+        of the traverser are explored while the chance outcomes and the actions
+        of the other players are sampled. The model is saved and loaded in the
+        same format as CFRAgent.
+    '''
+
+    def __init__(self, env, model_path='./mccfr_model'):
+        ''' Initilize Agent
+
+        Args:
+            env (Env): Env class. The environment should allow step_back
+            model_path (str): The path to save/load the model
+        '''
+        super(ExternalSamplingCFRAgent, self).__init__(env, model_path)
+
+    def train(self):
+        ''' Do one iteration of external sampling MCCFR
+        '''
+        self.iteration += 1
+        for player_id in range(self.env.player_num):
+            self.env.reset()
+            self.traverse_tree(player_id)
+
+    def traverse_tree(self, player_id):
+        ''' Traverse the sampled game tree, update the regrets and the average policy
+
+        Args:
+            player_id (int): The traverser
+
+        Returns:
+            (float): The sampled utility of the traverser
+        '''
+        if self.env.is_over():
+            return self.env.get_payoffs()[player_id]
+
+        current_player = self.env.get_player_id()
+        obs, legal_actions = self.get_state(current_player)
+        index = self.table.intern(obs)
+        action_probs = remove_illegal(self.table.regret_matching(index), legal_actions)
+
+        if not current_player == player_id:
+            # Sample one action of the other players and accumulate their average policy
+            self.table.average_policy[index, legal_actions] += action_probs[legal_actions]
+            action = np.random.choice(len(action_probs), p=action_probs)
+            self.env.step(action)
+            utility = self.traverse_tree(player_id)
+            self.env.step_back()
+            return utility
+
+        action_utilities = np.zeros(len(legal_actions))
+        for i, action in enumerate(legal_actions):
+            self.env.step(action)
+            action_utilities[i] = self.traverse_tree(player_id)
+            self.env.step_back()
+
+        state_utility = action_probs[legal_actions].dot(action_utilities)
+        self.table.regrets[index, legal_actions] += action_utilities - state_utility
+        return state_utility
+
+class OutcomeSamplingCFRAgent(CFRAgent):
+    ''' Implement outcome sampling MCCFR. Each traversal samples a single
+        trajectory, and the regrets are corrected with importance sampling. Since
+        the traversal only moves forward, step_back is not needed. The model is
+        saved and loaded in the same format as CFRAgent.
+    '''
+
+    def __init__(self, env, model_path='./mccfr_model', exploration=0.6):
+        ''' Initilize Agent
+
+        Args:
+            env (Env): Env class
+            model_path (str): The path to save/load the model
+            exploration (float): The probability of sampling a uniformly random
+              action for the traverser
+        '''
+        super(OutcomeSamplingCFRAgent, self).__init__(env, model_path)
+        self.exploration = exploration
+
+    def train(self):
+        ''' Do one iteration of outcome sampling MCCFR
+        '''
+        self.iteration += 1
+        for player_id in range(self.env.player_num):
+            self.env.reset()
+            self.traverse_tree(player_id, 1.0, 1.0)
+
+    def traverse_tree(self, player_id, opponent_prob, sample_prob):
+        ''' Traverse one sampled trajectory, update the regrets and the average policy
+
+        Args:
+            player_id (int): The traverser
+            opponent_prob (float): The reach probability of the other players
+            sample_prob (float): The probability of sampling the trajectory so far
+
+        Returns:
+            (float): The estimated utility of the traverser
+        '''
+        if self.env.is_over():
+            return self.env.get_payoffs()[player_id]
+
+        current_player = self.env.get_player_id()
+        obs, legal_actions = self.get_state(current_player)
+        index = self.table.intern(obs)
+        action_probs = remove_illegal(self.table.regret_matching(index), legal_actions)
+
+        if current_player == player_id:
+            sample_probs = np.zeros(self.env.action_num)
+            sample_probs[legal_actions] = self.exploration / len(legal_actions)
+            sample_probs += (1 - self.exploration) * action_probs
+        else:
+            sample_probs = action_probs
+        action = np.random.choice(len(sample_probs), p=sample_probs)
+
+        self.env.step(action)
+        if current_player == player_id:
+            utility = self.traverse_tree(player_id, opponent_prob, sample_prob * sample_probs[action])
+        else:
+            utility = self.traverse_tree(player_id, opponent_prob * action_probs[action],
+                                         sample_prob * sample_probs[action])
+
+        # Only the sampled action has a non-zero estimated utility
+        action_utilities = np.zeros(self.env.action_num)
+        action_utilities[action] = utility / sample_probs[action]
+        state_utility = action_probs.dot(action_utilities)
+
+        if current_player == player_id:
+            self.table.regrets[index, legal_actions] += (action_utilities[legal_actions] - state_utility) * \
+                opponent_prob / sample_prob
+        else:
+            self.table.average_policy[index, legal_actions] += opponent_prob * action_probs[legal_actions] / sample_prob
+        return state_utility
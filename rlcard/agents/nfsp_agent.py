@@ -25,6 +25,7 @@ import numpy as np
 import tensorflow as tf
 
 from rlcard.agents.dqn_agent import DQNAgent
+from rlcard.utils.storage import ArrayStorage
 from rlcard.utils.utils import remove_illegal
 
 Transition = collections.namedtuple('Transition', 'info_state action_probs')
@@ -58,7 +59,8 @@ class NFSPAgent(object):
                  q_batch_size=256,
                  q_train_every=1,
                  q_mlp_layers=None,
-                 evaluate_with='average_policy'):
+                 evaluate_with='average_policy',
+                 reservoir_buffer_path=None):
         ''' Initialize the NFSP agent.
 
         Args:
@@ -87,6 +89,8 @@ class NFSPAgent(object):
             q_train_step (int): Train the model every X steps.
             q_mlp_layers (list): The layer sizes of inner DQN agent.
             evaluate_with (string): The value can be 'best_response' or 'average_policy'
+            reservoir_buffer_path (str): The directory to store the buffer for average
+              policy in memory-mapped arrays, or None to keep it in memory
         '''
         self.use_raw = False
         self._sess = sess
@@ -100,7 +104,7 @@ class NFSPAgent(object):
         self._anticipatory_param = anticipatory_param
         self._min_buffer_size_to_learn = min_buffer_size_to_learn
 
-        self._reservoir_buffer = ReservoirBuffer(reservoir_buffer_capacity)
+        self._reservoir_buffer = ReservoirBuffer(reservoir_buffer_capacity, reservoir_buffer_path, array_storage=True)
         self._prev_timestep = None
         self._prev_action = None
         self.evaluate_with = evaluate_with
@@ -219,6 +223,54 @@ class NFSPAgent(object):
             raise ValueError("'evaluate_with' should be either 'average_policy' or 'best_response'.")
         return action, probs
 
+    def batch_step(self, states):
+        ''' Returns the actions to be taken for a batch of states.
+            Only one forward pass is made for the whole batch.
+
+        Args:
+            states (list): A list of state dicts
+
+        Returns:
+            actions (list): A list of action ids
+        '''
+        obs = np.array([state['obs'] for state in states])
+        if self._mode == MODE.best_response:
+            batch_probs = self._rl_agent.batch_predict(obs)
+            self._reservoir_buffer.add_batch(obs, np.eye(batch_probs.shape[1])[np.argmax(batch_probs, axis=1)])
+
+        elif self._mode == MODE.average_policy:
+            batch_probs = self._batch_act(obs)
+
+        actions = []
+        for probs, state in zip(batch_probs, states):
+            probs = remove_illegal(probs, state['legal_actions'])
+            actions.append(np.random.choice(len(probs), p=probs))
+
+        return actions
+
+    def batch_eval_step(self, states):
+        ''' Use the average policy for evaluation purpose on a batch of states
+
+        Args:
+            states (list): A list of state dicts.
+
+        Returns:
+            actions (list): A list of action ids.
+            probs (list): A list of action probabilies for each state
+        '''
+        if self.evaluate_with == 'best_response':
+            return self._rl_agent.batch_eval_step(states)
+        elif self.evaluate_with == 'average_policy':
+            batch_probs = self._batch_act(np.array([state['obs'] for state in states]))
+            actions, probs = [], []
+            for prob, state in zip(batch_probs, states):
+                prob = remove_illegal(prob, state['legal_actions'])
+                actions.append(np.random.choice(len(prob), p=prob))
+                probs.append(prob)
+        else:
+            raise ValueError("'evaluate_with' should be either 'average_policy' or 'best_response'.")
+        return actions, probs
+
     def sample_episode_policy(self):
         ''' Sample average/best_response policy
         '''
@@ -236,10 +288,20 @@ class NFSPAgent(object):
         Returns:
             action_probs (numpy.array): The predicted action probability.
         '''
-        info_state = np.expand_dims(info_state, axis=0)
+        return self._batch_act(np.expand_dims(info_state, axis=0))[0]
+
+    def _batch_act(self, info_states):
+        ''' Predict action probabilities of a batch of observations
+
+        Args:
+            info_states (numpy.array): A batch of obervations.
+
+        Returns:
+            action_probs (numpy.array): The predicted action probabilities.
+        '''
         action_probs = self._sess.run(
                 self._avg_policy_probs,
-                feed_dict={self._info_state_ph: info_state, self.is_train: False})[0]
+                feed_dict={self._info_state_ph: info_states, self.is_train: False})
 
         return action_probs
 
@@ -270,9 +332,7 @@ class NFSPAgent(object):
                 len(self._reservoir_buffer) < self._min_buffer_size_to_learn):
             return None
 
-        transitions = self._reservoir_buffer.sample(self._batch_size)
-        info_states = [t.info_state for t in transitions]
-        action_probs = [t.action_probs for t in transitions]
+        info_states, action_probs = self._reservoir_buffer.sample_batch(self._batch_size)
 
         loss, _ = self._sess.run(
                 [self._loss, self._learn_step],
@@ -288,17 +348,32 @@ class ReservoirBuffer(object):
     ''' Allows uniform sampling over a stream of data.
 
     This class supports the storage of arbitrary elements, such as observation
-    tensors, integer actions, etc.
+    tensors, integer actions, etc. With array storage or a storage path, the
+    elements must be namedtuples of fixed shapes, and they are stored in
+    preallocated arrays, which are memory-mapped with a storage path.
 
     See https://en.wikipedia.org/wiki/Reservoir_sampling for more details.
     '''
 
-    def __init__(self, reservoir_buffer_capacity):
+    def __init__(self, reservoir_buffer_capacity, storage_path=None, storage_mode='w+', array_storage=False):
         ''' Initialize the buffer.
+
+        Args:
+            reservoir_buffer_capacity (int): The maximum number of elements
+            storage_path (str): The directory of the memory-mapped arrays, or
+              None to keep the elements in memory
+            storage_mode (str): 'w+' to create the arrays, 'r+' to continue
+              with a saved buffer, or 'r' to sample from it read-only
+            array_storage (boolean): Store the elements in arrays instead of a
+              list, which is implied by a storage path
         '''
         self._reservoir_buffer_capacity = reservoir_buffer_capacity
-        self._data = []
-        self._add_calls = 0
+        if storage_path is None and not array_storage:
+            self._data = []
+            self._add_calls = 0
+        else:
+            self._data = ArrayStorage(reservoir_buffer_capacity, storage_path, storage_mode)
+            self._add_calls = self._data.meta.get('add_calls', len(self._data))
 
     def add(self, element):
         ''' Potentially adds `element` to the reservoir buffer.
@@ -329,14 +404,75 @@ class ReservoirBuffer(object):
         if len(self._data) < num_samples:
             raise ValueError("{} elements could not be sampled from size {}".format(
                     num_samples, len(self._data)))
-        return random.sample(self._data, num_samples)
+        if isinstance(self._data, list):
+            return random.sample(self._data, num_samples)
+        return self._data.get_records(np.array(random.sample(range(len(self._data)), num_samples)))
+
+    def add_batch(self, states, probs):
+        ''' Potentially adds a batch of transitions to the reservoir buffer. The
+            replaced elements of all the transitions are drawn at once, with the
+            same distribution as adding the transitions one by one.
+
+        Args:
+            states (numpy.array): The states, stacked along the first axis.
+            probs (numpy.array): The probabilities of each action of the states.
+        '''
+        batch = Transition(info_state=np.asarray(states), action_probs=np.asarray(probs))
+        num = len(batch.info_state)
+        if isinstance(self._data, list):
+            for transition in zip(*batch):
+                self.add(Transition(*transition))
+            return
+        fill_num = max(min(num, self._reservoir_buffer_capacity - len(self._data)), 0)
+        if fill_num:
+            self._data.extend(Transition(*(values[:fill_num] for values in batch)))
+        add_calls = self._add_calls + np.arange(fill_num, num)
+        idx = np.random.randint(0, add_calls + 1)
+        rows = np.arange(fill_num, num)[idx < self._reservoir_buffer_capacity]
+        idx = idx[idx < self._reservoir_buffer_capacity]
+        if len(idx):
+            # The last transition drawn to an element replaces it
+            idx, last = np.unique(idx[::-1], return_index=True)
+            rows = rows[::-1][last]
+            self._data.set_columns(idx, Transition(*(values[rows] for values in batch)))
+        self._add_calls += num
+
+    def sample_batch(self, num_samples):
+        ''' Returns `num_samples` uniformly sampled from the buffer as stacked arrays.
+
+        Args:
+            num_samples (int): The number of samples to draw.
+
+        Returns:
+            (namedtuple): The arrays of the fields of the elements, stacked along the first axis
+
+        Raises:
+            ValueError: If there are less than `num_samples` elements in the buffer
+        '''
+        if len(self._data) < num_samples:
+            raise ValueError("{} elements could not be sampled from size {}".format(
+                    num_samples, len(self._data)))
+        if isinstance(self._data, list):
+            samples = random.sample(self._data, num_samples)
+            return type(samples[0])(*(np.array(values) for values in zip(*samples)))
+        return self._data.get_columns(np.array(random.sample(range(len(self._data)), num_samples)))
 
     def clear(self):
         ''' Clear the buffer
         '''
-        self._data = []
+        if isinstance(self._data, list):
+            self._data = []
+        else:
+            self._data.clear()
         self._add_calls = 0
 
+    def flush(self):
+        ''' Write the memory-mapped arrays and the counters to the files
+        '''
+        if not isinstance(self._data, list):
+            self._data.meta['add_calls'] = self._add_calls
+            self._data.flush()
+
     def __len__(self):
         return len(self._data)
 
@@ -65,7 +65,8 @@ class NFSPAgent(object):
                  q_train_every=1,
                  q_mlp_layers=None,
                  evaluate_with='average_policy',
-                 device=None):
+                 device=None,
+                 reservoir_buffer_path=None):
         ''' Initialize the NFSP agent.
 
         Args:
@@ -93,6 +94,8 @@ class NFSPAgent(object):
             q_train_step (int): Train the model every X steps.
             q_mlp_layers (list): The layer sizes of inner DQN agent.
             device (torch.device): Whether to use the cpu or gpu
+            reservoir_buffer_path (str): The directory to store the buffer for average
+              policy in memory-mapped arrays, or None to keep it in memory
         '''
         self.use_raw = False
         self._scope = scope
@@ -105,7 +108,7 @@ class NFSPAgent(object):
         self._anticipatory_param = anticipatory_param
         self._min_buffer_size_to_learn = min_buffer_size_to_learn
 
-        self._reservoir_buffer = ReservoirBuffer(reservoir_buffer_capacity)
+        self._reservoir_buffer = ReservoirBuffer(reservoir_buffer_capacity, reservoir_buffer_path, array_storage=True)
         self._prev_timestep = None
         self._prev_action = None
         self.evaluate_with = evaluate_with
@@ -206,6 +209,54 @@ class NFSPAgent(object):
             raise ValueError("'evaluate_with' should be either 'average_policy' or 'best_response'.")
         return action, probs
 
+    def batch_step(self, states):
+        ''' Returns the actions to be taken for a batch of states.
+            Only one forward pass is made for the whole batch.
+
+        Args:
+            states (list): A list of state dicts
+
+        Returns:
+            actions (list): A list of action ids
+        '''
+        obs = np.array([state['obs'] for state in states])
+        if self._mode == MODE.best_response:
+            batch_probs = self._rl_agent.batch_predict(obs)
+            self._reservoir_buffer.add_batch(obs, batch_probs)
+
+        elif self._mode == MODE.average_policy:
+            batch_probs = self._batch_act(obs)
+
+        actions = []
+        for probs, state in zip(batch_probs, states):
+            probs = remove_illegal(probs, state['legal_actions'])
+            actions.append(np.random.choice(len(probs), p=probs))
+
+        return actions
+
+    def batch_eval_step(self, states):
+        ''' Use the average policy for evaluation purpose on a batch of states
+
+        Args:
+            states (list): A list of state dicts.
+
+        Returns:
+            actions (list): A list of action ids.
+            probs (list): A list of action probabilies for each state
+        '''
+        if self.evaluate_with == 'best_response':
+            return self._rl_agent.batch_eval_step(states)
+        elif self.evaluate_with == 'average_policy':
+            batch_probs = self._batch_act(np.array([state['obs'] for state in states]))
+            actions, probs = [], []
+            for prob, state in zip(batch_probs, states):
+                prob = remove_illegal(prob, state['legal_actions'])
+                actions.append(np.random.choice(len(prob), p=prob))
+                probs.append(prob)
+        else:
+            raise ValueError("'evaluate_with' should be either 'average_policy' or 'best_response'.")
+        return actions, probs
+
     def sample_episode_policy(self):
         ''' Sample average/best_response policy
         '''
@@ -223,13 +274,23 @@ class NFSPAgent(object):
         Returns:
             action_probs (numpy.array): The predicted action probability.
         '''
-        info_state = np.expand_dims(info_state, axis=0)
-        info_state = torch.from_numpy(info_state).float().to(self.device)
+        return self._batch_act(np.expand_dims(info_state, axis=0))[0]
+
+    def _batch_act(self, info_states):
+        ''' Predict action probabilities of a batch of observations
+            Not connected to computation graph
+        Args:
+            info_states (numpy.array): A batch of obervations.
+
+        Returns:
+            action_probs (numpy.array): The predicted action probabilities.
+        '''
+        info_states = torch.from_numpy(info_states).float().to(self.device)
 
         with torch.no_grad():
-            log_action_probs = self.policy_network(info_state).numpy()
+            log_action_probs = self.policy_network(info_states).numpy()
 
-        action_probs = np.exp(log_action_probs)[0]
+        action_probs = np.exp(log_action_probs)
 
         return action_probs
 
@@ -260,18 +321,16 @@ class NFSPAgent(object):
                 len(self._reservoir_buffer) < self._min_buffer_size_to_learn):
             return None
 
-        transitions = self._reservoir_buffer.sample(self._batch_size)
-        info_states = [t.info_state for t in transitions]
-        action_probs = [t.action_probs for t in transitions]
+        info_states, action_probs = self._reservoir_buffer.sample_batch(self._batch_size)
 
         self.policy_network_optimizer.zero_grad()
         self.policy_network.train()
 
         # (batch, state_size)
-        info_states = torch.from_numpy(np.array(info_states)).float().to(self.device)
+        info_states = torch.from_numpy(info_states).float().to(self.device)
 
         # (batch, action_num)
-        eval_action_probs = torch.from_numpy(np.array(action_probs)).float().to(self.device)
+        eval_action_probs = torch.from_numpy(action_probs).float().to(self.device)
 
         # (batch, action_num)
         log_forecast_action_probs = self.policy_network(info_states)
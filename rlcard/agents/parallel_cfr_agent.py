@@ -0,0 +1,157 @@
+''' CFR with the traversals distributed over multiple processes
+'''
+
+import multiprocessing as mp
+
+import numpy as np
+
+from rlcard.agents.cfr_agent import CFRAgent
+
+class ParallelCFRAgent(CFRAgent):
+    ''' Implement CFR with multiple worker processes by chance-sampled data
+        parallelism: in the traversal of each player, every worker deals its
+        own random games from its own seed, i.e., the private and public cards
+        in Leduc Hold'em and Limit Texas Hold'em, and traverses them with a
+        snapshot of the current policy. The deals of the workers are sampled
+        independently, so they may repeat and are not guaranteed to cover all
+        the chance outcomes. The master process then reduces the deltas of the
+        regrets and the average policy. Each worker is only sent the rows of
+        the policy added or changed since its last traversal. The model is
+        saved and loaded in the same format as CFRAgent.
+    '''
+
+    def __init__(self, env, model_path='./cfr_model', process_num=4, deals_per_process=1, **kwargs):
+        ''' Initilize Agent
+
+        Args:
+            env (Env): Env class. The environment should allow step_back. Each
+              worker gets a copy of the environment with a different seed
+            model_path (str): The path to save/load the model
+            process_num (int): The number of worker processes
+            deals_per_process (int): The number of games each worker deals and
+              traverses for each player in an iteration
+            kwargs: The other arguments of CFRAgent, e.g., variant, alternating
+              and cache_tree
+        '''
+        if not isinstance(process_num, int) or process_num < 1:
+            raise ValueError('process_num should be a positive integer')
+        super(ParallelCFRAgent, self).__init__(env, model_path, **kwargs)
+        self.process_num = process_num
+        self.deals_per_process = deals_per_process
+
+        # The number of information sets of the table that each worker knows,
+        # and the version of the policy that each worker was last sent
+        self.synced = [0 for _ in range(process_num)]
+        self.synced_versions = [0 for _ in range(process_num)]
+
+        # The policy as of the last traversal, and the version in which the
+        # policy of each information set last changed
+        self.version = 0
+        self.last_policy = np.zeros((0, self.env.action_num))
+        self.policy_versions = np.zeros(0, dtype=np.int64)
+
+        ctx = mp.get_context('spawn')
+        seeds = self.env.np_random.randint(0, 2**31 - 1, size=process_num)
+        self.remotes, self.work_remotes = zip(*[ctx.Pipe() for _ in range(process_num)])
+        self.ps = [ctx.Process(target=worker, args=(work_remote, remote, env, int(seed), self.variant,
+                                                    self.cache_tree, deals_per_process))
+                   for (work_remote, remote, seed) in zip(self.work_remotes, self.remotes, seeds)]
+        for p in self.ps:
+            p.daemon = True  # if the main process crashes, we should not cause things to hang
+            p.start()
+        for remote in self.work_remotes:
+            remote.close()
+
+    def traverse(self, player_id):
+        ''' Let all the workers traverse their deals for a player with the
+            current policy, and accumulate their regrets and average policy
+
+        Args:
+            player_id (int): The player to update
+        '''
+        n = len(self.table)
+        self._track_policy_changes()
+        for w, remote in enumerate(self.remotes):
+            synced = self.synced[w]
+            changed_rows = np.flatnonzero(self.policy_versions[:synced] > self.synced_versions[w])
+            remote.send(('traverse', (self.table.keys[synced:n], self.table.policy[synced:n],
+                                      changed_rows, self.table.policy[changed_rows],
+                                      player_id, self.iteration)))
+            self.synced[w] = n
+            self.synced_versions[w] = self.version
+
+        for remote in self.remotes:
+            new_keys, rows, regrets, average_policy = remote.recv()
+            # The new information sets of the worker are encoded as -1, -2, ...
+            new_rows = np.array([self.table.intern(key) for key in new_keys], dtype=np.int64)
+            new = rows < 0
+            rows[new] = new_rows[-rows[new] - 1]
+            self.table.regrets[rows] += regrets
+            self.table.average_policy[rows] += average_policy
+
+    def _track_policy_changes(self):
+        ''' Record the information sets whose policy changed since the last
+            traversal in a new version
+        '''
+        n = len(self.table)
+        m = len(self.last_policy)
+        self.version += 1
+        changed = np.any(self.table.policy[:m] != self.last_policy, axis=1)
+        self.policy_versions[changed] = self.version
+        self.policy_versions = np.concatenate([self.policy_versions, np.full(n - m, self.version, dtype=np.int64)])
+        self.last_policy = self.table.policy[:n].copy()
+
+    def close(self):
+        ''' Close the workers
+        '''
+        for remote in self.remotes:
+            remote.send(('close', None))
+        for p in self.ps:
+            p.join()
+
+def worker(remote, parent_remote, env, seed, variant, cache_tree, deals):
+    ''' The worker process. It keeps its own table of information sets, a
+        map from its rows to the rows of the table of the master, and a copy
+        of the policy of the master, which is updated with the sent rows
+    '''
+    parent_remote.close()
+    env._seed(seed)
+    agent = CFRAgent(env, variant=variant, cache_tree=cache_tree)
+    table = agent.table
+    master_rows = []
+    master_policy = np.zeros((0, env.action_num))
+    known = 0
+    try:
+        while True:
+            cmd, data = remote.recv()
+            if cmd == 'traverse':
+                keys, new_policy, changed_rows, changed_policy, player_id, agent.iteration = data
+                master_policy[changed_rows] = changed_policy
+                master_policy = np.concatenate([master_policy, new_policy])
+                for key in keys:
+                    index = table.intern(key)
+                    master_rows.extend([-1] * (index + 1 - len(master_rows)))
+                    master_rows[index] = known
+                    known += 1
+
+                # Take the policy snapshot and record the deltas from zero
+                m = len(table)
+                table.policy[:m] = master_policy[master_rows]
+                table.regrets[:m] = 0.0
+                table.average_policy[:m] = 0.0
+                for _ in range(deals):
+                    agent.traverse(player_id)
+
+                n = len(table)
+                rows = np.array(master_rows + [-(i + 1) for i in range(n - m)], dtype=np.int64)
+                master_rows.extend([-1] * (n - m))
+                touched = np.flatnonzero(np.any(table.regrets[:n] != 0, axis=1) |
+                                         np.any(table.average_policy[:n] != 0, axis=1))
+                remote.send((table.keys[m:n], rows[touched], table.regrets[touched], table.average_policy[touched]))
+            elif cmd == 'close':
+                remote.close()
+                break
+            else:
+                raise NotImplementedError
+    except KeyboardInterrupt:
+        print('ParallelCFRAgent worker: got KeyboardInterrupt')
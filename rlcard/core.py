@@ -163,6 +163,21 @@ class Game(object):
         '''
         raise NotImplementedError
 
+    def get_snapshot(self):
+        ''' Return a compact record of the current state that can be passed to restore
+        '''
+        raise NotImplementedError
+
+    def restore(self, snapshot):
+        ''' Restore the state recorded by get_snapshot
+        '''
+        raise NotImplementedError
+
+    def clone(self):
+        ''' Return an independent copy of the game in the current state
+        '''
+        raise NotImplementedError
+
     def get_player_num(self):
         ''' Retrun the number of players in the game
         '''
@@ -1,10 +1,11 @@
 import numpy as np
+from collections import OrderedDict
 
 from rlcard.envs import Env
 from rlcard.games.doudizhu import Game
 from rlcard.games.doudizhu.utils import SPECIFIC_MAP, CARD_RANK_STR
 from rlcard.games.doudizhu.utils import ACTION_LIST, ACTION_SPACE
-from rlcard.games.doudizhu.utils import encode_cards
+from rlcard.games.doudizhu.utils import encode_cards, get_action_tables
 
 
 class DoudizhuEnv(Env):
@@ -107,12 +108,8 @@ class DoudizhuEnv(Env):
         Returns:
             legal_actions (list): a list of legal actions' id
         '''
-        legal_action_id = []
         legal_actions = self.game.state['actions']
-        if legal_actions:
-            for action in legal_actions:
-                for abstract in SPECIFIC_MAP[action]:
-                    action_id = ACTION_SPACE[abstract]
-                    if action_id not in legal_action_id:
-                        legal_action_id.append(action_id)
-        return legal_action_id
+        if not legal_actions:
+            return []
+        tables = get_action_tables()
+        return list(OrderedDict.fromkeys(action_id for action in legal_actions for action_id in tables.get_action_ids(action)))
@@ -1,3 +1,5 @@
+from copy import copy
+
 from rlcard.utils import *
 
 class Env(object):
@@ -119,6 +121,53 @@ class Env(object):
 
         return state, player_id
 
+    def get_snapshot(self):
+        ''' Get a compact record of the current state of the environment. It
+            does not copy the object graph of the game, so it is much cheaper
+            than deepcopy, and it can be restored any number of times
+
+        Returns:
+            (tuple): The snapshot, which can be passed to restore
+        '''
+        action_record = tuple(self.action_recorder) if self.record_action else None
+        return self.game.get_snapshot(), self.timestep, action_record
+
+    def restore(self, snapshot):
+        ''' Restore the environment to a snapshot taken by get_snapshot.
+            Unlike step_back, it can jump to any snapshot of the current game,
+            e.g., to explore the sibling branches in a tree search
+
+        Args:
+            snapshot (tuple): A snapshot returned by get_snapshot
+
+        Returns:
+            (tuple): Tuple containing:
+
+                (dict): The restored state
+                (int): The ID of the current player
+        '''
+        game_snapshot, self.timestep, action_record = snapshot
+        self.game.restore(game_snapshot)
+        if self.record_action:
+            self.action_recorder = list(action_record)
+        player_id = self.get_player_id()
+        return self.get_state(player_id), player_id
+
+    def clone(self):
+        ''' Copy the environment in the current state. The game is copied with
+            its clone method instead of deepcopy, so that the clone can be
+            stepped independently, e.g., by a search agent in another thread
+            or process. The agents and the pretrained models are shared
+
+        Returns:
+            (Env): The clone
+        '''
+        env = copy(self)
+        env.game = self.game.clone()
+        if self.record_action:
+            env.action_recorder = list(self.action_recorder)
+        return env
+
     def set_agents(self, agents):
         ''' Set the agents that will interact with the environment
 
@@ -10,6 +10,8 @@ DEFAULT_CONFIG = {
         'record_action' : False,
         'seed': None,
         'env_num': 1,
+        'envs_per_worker': 1,
+        'shared_memory': False,
         }
 
 class EnvSpec(object):
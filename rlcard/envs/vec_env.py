@@ -1,6 +1,10 @@
 # A wrapper for running multiple environments with multiple processes
 # Reference: https://github.com/openai/baselines/blob/master/baselines/common/vec_env/subproc_vec_env.py
 import multiprocessing as mp
+from collections import deque
+from multiprocessing.connection import wait
+
+import numpy as np
 
 from rlcard.utils import reorganize
 
@@ -17,11 +21,27 @@ class VecEnv(object):
         '''
         self.num = config['env_num']
 
+        # Each worker process holds several environments and steps them in a loop
+        envs_per_worker = config['envs_per_worker']
+        if not isinstance(envs_per_worker, int) or envs_per_worker < 1:
+            raise ValueError('envs_per_worker should be a positive integer')
+        self.worker_num = (self.num + envs_per_worker - 1) // envs_per_worker
+        self.worker_indices = [list(range(w * envs_per_worker, min((w + 1) * envs_per_worker, self.num)))
+                               for w in range(self.worker_num)]
+        self.worker_of = [i // envs_per_worker for i in range(self.num)]
+
         # For multiprocessing
         ctx = mp.get_context('spawn')
-        self.remotes, self.work_remotes = zip(*[ctx.Pipe() for _ in range(self.num)])
-        self.ps = [ctx.Process(target=worker, args=(work_remote, remote, env_id, config))
-                    for (work_remote, remote) in zip(self.work_remotes, self.remotes)]
+
+        # The observations and legal actions can be written by the workers
+        # into shared memory so that only small messages cross the pipes
+        self.shared_buffer = None
+        if config['shared_memory']:
+            self.shared_buffer = SharedStateBuffer.from_env(ctx, self.num, env_id, config)
+
+        self.remotes, self.work_remotes = zip(*[ctx.Pipe() for _ in range(self.worker_num)])
+        self.ps = [ctx.Process(target=worker, args=(work_remote, remote, env_id, config, indices, self.shared_buffer))
+                    for (work_remote, remote, indices) in zip(self.work_remotes, self.remotes, self.worker_indices)]
         for p in self.ps:
             p.daemon = True  # if the main process crashes, we should not cause things to hang
             p.start()
@@ -31,6 +51,11 @@ class VecEnv(object):
         # A counter for the timesteps
         self.timestep = 0
 
+        # The environments that are stepping asynchronously, and the
+        # batches of environments each worker has not answered yet
+        self.waiting = set()
+        self.pending = [deque() for _ in range(self.worker_num)]
+
         # Get the number of players/actions/state_shape in this game
         self.remotes[0].send(('info', None))
         self.player_num, self.action_num, self.state_shape = self.remotes[0].recv()
@@ -40,141 +65,404 @@ class VecEnv(object):
     def set_agents(self, agents):
         self.agents = agents
 
+    def reset(self):
+        ''' Reset all the environments
+
+        Returns:
+            (tuple): Tuple containing:
+
+                (list): The begining states of the environments
+                (list): The begining players of the environments
+        '''
+        self._check_not_waiting()
+        states, player_ids = [], []
+        for i, (state, player_id) in enumerate(self._send_commands('reset', list(range(self.num)))):
+            states.append(self._load_state(i, state))
+            player_ids.append(player_id)
+        return states, player_ids
+
+    def step(self, actions, raw_action=False):
+        ''' Step forward all the environments. An environment whose game is
+            over is reset automatically in its worker.
+
+        Args:
+            actions (list): The actions taken by the current players, one for each environment
+            raw_action (boolean): True if the actions are raw actions
+
+        Returns:
+            (tuple): Tuple containing:
+
+                (list): The next states. If the game is over, it is the begining state of the new game
+                (list): The IDs of the next players
+                (list): A list of booleans. True if the game is over
+                (list): A list of dictionaries. If the game is over, it contains
+                 the 'payoffs' and the 'final_states' of all the players
+        '''
+        self.step_async(actions, raw_action=raw_action)
+        _, next_states, next_player_ids, dones, infos = self.step_wait(min_num=self.num)
+        return next_states, next_player_ids, dones, infos
+
+    def step_async(self, actions, indices=None, raw_action=False):
+        ''' Send the actions to the environments without waiting for the results
+
+        Args:
+            actions (list): The actions taken by the current players
+            indices (list): The indices of the environments to step. Default
+             to all the environments
+            raw_action (boolean): True if the actions are raw actions
+        '''
+        if indices is None:
+            indices = list(range(self.num))
+        if len(actions) != len(indices):
+            raise ValueError('The number of actions should be the same as the number of environments')
+        for i in indices:
+            if i in self.waiting:
+                raise ValueError('Environment {} is already stepping'.format(i))
+        args = [(action, raw_action) for action in actions]
+        for w, batch in self._group_by_worker(indices, args).items():
+            self.remotes[w].send(('auto_step', batch))
+            self.pending[w].append([i for i, _ in batch])
+        self.waiting.update(indices)
+
+    def step_wait(self, min_num=1, timeout=None):
+        ''' Wait for the environments that are stepping. The results are
+            returned for whichever environments are ready first.
+
+        Args:
+            min_num (int): Wait until at least min_num environments are ready
+            timeout (float): The maximum seconds to wait. If None, wait without limit
+
+        Returns:
+            (tuple): Tuple containing:
+
+                (list): The indices of the ready environments
+                (list): The next states
+                (list): The IDs of the next players
+                (list): A list of booleans. True if the game is over
+                (list): A list of dictionaries. If the game is over, it contains
+                 the 'payoffs' and the 'final_states' of all the players
+        '''
+        min_num = min(min_num, len(self.waiting))
+        results = {}
+        while len(self.waiting) > 0:
+            pending_remotes = [self.remotes[w] for w in range(self.worker_num) if self.pending[w]]
+            ready = wait(pending_remotes, timeout=0 if len(results) >= min_num else timeout)
+            if not ready:
+                break
+            for remote in ready:
+                w = self.remotes.index(remote)
+                batch = self.pending[w].popleft()
+                for i, result in zip(batch, remote.recv()):
+                    results[i] = result
+                    self.waiting.remove(i)
+
+        indices = sorted(results)
+        next_states, next_player_ids, dones, infos = [], [], [], []
+        for i in indices:
+            next_state, next_player_id, done, info = results[i]
+            next_states.append(self._load_state(i, next_state))
+            next_player_ids.append(next_player_id)
+            dones.append(done)
+            infos.append(info)
+        self.timestep += len(indices)
+        return indices, next_states, next_player_ids, dones, infos
+
+    def close(self):
+        ''' Close the workers
+        '''
+        for w in range(self.worker_num):
+            while self.pending[w]:
+                self.pending[w].popleft()
+                self.remotes[w].recv()
+        self.waiting.clear()
+        for remote in self.remotes:
+            remote.send(('close', None))
+        for p in self.ps:
+            p.join()
+
     def run(self, is_training=False):
         ''' Run X complete games, where X is the number of environemnts.
             The input/output are similar to Env. The difference is that
             The transitions for each player are stacked over the environments
         '''
+        self._check_not_waiting()
         trajectories = [[[] for _ in range(self.player_num)] for _ in range(self.num)]
-        ready_trajectories = [None for _ in range(self.num)]
-        active_remotes = [remote for remote in self.remotes]
-        mapping = [i for i in range(self.num)]
-        active_num = self.num
+        active = list(range(self.num))
 
         # Reset
-        states = []
-        player_ids = []
-        for state, player_id in send_command_to_all(active_remotes, ('reset', None)):
-            states.append(state)
-            player_ids.append(player_id)
-        for i in range(active_num):
+        states, player_ids = self.reset()
+        for i in active:
             trajectories[i][player_ids[i]].append(states[i])
 
         # Loop until all the environments are over
-        while active_num > 0:
+        while len(active) > 0:
             # Agent playes
-            # TODO: Currently we naively feed one obs to the agent. This can be improved via batch
-            commands = []
-            actions = []
-            for i in range(active_num):
-                opt = 'raw_step' if self.agents[player_ids[i]].use_raw else 'step'
-                if not is_training:
-                    action, _ = self.agents[player_ids[i]].eval_step(states[i])
-                else:
-                    action = self.agents[player_ids[i]].step(states[i])
-                commands.append((opt, action))
-                actions.append(action)
+            # The observations are grouped by the acting player so that
+            # each agent makes one batched prediction per timestep
+            actions = {}
+            for player_id in set(player_ids[i] for i in active):
+                indices = [i for i in active if player_ids[i] == player_id]
+                batch_actions = agent_batch_step(self.agents[player_id], [states[i] for i in indices], is_training)
+                actions.update(zip(indices, batch_actions))
 
             # Environment steps
-            next_states, next_player_ids, dones = [], [], []
-            for next_state, next_player_id, done in send_commands_to_all(active_remotes, commands):
-                next_states.append(next_state)
-                next_player_ids.append(next_player_id)
-                dones.append(done)
-
-            # Save action
-            for i in range(active_num):
+            args = [(actions[i], self.agents[player_ids[i]].use_raw) for i in active]
+            results = self._send_commands('step', active, args)
+            self.timestep += len(active)
+
+            finished = []
+            for i, (next_state, next_player_id, done) in zip(active, results):
+                # Save action
                 trajectories[i][player_ids[i]].append(actions[i])
 
-            # Set the state and player
-            states = next_states
-            player_ids = next_player_ids
+                # Set the state and player
+                states[i] = self._load_state(i, next_state)
+                player_ids[i] = next_player_id
 
-            # Save state
-            finished = []
-            for i in range(active_num):
-                if dones[i]:
-                    # Add a final state to all the players
-                    for j in range(self.player_num):
-                        active_remotes[i].send(('get_state', j))
-                        trajectories[i][j].append(active_remotes[i].recv())
-
-                    # Save the ready trajectories and mark them as finished
-                    ready_trajectories[mapping[i]] = trajectories[i]
+                # Save state
+                if done:
                     finished.append(i)
                 else:
                     trajectories[i][player_ids[i]].append(states[i])
 
+            # Add a final state to all the players of the finished environments
+            if len(finished) > 0:
+                indices = [i for i in finished for _ in range(self.player_num)]
+                players = [j for _ in finished for j in range(self.player_num)]
+                for i, j, state in zip(indices, players, self._send_commands('get_state', indices, players)):
+                    trajectories[i][j].append(state)
 
             # Pop out the finished ones
-            trajectories = [trajectories[i] for i in range(active_num) if i not in finished]
-            mapping = [mapping[i] for i in range(active_num) if i not in finished]
-            active_remotes = [active_remotes[i] for i in range(active_num) if i not in finished]
-            states = [states[i] for i in range(active_num) if i not in finished]
-            player_ids = [player_ids[i] for i in range(active_num) if i not in finished]
-
-            self.timestep += active_num
-            active_num -= len(finished)
+            active = [i for i in active if i not in finished]
 
         # Payoffs
-        payoffs = send_command_to_all(self.remotes, ('get_payoffs', None))
+        payoffs = self._send_commands('get_payoffs', list(range(self.num)))
 
         for i in range(self.num):
-            ready_trajectories[i] = reorganize(ready_trajectories[i], payoffs[i])
+            trajectories[i] = reorganize(trajectories[i], payoffs[i])
 
-        trajectories = [[] for _ in range(self.player_num)]
-        for trs in ready_trajectories:
+        ready_trajectories = [[] for _ in range(self.player_num)]
+        for trs in trajectories:
             for i in range(self.player_num):
-                trajectories[i].extend(trs[i])
-        return trajectories, payoffs
+                ready_trajectories[i].extend(trs[i])
+        return ready_trajectories, payoffs
+
+    def _check_not_waiting(self):
+        if self.waiting:
+            raise ValueError('Some environments are still stepping. Please call step_wait first')
+
+    def _group_by_worker(self, indices, args):
+        ''' Group the commands by the workers that hold the environments
+
+        Args:
+            indices (list): The indices of the environments
+            args (list): The arguments of the command for each environment
+
+        Returns:
+            (dict): A dictionary mapping each worker to its batch of (index, argument)
+        '''
+        batches = {}
+        for i, arg in zip(indices, args):
+            batches.setdefault(self.worker_of[i], []).append((i, arg))
+        return batches
+
+    def _send_commands(self, cmd, indices, args=None):
+        ''' Send a command to the environments of the given indices. Each worker
+            receives one batched message and answers with one batched message
+
+        Args:
+            cmd (string): The command
+            indices (list): The indices of the environments
+            args (list): The arguments of the command for each environment
+
+        Returns:
+            (list): The results in the same order as the indices
+        '''
+        if args is None:
+            args = [None for _ in indices]
+        batches = self._group_by_worker(indices, args)
+        for w, batch in batches.items():
+            self.remotes[w].send((cmd, batch))
+        results = [None for _ in indices]
+        positions = {}
+        for k, i in enumerate(indices):
+            positions.setdefault(i, []).append(k)
+        for w, batch in batches.items():
+            for (i, _), result in zip(batch, self.remotes[w].recv()):
+                results[positions[i].pop(0)] = result
+        return results
+
+    def _load_state(self, index, state):
+        ''' Complete the state received from a worker with the observation
+            and the legal actions in the shared memory
+
+        Args:
+            index (int): The index of the environment
+            state (dict): The state received from the pipe
+
+        Returns:
+            (dict): The complete state
+        '''
+        if self.shared_buffer is None:
+            return state
+        return self.shared_buffer.read(index, state)
 
     def _seed(self, seed=None):
         seeds = [None for _ in range(self.num)]
         if seed is not None:
-            commands = [('seed', seed+i*1000) for i in range(self.num)]
-            seeds = send_commands_to_all(self.remotes, commands)
+            seeds = self._send_commands('seed', list(range(self.num)), [seed+i*1000 for i in range(self.num)])
         return seeds
 
-def send_commands_to_all(remotes, commands):
-    results = []
-    for i, remote in enumerate(remotes):
-        remote.send(commands[i])
-    for remote in remotes:
-        results.append(remote.recv())
-    return results
-    
-def send_command_to_all(remotes, command):
-    results = []
-    for remote in remotes:
-        remote.send(command)
-    for remote in remotes:
-        results.append(remote.recv())
-    return results
-
-def worker(remote, parent_remote, env_id, config):
-    def step_env(env, action, use_raw):
+class SharedStateBuffer(object):
+    ''' Preallocated shared-memory blocks for the observations and the
+        legal actions of a vector of environments. The observations are stored
+        in a block of shape (env_num, *state_shape) and the legal actions
+        in a mask of shape (env_num, action_num)
+    '''
+
+    def __init__(self, ctx, num, state_shape, obs_dtype, action_num):
+        ''' Allocate the shared blocks
+
+        Args:
+            ctx (multiprocessing.context): The multiprocessing context
+            num (int): The number of environments
+            state_shape (list): The shape of the observation
+            obs_dtype (numpy.dtype): The data type of the observation
+            action_num (int): The size of the action space
+        '''
+        self.num = num
+        self.state_shape = tuple(state_shape)
+        self.obs_dtype = np.dtype(obs_dtype)
+        self.action_num = action_num
+        self._obs_block = ctx.RawArray('b', num * int(np.prod(self.state_shape)) * self.obs_dtype.itemsize)
+        self._legal_block = ctx.RawArray('b', num * action_num)
+        self._make_views()
+
+    @classmethod
+    def from_env(cls, ctx, num, env_id, config):
+        ''' Allocate the shared blocks with the information of a local instance of the environment
+
+        Args:
+            ctx (multiprocessing.context): The multiprocessing context
+            num (int): The number of environments
+            env_id (string): The id of the environment
+            config (dict): The same as the config in Env
+
+        Returns:
+            (SharedStateBuffer): The shared buffer
+        '''
+        from rlcard.envs.registration import registry
+        env = registry.make(env_id, config)
+        state, _ = env.reset()
+        return cls(ctx, num, env.state_shape, state['obs'].dtype, env.action_num)
+
+    def _make_views(self):
+        self.obs = np.frombuffer(self._obs_block, dtype=self.obs_dtype).reshape((self.num,) + self.state_shape)
+        self.legal = np.frombuffer(self._legal_block, dtype=np.bool_).reshape((self.num, self.action_num))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['obs']
+        del state['legal']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._make_views()
+
+    def write(self, index, state):
+        ''' Write the observation and the legal actions of a state into the shared blocks
+
+        Args:
+            index (int): The index of the environment
+            state (dict): The state extracted by the environment
+
+        Returns:
+            (dict): The remaining entries of the state that will be sent through the pipe
+        '''
+        self.obs[index] = state['obs']
+        self.legal[index] = False
+        self.legal[index, state['legal_actions']] = True
+        return {key: value for key, value in state.items() if key not in ('obs', 'legal_actions')}
+
+    def read(self, index, state):
+        ''' Read the observation and the legal actions of an environment from the shared blocks
+
+        Args:
+            index (int): The index of the environment
+            state (dict): The remaining entries of the state received from the pipe
+
+        Returns:
+            (dict): The complete state. Note that the legal actions are sorted
+                and deduplicated since they are decoded from the mask
+        '''
+        state = dict(state)
+        state['obs'] = self.obs[index].copy()
+        state['legal_actions'] = np.flatnonzero(self.legal[index]).tolist()
+        return state
+
+def agent_batch_step(agent, states, is_training=False):
+    ''' Feed a batch of states to the agent. The agent's batch_step/batch_eval_step
+        is used if implemented. Otherwise, the states are fed one by one
+
+    Args:
+        agent (object): The agent
+        states (list): A list of states of the same player
+        is_training (boolean): True if for training purpose
+
+    Returns:
+        (list): A list of actions
+    '''
+    if not is_training:
+        if hasattr(agent, 'batch_eval_step'):
+            actions, _ = agent.batch_eval_step(states)
+            return actions
+        return [agent.eval_step(state)[0] for state in states]
+    if hasattr(agent, 'batch_step'):
+        return agent.batch_step(states)
+    return [agent.step(state) for state in states]
+
+def worker(remote, parent_remote, env_id, config, indices, shared_buffer=None):
+    def dump_state(index, state):
+        if shared_buffer is None:
+            return state
+        return shared_buffer.write(index, state)
+    def reset_env(index):
+        state, player_id = envs[index].reset()
+        return dump_state(index, state), player_id
+    def step_env(index, action, use_raw):
+        state, player_id = envs[index].step(action, use_raw)
+        done = envs[index].is_over()
+        return dump_state(index, state), player_id, done
+    def auto_step_env(index, action, use_raw):
+        env = envs[index]
         state, player_id = env.step(action, use_raw)
-        done = env.is_over()
-        return state, player_id, done
+        if not env.is_over():
+            return dump_state(index, state), player_id, False, {}
+        info = {'payoffs': env.get_payoffs(),
+                'final_states': [env.get_state(i) for i in range(env.player_num)]}
+        state, player_id = env.reset()
+        return dump_state(index, state), player_id, True, info
     from rlcard.envs.registration import registry
-    env = registry.make(env_id, config)
+    envs = {index: registry.make(env_id, config) for index in indices}
     parent_remote.close()
     try:
         while True:
             cmd, data = remote.recv()
             if cmd == 'reset':
-                remote.send(env.reset())
-            elif cmd == 'step_raw':
-                remote.send(step_env(env, data, True))
+                remote.send([reset_env(index) for index, _ in data])
             elif cmd == 'step':
-                remote.send(step_env(env, data, False))
+                remote.send([step_env(index, *args) for index, args in data])
+            elif cmd == 'auto_step':
+                remote.send([auto_step_env(index, *args) for index, args in data])
             elif cmd == 'seed':
-                remote.send(env._seed(data))
+                remote.send([envs[index]._seed(seed) for index, seed in data])
             elif cmd == 'get_state':
-                remote.send(env.get_state(data))
+                remote.send([envs[index].get_state(player_id) for index, player_id in data])
             elif cmd == 'get_payoffs':
-                remote.send(env.get_payoffs())
+                remote.send([envs[index].get_payoffs() for index, _ in data])
             elif cmd == 'info':
+                env = envs[indices[0]]
                 remote.send((env.player_num, env.action_num, env.state_shape))
             elif cmd == 'close':
                 remote.close()
@@ -184,4 +472,4 @@ def worker(remote, parent_remote, env_id, config):
     except KeyboardInterrupt:
         print('SubprocVecEnv worker: got KeyboardInterrupt')
     finally:
-        del env
+        del envs
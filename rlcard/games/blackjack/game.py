@@ -1,5 +1,5 @@
-from copy import deepcopy
 import numpy as np
+from copy import copy
 
 from rlcard.games.blackjack import Dealer
 from rlcard.games.blackjack import Player
@@ -44,10 +44,12 @@ class BlackjackGame(object):
             int: next plater's id
         '''
         if self.allow_step_back:
-            p = deepcopy(self.player)
-            d = deepcopy(self.dealer)
-            w = deepcopy(self.winner)
-            self.history.append((d,p,w))
+            # Log the fields that the action may change, so that step_back
+            # can revert them without copying the dealer and the player
+            p = self.player
+            d = self.dealer
+            self.history.append((len(p.hand), p.status, p.score, len(d.hand), d.status, d.score,
+                                 self.winner['dealer'], self.winner['player']))
 
         next_state = {}
         # Play hit
@@ -87,10 +89,56 @@ class BlackjackGame(object):
         '''
         #while len(self.history) > 0:
         if len(self.history) > 0:
-            self.dealer, self.player, self.winner = self.history.pop()
+            p = self.player
+            d = self.dealer
+            (p_hand_num, p.status, p.score, d_hand_num, d.status, d.score,
+             self.winner['dealer'], self.winner['player']) = self.history.pop()
+
+            # Put the cards dealt by the action back on the top of the deck
+            while len(d.hand) > d_hand_num:
+                d.deck.append(d.hand.pop())
+            while len(p.hand) > p_hand_num:
+                d.deck.append(p.hand.pop())
             return True
         return False
 
+    def get_snapshot(self):
+        ''' Get a compact record of the current state of the game
+
+        Returns:
+            (tuple): The snapshot, which can be passed to restore
+        '''
+        p = self.player
+        d = self.dealer
+        return ((tuple(p.hand), p.status, p.score), (tuple(d.hand), d.status, d.score, tuple(d.deck)),
+                (self.winner['dealer'], self.winner['player']), tuple(self.history))
+
+    def restore(self, snapshot):
+        ''' Restore the game to a snapshot taken by get_snapshot
+
+        Args:
+            snapshot (tuple): A snapshot returned by get_snapshot
+        '''
+        p = self.player
+        d = self.dealer
+        (p_hand, p.status, p.score), (d_hand, d.status, d.score, deck), winner, history = snapshot
+        p.hand, d.hand, d.deck = list(p_hand), list(d_hand), list(deck)
+        self.winner = {'dealer': winner[0], 'player': winner[1]}
+        self.history = list(history)
+
+    def clone(self):
+        ''' Copy the game without deepcopy. The clone shares the random
+            number generator with the game
+
+        Returns:
+            (BlackjackGame): The clone
+        '''
+        game = copy(self)
+        game.dealer = copy(self.dealer)
+        game.player = copy(self.player)
+        game.restore(self.get_snapshot())
+        return game
+
     @staticmethod
     def get_player_num():
         ''' Return the number of players in blackjack
@@ -4,31 +4,19 @@
 import os
 import json
 from collections import OrderedDict
+from collections.abc import Mapping
 import threading
 import collections
+import numpy as np
 
 import rlcard
 
 # Read required docs
 ROOT_PATH = rlcard.__path__[0]
-
-# a map of action to abstract action
-with open(os.path.join(ROOT_PATH, 'games/doudizhu/jsondata/specific_map.json'), 'r') as file:
-    SPECIFIC_MAP = json.load(file, object_pairs_hook=OrderedDict)
-
-# a map of abstract action to its index and a list of abstract action
-with open(os.path.join(ROOT_PATH, 'games/doudizhu/jsondata/action_space.json'), 'r') as file:
-    ACTION_SPACE = json.load(file, object_pairs_hook=OrderedDict)
-    ACTION_LIST = list(ACTION_SPACE.keys())
-
-# a map of card to its type. Also return both dict and list to accelerate
-with open(os.path.join(ROOT_PATH, 'games/doudizhu/jsondata/card_type.json'), 'r') as file:
-    data = json.load(file, object_pairs_hook=OrderedDict)
-    CARD_TYPE = (data, list(data), set(data))
-
-# a map of type to its cards
-with open(os.path.join(ROOT_PATH, 'games/doudizhu/jsondata/type_card.json'), 'r') as file:
-    TYPE_CARD = json.load(file, object_pairs_hook=OrderedDict)
+JSON_PATH = os.path.join(ROOT_PATH, 'games/doudizhu/jsondata')
+TABLES_PATH = os.path.join(ROOT_PATH, 'games/doudizhu/tables')
+TABLE_NAMES = ['specific_cards', 'specific_types', 'specific_weights', 'specific_counts',
+               'abstract_offsets', 'abstract_ids', 'type_list', 'action_list']
 
 # rank list of solo character of cards
 CARD_RANK_STR = ['3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K',
@@ -45,6 +33,255 @@ INDEX = {'3': 0, '4': 1, '5': 2, '6': 3, '7': 4,
          'K': 10, 'A': 11, '2': 12, 'B': 13, 'R': 14}
 INDEX = OrderedDict(sorted(INDEX.items(), key=lambda t: t[1]))
 
+# the highest bit of each 4-bit count, which is never borrowed from when a
+# count of at most 4 is subtracted from it
+_COUNT_GUARDS = np.uint64(sum(8 << (4 * rank) for rank in range(len(CARD_RANK_STR))))
+
+_action_tables = None
+
+
+class LazyTable(object):
+    ''' A read-only table built on first use, so that importing the module
+    does not load the tables of the actions
+    '''
+
+    def __init__(self, build):
+        ''' Initialize the table
+
+        Args:
+            build (function): a function returning the table
+        '''
+        self._build = build
+        self._table = None
+
+    @property
+    def table(self):
+        if self._table is None:
+            self._table = self._build()
+        return self._table
+
+    def __getitem__(self, key):
+        return self.table[key]
+
+    def __iter__(self):
+        return iter(self.table)
+
+    def __len__(self):
+        return len(self.table)
+
+    def __contains__(self, key):
+        return key in self.table
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.table, name)
+
+
+class TableView(Mapping):
+    ''' A read-only map of the specific actions, whose values are looked up
+    in the tables of the actions on access instead of being stored
+    '''
+
+    def __init__(self, get_value, with_pass=False):
+        ''' Initialize the view
+
+        Args:
+            get_value (function): a function of the tables and a specific
+              action, returning the value of the action
+            with_pass (boolean): True if 'pass' is a key of the map
+        '''
+        self._get_value = get_value
+        self._with_pass = with_pass
+
+    def __getitem__(self, cards):
+        return self._get_value(get_action_tables(), cards)
+
+    def __iter__(self):
+        yield from get_action_tables().specific_list
+        if self._with_pass:
+            yield 'pass'
+
+    def __len__(self):
+        return len(get_action_tables().specific_list) + int(self._with_pass)
+
+
+class ActionTables(object):
+    ''' The tables of the specific actions except 'pass', ordered by type and
+    weight as in type_card.json. The counts of the 15 ranks of each action are
+    packed into 4 bits each of an integer in specific_counts, so that the
+    actions contained in a hand are found with one vectorized comparison. The
+    actions of each type are the entries in the slice type_slices[type]. The
+    indexes of the abstract actions of the i-th action are
+    abstract_ids[abstract_offsets[i]:abstract_offsets[i+1]]
+    '''
+
+    def __init__(self, arrays):
+        ''' Build the tables from the arrays of compile_action_tables
+
+        Args:
+            arrays (dict): a dict of the arrays, which may be memory-mapped
+        '''
+        self.arrays = arrays
+        self.type_list = arrays['type_list'].tolist()
+        self.action_list = arrays['action_list'].tolist()
+        self.action_space = OrderedDict((action, index) for index, action in enumerate(self.action_list))
+        self.specific_list = arrays['specific_cards'].astype(str).tolist()
+        self.specific_index = {cards: index for index, cards in enumerate(self.specific_list)}
+        self.specific_types = np.asarray(arrays['specific_types'])
+        self.specific_weights = np.asarray(arrays['specific_weights'])
+        self.specific_counts = np.asarray(arrays['specific_counts'])
+        self.abstract_offsets = arrays['abstract_offsets'].tolist()
+        self.abstract_ids = arrays['abstract_ids'].tolist()
+        bounds = np.searchsorted(self.specific_types, np.arange(len(self.type_list) + 1)).tolist()
+        self.type_slices = OrderedDict((card_type, slice(bounds[i], bounds[i+1]))
+                                       for i, card_type in enumerate(self.type_list))
+
+        # the candidates of get_gt_cards for each type and weight of the target cards
+        self._gt_candidates = {}
+
+    def get_action_ids(self, cards):
+        ''' Get the indexes of the abstract actions of a specific action
+
+        Args:
+            cards (str): the specific action
+
+        Returns:
+            list: the indexes of the abstract actions in action_list
+        '''
+        if cards == 'pass':
+            return [self.action_space['pass']]
+        index = self.specific_index[cards]
+        return self.abstract_ids[self.abstract_offsets[index]:self.abstract_offsets[index+1]]
+
+    def get_abstract_actions(self, cards):
+        ''' Get the abstract actions of a specific action, as in specific_map.json
+        '''
+        return [self.action_list[action_id] for action_id in self.get_action_ids(cards)]
+
+    def get_card_type(self, cards):
+        ''' Get the type and the weight of a specific action, as in card_type.json
+        '''
+        index = self.specific_index[cards]
+        return [[self.type_list[self.specific_types[index]], str(self.specific_weights[index])]]
+
+    def build_type_card(self):
+        ''' Build the map of type to weight to specific actions, as in type_card.json
+        '''
+        weights = self.specific_weights.tolist()
+        type_card = OrderedDict()
+        for card_type, type_slice in self.type_slices.items():
+            type_card[card_type] = OrderedDict()
+            for index in range(type_slice.start, type_slice.stop):
+                type_card[card_type].setdefault(str(weights[index]), []).append(self.specific_list[index])
+        return type_card
+
+    def get_gt_candidates(self, card_type, weight):
+        ''' Get the actions greater than the cards of a type and weight, i.e.,
+        the actions of the same type with greater weights, the bombs and the
+        rocket
+
+        Args:
+            card_type (str): the type of the target cards
+            weight (int): the weight of the target cards
+
+        Returns:
+            (tuple): Tuple containing:
+
+                (numpy.array): The indexes of the candidate actions
+                (numpy.array): The packed counts of the candidate actions
+        '''
+        key = (card_type, weight)
+        if key not in self._gt_candidates:
+            type_weights = OrderedDict([(card_type, weight)])
+            if card_type != 'rocket':
+                type_weights['rocket'] = -1
+                type_weights.setdefault('bomb', -1)
+            indexes = np.concatenate([np.nonzero(self.specific_weights[self.type_slices[t]] > w)[0]
+                                      + self.type_slices[t].start for t, w in type_weights.items()])
+            self._gt_candidates[key] = (indexes, self.specific_counts[indexes])
+        return self._gt_candidates[key]
+
+
+def compile_action_tables(json_path=JSON_PATH):
+    ''' Compile the tables of the actions from the json files
+
+    Args:
+        json_path (str): the directory of the json files
+
+    Returns:
+        dict: a dict of the arrays in TABLE_NAMES
+    '''
+    with open(os.path.join(json_path, 'action_space.json'), 'r') as file:
+        action_space = json.load(file, object_pairs_hook=OrderedDict)
+    with open(os.path.join(json_path, 'type_card.json'), 'r') as file:
+        type_card = json.load(file, object_pairs_hook=OrderedDict)
+    with open(os.path.join(json_path, 'specific_map.json'), 'r') as file:
+        specific_map = json.load(file, object_pairs_hook=OrderedDict)
+
+    specific_cards, specific_types, specific_weights, abstract_offsets, abstract_ids = [], [], [], [0], []
+    for type_index, weights in enumerate(type_card.values()):
+        for weight, cards_list in weights.items():
+            for cards in cards_list:
+                specific_cards.append(cards)
+                specific_types.append(type_index)
+                specific_weights.append(int(weight))
+                abstract_ids.extend(action_space[abstract] for abstract in specific_map[cards])
+                abstract_offsets.append(len(abstract_ids))
+    specific_counts = [sum(1 << (4 * CARD_RANK_STR_INDEX[card]) for card in cards) for cards in specific_cards]
+    return {'specific_cards': np.array(specific_cards, dtype=np.bytes_),
+            'specific_types': np.array(specific_types, dtype=np.int8),
+            'specific_weights': np.array(specific_weights, dtype=np.int8),
+            'specific_counts': np.array(specific_counts, dtype=np.uint64),
+            'abstract_offsets': np.array(abstract_offsets, dtype=np.int32),
+            'abstract_ids': np.array(abstract_ids, dtype=np.int16),
+            'type_list': np.array(list(type_card)),
+            'action_list': np.array(list(action_space))}
+
+def save_action_tables(tables_path=TABLES_PATH, json_path=JSON_PATH):
+    ''' Compile the tables of the actions from the json files and save them
+    as .npy files, which are loaded by get_action_tables
+
+    Args:
+        tables_path (str): the directory to save the tables
+        json_path (str): the directory of the json files
+    '''
+    if not os.path.exists(tables_path):
+        os.makedirs(tables_path)
+    for name, array in compile_action_tables(json_path).items():
+        np.save(os.path.join(tables_path, name + '.npy'), array)
+
+def get_action_tables():
+    ''' Load the tables of the actions on first use. The arrays are
+    memory-mapped, so that their pages are shared between the processes. If
+    the compiled tables are missing, they are compiled from the json files
+
+    Returns:
+        ActionTables: the tables of the actions
+    '''
+    global _action_tables
+    if _action_tables is None:
+        if all(os.path.exists(os.path.join(TABLES_PATH, name + '.npy')) for name in TABLE_NAMES):
+            arrays = {name: np.load(os.path.join(TABLES_PATH, name + '.npy'), mmap_mode='r') for name in TABLE_NAMES}
+        else:
+            arrays = compile_action_tables()
+        _action_tables = ActionTables(arrays)
+    return _action_tables
+
+# a map of action to abstract action
+SPECIFIC_MAP = TableView(ActionTables.get_abstract_actions, with_pass=True)
+
+# a map of abstract action to its index and a list of abstract action
+ACTION_SPACE = LazyTable(lambda: get_action_tables().action_space)
+ACTION_LIST = LazyTable(lambda: get_action_tables().action_list)
+
+# a map of card to its type. Also return both dict and list to accelerate
+CARD_TYPE = LazyTable(lambda: (TableView(ActionTables.get_card_type), get_action_tables().specific_list,
+                               set(get_action_tables().specific_list)))
+
+# a map of type to its cards
+TYPE_CARD = LazyTable(lambda: get_action_tables().build_type_card())
+
 
 def doudizhu_sort_str(card_1, card_2):
     ''' Compare the rank of two cards of str representation
@@ -230,6 +467,39 @@ def encode_cards(plane, cards):
         plane[0][rank] = 0
 
 
+def cards2counts(cards):
+    ''' Get the counts of the 15 ranks in cards, packed into 4 bits each in
+    the order of CARD_RANK_STR
+
+    Args:
+        cards (string): string of cards. Eg: '3334BR'
+
+    Returns:
+        int: the packed counts
+    '''
+    counts = 0
+    for card in cards:
+        counts += 1 << (4 * CARD_RANK_STR_INDEX[card])
+    return counts
+
+def get_contained_actions(counts, candidates=None):
+    ''' Find the actions contained in a hand. Each count of the hand is
+    raised by a guard bit, and the counts of the actions are subtracted from
+    it. An action is contained if no guard bit is borrowed
+
+    Args:
+        counts (int): the packed counts of the hand, as in cards2counts
+        candidates (numpy.array): the packed counts of the actions to check.
+          All the specific actions by default
+
+    Returns:
+        numpy.array: a boolean array of whether each action is contained
+    '''
+    if candidates is None:
+        candidates = get_action_tables().specific_counts
+    remained = (np.uint64(counts) | _COUNT_GUARDS) - candidates
+    return (remained & _COUNT_GUARDS) == _COUNT_GUARDS
+
 def get_gt_cards(player, greater_player):
     ''' Provide player's cards which are greater than the ones played by
     previous player in one round
@@ -246,27 +516,15 @@ def get_gt_cards(player, greater_player):
     '''
     # add 'pass' to legal actions
     gt_cards = ['pass']
-    current_hand = cards2str(player.current_hand)
-    target_cards = greater_player.played_cards
-    target_types = CARD_TYPE[0][target_cards]
-    type_dict = {}
-    for card_type, weight in target_types:
-        if card_type not in type_dict:
-            type_dict[card_type] = weight
-    if 'rocket' in type_dict:
+    tables = get_action_tables()
+    target_index = tables.specific_index[greater_player.played_cards]
+    card_type = tables.type_list[tables.specific_types[target_index]]
+    if card_type == 'rocket':
         return gt_cards
-    type_dict['rocket'] = -1
-    if 'bomb' not in type_dict:
-        type_dict['bomb'] = -1
-    for card_type, weight in type_dict.items():
-        candidate = TYPE_CARD[card_type]
-        for can_weight, cards_list in candidate.items():
-            if int(can_weight) > int(weight):
-                for cards in cards_list:
-                    # TODO: improve efficiency
-                    if cards not in gt_cards and contains_cards(current_hand, cards):
-                        # if self.contains_cards(current_hand, cards):
-                        gt_cards.append(cards)
+    indexes, candidates = tables.get_gt_candidates(card_type, int(tables.specific_weights[target_index]))
+    counts = cards2counts(cards2str(player.current_hand))
+    specific_list = tables.specific_list
+    gt_cards.extend(specific_list[index] for index in indexes[get_contained_actions(counts, candidates)])
     return gt_cards
 
 
@@ -5,6 +5,7 @@
 '''
 
 import numpy as np
+from copy import copy
 
 from rlcard.core import Game
 
@@ -79,6 +80,40 @@ class GinRummyGame(Game):
         '''
         raise NotImplementedError
 
+    def get_snapshot(self):
+        ''' Return a compact record of the current state that can be passed to restore
+        '''
+        r = self.round
+        return (tuple(self.actions),
+                (r.current_player_id, r.is_over, r.going_out_action, r.going_out_player_id, tuple(r.move_sheet)),
+                (tuple(r.dealer.discard_pile), tuple(r.dealer.stock_pile)),
+                tuple((tuple(p.hand), tuple(p.known_cards), p.hand_mask, p.meld_cluster_masks) for p in r.players))
+
+    def restore(self, snapshot):
+        ''' Restore the state recorded by get_snapshot
+        '''
+        r = self.round
+        actions, round_fields, (discard_pile, stock_pile), players = snapshot
+        self.actions = list(actions)
+        r.current_player_id, r.is_over, r.going_out_action, r.going_out_player_id, move_sheet = round_fields
+        r.move_sheet = list(move_sheet)
+        r.dealer.discard_pile, r.dealer.stock_pile = list(discard_pile), list(stock_pile)
+        for player, (hand, known_cards, hand_mask, meld_cluster_masks) in zip(r.players, players):
+            player.hand, player.known_cards, player.hand_mask = list(hand), list(known_cards), hand_mask
+            player.meld_cluster_masks = meld_cluster_masks
+
+    def clone(self):
+        ''' Return an independent copy of the game in the current state without deepcopy.
+            The clone shares the settings and the random number generator with the game.
+        '''
+        game = copy(self)
+        game.judge = GinRummyJudge(game=game)
+        game.round = copy(self.round)
+        game.round.dealer = copy(self.round.dealer)
+        game.round.players = [copy(p) for p in self.round.players]
+        game.restore(self.get_snapshot())
+        return game
+
     def get_player_num(self):
         ''' Return the number of players in the game
         '''
@@ -4,9 +4,11 @@
     Date created: 2/12/2020
 '''
 
-from typing import List
+from collections import OrderedDict
+from typing import Iterable, List, Tuple
 
 from rlcard.core import Card
+from rlcard.utils.card_set import RANK_MASKS, card2index, popcount
 
 from rlcard.games.gin_rummy.utils import utils
 from rlcard.games.gin_rummy.utils.gin_rummy_error import GinRummyProgramError
@@ -23,46 +25,196 @@ from rlcard.games.gin_rummy.utils.gin_rummy_error import GinRummyProgramError
 
 
 def get_meld_clusters(hand: List[Card]) -> List[List[List[Card]]]:
-    result = []  # type: List[List[List[Card]]]
-    all_run_melds = [frozenset(x) for x in get_all_run_melds(hand)]
-    all_set_melds = [frozenset(x) for x in get_all_set_melds(hand)]
-    all_melds = all_run_melds + all_set_melds
-    all_melds_count = len(all_melds)
-    for i in range(0, all_melds_count):
-        first_meld = all_melds[i]
-        first_meld_list = list(first_meld)
-        meld_cluster_1 = [first_meld_list]
-        result.append(meld_cluster_1)
-        for j in range(i + 1, all_melds_count):
-            second_meld = all_melds[j]
-            second_meld_list = list(second_meld)
-            if not second_meld.isdisjoint(first_meld):
-                continue
-            meld_cluster_2 = [first_meld_list, second_meld_list]
-            result.append(meld_cluster_2)
-            for k in range(j + 1, all_melds_count):
-                third_meld = all_melds[k]
-                third_meld_list = list(third_meld)
-                if not third_meld.isdisjoint(first_meld) or not third_meld.isdisjoint(second_meld):
-                    continue
-                meld_cluster_3 = [first_meld_list, second_meld_list, third_meld_list]
-                result.append(meld_cluster_3)
-    return result
+    hand_mask = get_hand_mask(hand=hand)
+    return get_meld_clusters_from_masks(hand=hand, meld_cluster_masks=get_meld_cluster_masks(hand_mask=hand_mask))
 
 
 def get_best_meld_clusters(hand: List[Card]) -> List[List[List[Card]]]:
     if len(hand) != 10:
         raise GinRummyProgramError("Hand contain {} cards: should be 10 cards.".format(len(hand)))
+    hand_mask = get_hand_mask(hand=hand)
+    _, best_meld_cluster_masks = get_best_deadwood(hand_mask=hand_mask)
+    return get_meld_clusters_from_masks(hand=hand, meld_cluster_masks=best_meld_cluster_masks)
+
+
+# ===============================================================
+#    Meld clusters of hand masks
+#        hand_mask - int with bit card_id set for each card in hand
+#        meld_mask - hand_mask of a meld_pile
+#        meld_cluster_mask - sorted tuple of disjoint meld_masks
+#
+#    The meld_cluster_masks and the best deadwood of the recent hands are kept
+#    in an LRU cache. When a card is added to or discarded from a cached hand,
+#    update_meld_cluster_masks derives the meld_cluster_masks of the new hand
+#    from those of the cached hand instead of enumerating them again.
+# ===============================================================
+
+meld_cluster_cache_size = 4096
+
+_meld_cluster_cache = OrderedDict()  # type: OrderedDict  # hand_mask -> [meld_cluster_masks, best_deadwood]
+
+# deadwood count of each 13-bit mask of the ranks of a suit
+_deadwood_count_by_rank_mask = [0] * (1 << 13)
+for _rank_mask in range(1, 1 << 13):
+    _low_rank_id = (_rank_mask & -_rank_mask).bit_length() - 1
+    _deadwood_count_by_rank_mask[_rank_mask] = _deadwood_count_by_rank_mask[_rank_mask & (_rank_mask - 1)] + \
+        utils.rank_to_deadwood_value[Card.valid_rank[_low_rank_id]]
+
+
+def get_hand_mask(hand: List[Card]) -> int:
+    hand_mask = 0
+    for card in hand:
+        hand_mask |= 1 << card2index(card)
+    return hand_mask
+
+
+def get_deadwood_count_of_mask(hand_mask: int) -> int:
+    return _deadwood_count_by_rank_mask[hand_mask & 0x1FFF] + \
+        _deadwood_count_by_rank_mask[hand_mask >> 13 & 0x1FFF] + \
+        _deadwood_count_by_rank_mask[hand_mask >> 26 & 0x1FFF] + \
+        _deadwood_count_by_rank_mask[hand_mask >> 39 & 0x1FFF]
+
+
+def get_meld_masks(hand_mask: int) -> List[int]:
+    ''' Return the meld_masks of all run_melds and set_melds of the hand in ascending order
+    '''
+    result = []  # type: List[int]
+    for suit_id in range(4):
+        rank_mask = hand_mask >> (13 * suit_id) & 0x1FFF
+        rank_id = 0
+        while rank_id < 13:
+            end = rank_id
+            while end < 13 and rank_mask >> end & 1:
+                end += 1
+            for i in range(rank_id, end - 2):
+                for j in range(i + 3, end + 1):
+                    result.append(((1 << (j - i)) - 1) << (13 * suit_id + i))
+            rank_id = end + 1
+    for rank_id in range(13):
+        set_mask = hand_mask & RANK_MASKS[rank_id]
+        card_count = popcount(set_mask)
+        if card_count >= 3:
+            result.append(set_mask)
+        if card_count == 4:
+            result.extend(set_mask & ~(1 << (13 * suit_id + rank_id)) for suit_id in range(4))
+    return sorted(result)
+
+
+def get_meld_cluster_masks(hand_mask: int) -> Tuple[Tuple[int, ...], ...]:
+    ''' Return the meld_cluster_masks of the hand, with at most three melds in each, in ascending order
+    '''
+    return _get_meld_cluster_entry(hand_mask=hand_mask)[0]
+
+
+def update_meld_cluster_masks(hand_mask: int, card_id: int) -> Tuple[Tuple[int, ...], ...]:
+    ''' Return the meld_cluster_masks of the hand after adding or discarding the card.
+        If the hand is cached, they are derived from its meld_cluster_masks:
+        a discard keeps the meld_clusters without the card, and an add joins each meld with the card
+        to the meld_clusters of at most two melds disjoint from it.
+    '''
+    card_mask = 1 << card_id
+    next_hand_mask = hand_mask ^ card_mask
+    entry = _get_cache_entry(hand_mask=next_hand_mask)
+    if entry is not None:
+        return entry[0]
+    entry = _get_cache_entry(hand_mask=hand_mask)
+    if entry is None:
+        return get_meld_cluster_masks(hand_mask=next_hand_mask)
+    meld_cluster_masks = entry[0]
+    if hand_mask & card_mask:
+        result = [meld_cluster for meld_cluster in meld_cluster_masks
+                  if not any(meld & card_mask for meld in meld_cluster)]
+    else:
+        result = list(meld_cluster_masks)
+        for meld in get_meld_masks(hand_mask=next_hand_mask):
+            if not meld & card_mask:
+                continue
+            result.append((meld,))
+            for meld_cluster in meld_cluster_masks:
+                if len(meld_cluster) <= 2 and not any(meld & other_meld for other_meld in meld_cluster):
+                    result.append(tuple(sorted(meld_cluster + (meld,))))
+        result.sort()
+    return _put_cache_entry(hand_mask=next_hand_mask, meld_cluster_masks=tuple(result))[0]
+
+
+def get_best_deadwood(hand_mask: int) -> Tuple[int, List[Tuple[int, ...]]]:
+    ''' Return the least deadwood count of the hand and the meld_cluster_masks achieving it.
+        The deadwood count without melds is returned when the hand has no meld_clusters.
+    '''
+    entry = _get_meld_cluster_entry(hand_mask=hand_mask)
+    if entry[1] is None:
+        entry[1] = get_best_deadwood_of_meld_cluster_masks(hand_mask=hand_mask, meld_cluster_masks=entry[0])
+    return entry[1]
+
+
+def get_best_deadwood_of_meld_cluster_masks(hand_mask: int,
+                                            meld_cluster_masks: Tuple[Tuple[int, ...], ...]) -> Tuple[int, List[Tuple[int, ...]]]:
+    ''' Return the least deadwood count of the hand and the given meld_cluster_masks of the hand achieving it.
+    '''
+    best_deadwood_count = get_deadwood_count_of_mask(hand_mask=hand_mask)
+    best_meld_cluster_masks = []  # type: List[Tuple[int, ...]]
+    for meld_cluster in meld_cluster_masks:
+        meld_cards_mask = 0
+        for meld in meld_cluster:
+            meld_cards_mask |= meld
+        deadwood_count = get_deadwood_count_of_mask(hand_mask=hand_mask & ~meld_cards_mask)
+        if deadwood_count < best_deadwood_count:
+            best_deadwood_count = deadwood_count
+            best_meld_cluster_masks = [meld_cluster]
+        elif deadwood_count == best_deadwood_count:
+            best_meld_cluster_masks.append(meld_cluster)
+    return best_deadwood_count, best_meld_cluster_masks
+
+
+def clear_meld_cluster_cache():
+    _meld_cluster_cache.clear()
+
+
+def _get_meld_cluster_entry(hand_mask: int):
+    entry = _get_cache_entry(hand_mask=hand_mask)
+    if entry is None:
+        result = []  # type: List[Tuple[int, ...]]
+        meld_masks = get_meld_masks(hand_mask=hand_mask)
+        meld_masks_count = len(meld_masks)
+        for i in range(meld_masks_count):
+            first_meld = meld_masks[i]
+            result.append((first_meld,))
+            for j in range(i + 1, meld_masks_count):
+                second_meld = meld_masks[j]
+                if second_meld & first_meld:
+                    continue
+                result.append((first_meld, second_meld))
+                for k in range(j + 1, meld_masks_count):
+                    third_meld = meld_masks[k]
+                    if third_meld & (first_meld | second_meld):
+                        continue
+                    result.append((first_meld, second_meld, third_meld))
+        entry = _put_cache_entry(hand_mask=hand_mask, meld_cluster_masks=tuple(result))
+    return entry
+
+
+def _get_cache_entry(hand_mask: int):
+    entry = _meld_cluster_cache.get(hand_mask)
+    if entry is not None:
+        _meld_cluster_cache.move_to_end(hand_mask)
+    return entry
+
+
+def _put_cache_entry(hand_mask: int, meld_cluster_masks: Tuple[Tuple[int, ...], ...]):
+    entry = [meld_cluster_masks, None]
+    _meld_cluster_cache[hand_mask] = entry
+    while len(_meld_cluster_cache) > meld_cluster_cache_size:
+        _meld_cluster_cache.popitem(last=False)
+    return entry
+
+
+def get_meld_clusters_from_masks(hand: List[Card],
+                                  meld_cluster_masks: Iterable[Tuple[int, ...]]) -> List[List[List[Card]]]:
+    card_by_id = {card2index(card): card for card in hand}
+    card_ids = sorted(card_by_id)
     result = []  # type: List[List[List[Card]]]
-    meld_clusters = get_meld_clusters(hand=hand)  # type: List[List[List[Card]]]
-    meld_clusters_count = len(meld_clusters)
-    if meld_clusters_count > 0:
-        deadwood_counts = [utils.get_deadwood_count(hand=hand, meld_cluster=meld_cluster)
-                           for meld_cluster in meld_clusters]
-        best_deadwood_count = min(deadwood_counts)
-        for i in range(meld_clusters_count):
-            if deadwood_counts[i] == best_deadwood_count:
-                result.append(meld_clusters[i])
+    for meld_cluster in meld_cluster_masks:
+        result.append([[card_by_id[card_id] for card_id in card_ids if meld >> card_id & 1] for meld in meld_cluster])
     return result
 
 
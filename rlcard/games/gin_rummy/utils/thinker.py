@@ -20,24 +20,13 @@ class Thinker(object):
     # simple thinking
     def get_meld_piles_with_discard_card(self, discard_card: Card) -> List[List[Card]]:
         next_hand = self.hand + [discard_card]
-        meld_clusters = melding.get_meld_clusters(hand=next_hand)
-        best_deadwood_count = 999
-        best_deadwoods = []  # type: List[List[Card]]
-        best_meld_clusters = []  # type: List[List[List[Card]]]
-        for meld_cluster in meld_clusters:
-            meld_cards = [card for meld_pile in meld_cluster for card in meld_pile]
-            deadwood = [card for card in next_hand if card not in meld_cards]
-            deadwood_count = self._get_deadwood_count(deadwood=deadwood)
-            if deadwood_count < best_deadwood_count:
-                best_deadwood_count = deadwood_count
-                best_deadwoods = [deadwood]
-                best_meld_clusters = [meld_cluster]
-            elif deadwood_count == best_deadwood_count:
-                best_deadwoods.append(deadwood)
-                best_meld_clusters.append(meld_cluster)
+        discard_card_mask = 1 << utils.get_card_id(discard_card)
+        _, best_meld_cluster_masks = melding.get_best_deadwood(hand_mask=melding.get_hand_mask(hand=next_hand))
+        best_meld_clusters = melding.get_meld_clusters_from_masks(hand=next_hand,
+                                                                  meld_cluster_masks=best_meld_cluster_masks)
         want_discard_card = False
-        for deadwood in best_deadwoods:
-            if discard_card in deadwood:
+        for meld_cluster in best_meld_cluster_masks:
+            if not any(meld & discard_card_mask for meld in meld_cluster):  # discard_card is deadwood
                 want_discard_card = False
                 break
             else:
@@ -50,7 +39,3 @@ class Thinker(object):
                         result.append(meld_pile)
         return result
 
-    @staticmethod
-    def _get_deadwood_count(deadwood: List[Card]) -> int:
-        deadwood_values = [utils.get_deadwood_value(card) for card in deadwood]
-        return sum(deadwood_values)
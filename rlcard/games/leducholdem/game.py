@@ -1,5 +1,4 @@
 import numpy as np
-from copy import copy
 
 from rlcard.games.leducholdem import Dealer
 from rlcard.games.leducholdem import Player
@@ -102,16 +101,13 @@ class LeducholdemGame(Game):
                 (int): next plater's id
         '''
         if self.allow_step_back:
-            # First snapshot the current state
-            r = copy(self.round)
-            r_raised = copy(self.round.raised)
-            gp = self.game_pointer
-            r_c = self.round_counter
-            d_deck = copy(self.dealer.deck)
-            p = copy(self.public_card)
-            ps = [copy(self.players[i]) for i in range(self.num_players)]
-            ps_hand = [copy(self.players[i].hand) for i in range(self.num_players)]
-            self.history.append((r, r_raised, gp, r_c, d_deck, p, ps, ps_hand))
+            # Log the fields that the action may change, so that step_back
+            # can revert them without copying the round and players
+            r = self.round
+            player = self.players[r.game_pointer]
+            self.history.append((self.game_pointer, self.round_counter, r.game_pointer, r.raise_amount,
+                                 r.have_raised, r.not_raise_num, tuple(r.raised), player.in_chips,
+                                 player.status, self.public_card))
 
         # Then we proceed to the next round
         self.game_pointer = self.round.proceed_round(self.players, action)
@@ -179,14 +175,48 @@ class LeducholdemGame(Game):
             (bool): True if the game steps back successfully
         '''
         if len(self.history) > 0:
-            self.round, r_raised, self.game_pointer, self.round_counter, d_deck, self.public_card, self.players, ps_hand = self.history.pop()
-            self.round.raised = r_raised
-            self.dealer.deck = d_deck
-            for i, hand in enumerate(ps_hand):
-                self.players[i].hand = hand
+            r = self.round
+            (self.game_pointer, self.round_counter, r.game_pointer, r.raise_amount, r.have_raised,
+             r.not_raise_num, raised, in_chips, status, public_card) = self.history.pop()
+            r.raised = list(raised)
+            player = self.players[r.game_pointer]
+            player.in_chips, player.status = in_chips, status
+
+            # Put the public card dealt by the action back on the top of the deck
+            if self.public_card is not None and public_card is None:
+                self.dealer.deck.append(self.public_card)
+            self.public_card = public_card
             return True
         return False
 
+    def get_snapshot(self):
+        ''' Get a compact record of the current state of the game
+
+        Returns:
+            (tuple): The snapshot, which can be passed to restore
+        '''
+        r = self.round
+        return (self.game_pointer, self.round_counter,
+                (r.game_pointer, r.raise_amount, r.have_raised, r.not_raise_num, tuple(r.raised)),
+                tuple((p.hand, p.in_chips, p.status) for p in self.players),
+                self.public_card, tuple(self.dealer.deck), tuple(self.history))
+
+    def restore(self, snapshot):
+        ''' Restore the game to a snapshot taken by get_snapshot
+
+        Args:
+            snapshot (tuple): A snapshot returned by get_snapshot
+        '''
+        r = self.round
+        (self.game_pointer, self.round_counter, round_fields, players,
+         self.public_card, deck, history) = snapshot
+        r.game_pointer, r.raise_amount, r.have_raised, r.not_raise_num, raised = round_fields
+        r.raised = list(raised)
+        for player, (hand, in_chips, status) in zip(self.players, players):
+            player.hand, player.in_chips, player.status = hand, in_chips, status
+        self.dealer.deck = list(deck)
+        self.history = list(history)
+
 
 # Test the game
 
@@ -1,4 +1,4 @@
-from copy import deepcopy, copy
+from copy import copy
 import numpy as np
 
 from rlcard.games.limitholdem import Dealer
@@ -101,15 +101,13 @@ class LimitholdemGame(object):
                 (int): next plater's id
         '''
         if self.allow_step_back:
-            # First snapshot the current state
-            r = deepcopy(self.round)
-            b = self.game_pointer
-            r_c = self.round_counter
-            d = deepcopy(self.dealer)
-            p = deepcopy(self.public_cards)
-            ps = deepcopy(self.players)
-            rn = copy(self.history_raise_nums)
-            self.history.append((r, b, r_c, d, p, ps, rn))
+            # Log the fields that the action may change, so that step_back
+            # can revert them without copying the round, dealer and players
+            r = self.round
+            player = self.players[r.game_pointer]
+            self.history.append((self.game_pointer, self.round_counter, r.game_pointer, r.raise_amount,
+                                 r.have_raised, r.not_raise_num, tuple(r.raised), player.in_chips,
+                                 player.status, len(self.public_cards), self.history_raise_nums[self.round_counter]))
 
         # Then we proceed to the next round
         self.game_pointer = self.round.proceed_round(self.players, action)
@@ -147,10 +145,69 @@ class LimitholdemGame(object):
             (bool): True if the game steps back successfully
         '''
         if len(self.history) > 0:
-            self.round, self.game_pointer, self.round_counter, self.dealer, self.public_cards, self.players, self.history_raises_nums = self.history.pop()
+            r = self.round
+            (self.game_pointer, self.round_counter, r.game_pointer, r.raise_amount, r.have_raised,
+             r.not_raise_num, raised, in_chips, status, public_card_num, raise_num) = self.history.pop()
+            r.raised = list(raised)
+            player = self.players[r.game_pointer]
+            player.in_chips, player.status = in_chips, status
+            self.history_raise_nums[self.round_counter] = raise_num
+
+            # Put the public cards dealt by the action back on the top of the deck
+            while len(self.public_cards) > public_card_num:
+                self.dealer.deck.append(self.public_cards.pop())
             return True
         return False
 
+    def get_snapshot(self):
+        ''' Get a compact record of the current state of the game. It holds
+            the fields of the round and the players in tuples and shares the
+            cards, which are never modified, with the game
+
+        Returns:
+            (tuple): The snapshot, which can be passed to restore
+        '''
+        r = self.round
+        return (self.game_pointer, self.round_counter,
+                (r.game_pointer, r.raise_amount, r.have_raised, r.not_raise_num, tuple(r.raised)),
+                tuple((tuple(p.hand), p.in_chips, p.status) for p in self.players),
+                tuple(self.public_cards), tuple(self.dealer.deck), tuple(self.history_raise_nums),
+                tuple(self.history))
+
+    def restore(self, snapshot):
+        ''' Restore the game to a snapshot taken by get_snapshot. The game
+            should have been initialized by init_game
+
+        Args:
+            snapshot (tuple): A snapshot returned by get_snapshot
+        '''
+        r = self.round
+        (self.game_pointer, self.round_counter, round_fields, players,
+         public_cards, deck, raise_nums, history) = snapshot
+        r.game_pointer, r.raise_amount, r.have_raised, r.not_raise_num, raised = round_fields
+        r.raised = list(raised)
+        for player, (hand, in_chips, status) in zip(self.players, players):
+            player.hand, player.in_chips, player.status = list(hand), in_chips, status
+        self.public_cards = list(public_cards)
+        self.dealer.deck = list(deck)
+        self.history_raise_nums = list(raise_nums)
+        self.history = list(history)
+
+    def clone(self):
+        ''' Copy the game without deepcopy. The clone can be stepped and
+            stepped back independently of the game, e.g., to search sibling
+            branches in other threads, but shares the random number generator
+
+        Returns:
+            (LimitholdemGame): The clone
+        '''
+        game = copy(self)
+        game.dealer = copy(self.dealer)
+        game.players = [copy(p) for p in self.players]
+        game.round = copy(self.round)
+        game.restore(self.get_snapshot())
+        return game
+
     def get_player_num(self):
         ''' Return the number of players in Limit Texas Hold'em
 
@@ -1,3 +1,6 @@
+import itertools
+
+import numpy as np
 
 
 class Hand:
@@ -407,73 +410,6 @@ class Hand:
         High_cards = self.all_cards[2:7]
         return High_cards
 
-def compare_ranks(position, hands):
-    '''
-    Compare cards in same position of plays' five handcards
-    Args:
-        position(int): the position of a card in a sorted handcard
-        hands(list): cards of those players.
-        e.g. hands = [['CT', 'ST', 'H9', 'B9', 'C2', 'C8', 'C7'], ['CJ', 'SJ', 'H9', 'B9', 'C2', 'C8', 'C7'], ['CT', 'ST', 'H9', 'B9', 'C2', 'C8', 'C7']]
-    Returns:
-        [0, 1, 0]: player1 wins
-        [1, 0, 0]: player0 wins
-        [1, 1, 1]: draw
-        [1, 1, 0]: player1 and player0 draws
-
-    '''
-    RANKS = '23456789TJQKA'
-    winner = [0]*len(hands)
-    figure = [['1', 'J']]*len(hands) #cards without suit
-    for _ in enumerate(hands):
-        i = hands[_[0]].get_hand_five_cards()
-        if len(i[0]) != 1:# remove suit
-            for p in range(5):
-                i[p] = i[p][1:]
-        figure[_[0]] = i
-
-    rival_figures = [] # figures in the same position, to be compared
-    rival_ranks = [] # ranks of rival_figures
-    for _ in enumerate(figure):
-        rival_figures.append(figure[_[0]][position])
-        rival_ranks.append(RANKS.index(rival_figures[_[0]]))
-    high_ranks = [q for q, j in enumerate(rival_ranks) if j == max(rival_ranks)]
-    for _ in high_ranks:
-        winner[_] = 1
-    return winner
-
-def determine_winner(key_index, hands, all_players, potential_winner_index):
-    '''
-    Find out who wins in the situation of having players with same highest hand_catagory
-    Args:
-        key_index(int): the position of a card in a sorted handcard
-        hands(list): cards of those players with same highest hand_catagory.
-        e.g. hands = [['CT', 'ST', 'H9', 'B9', 'C2', 'C8', 'C7'], ['CJ', 'SJ', 'H9', 'B9', 'C2', 'C8', 'C7'], ['CT', 'ST', 'H9', 'B9', 'C2', 'C8', 'C7']]
-        all_players(list): all the players in this round, 0 for losing and 1 for winning or draw
-        potential_winner_index(list): the positions of those players with same highest hand_catagory in all_players
-    Returns:
-        [0, 1, 0]: player1 wins
-        [1, 0, 0]: player0 wins
-        [1, 1, 1]: draw
-        [1, 1, 0]: player1 and player0 draws
-
-    '''
-    count = 0
-    winner = [1]*len(hands)
-    for _ in key_index:
-        index_winner = compare_ranks(_, hands)
-        for _ in enumerate(winner):
-            if winner[_[0]] == 1:
-                winner[_[0]] = index_winner[_[0]]
-            if winner[_[0]] == 0:
-                continue
-        if winner.count(1) == 1:
-            break
-    for _ in winner:
-        if _ == 1:
-            all_players[potential_winner_index[count]] = 1
-        count+=1
-    return all_players
-
 def compare_hands(hands):
     '''
     Compare all palyer's all seven cards
@@ -491,70 +427,153 @@ def compare_hands(hands):
     elif hands[1] == None:
         return [1, 0]
     '''
-    hand_category = [] #such as high_card, straight_flush, etc
-    all_players = [0]*len(hands) #all the players in this round, 0 for losing and 1 for winning or draw
-    if None in hands:
-        fold_players = [i for i, j in enumerate(hands) if j is None]
-        if len(fold_players) == len(all_players) - 1:
-            for _ in enumerate(hands):
-                if _[0] in fold_players:
-                    all_players[_[0]] = 0
-                else:
-                    all_players[_[0]] = 1
-            return all_players
-        else:
-            for _ in enumerate(hands):
-                if hands[_[0]] is not None:
-                    hands[_[0]] = Hand(hands[_[0]])
-                    hands[_[0]].evaluateHand()
-                    hand_category.append(hands[_[0]].category)
-                elif hands[_[0]] is None:
-                    hand_category.append(0)
-    else:
-            for i in enumerate(hands):
-                hands[i[0]] = Hand(hands[i[0]])
-                hands[i[0]].evaluateHand()
-                hand_category.append(hands[i[0]].category)
-    potential_winner_index = [i for i, j in enumerate(hand_category) if j == max(hand_category)]# potential winner are those with same max card_catagory
-
-    return final_compare(hands, potential_winner_index, all_players)
-
-def final_compare(hands, potential_winner_index, all_players):
+    # If all the other players folded, the hand of the last player is not complete
+    if sum(hand is not None for hand in hands) == 1:
+        return [0 if hand is None else 1 for hand in hands]
+    # The players who folded get the rank 0, which is lower than any hand
+    hand_ranks = [0 if hand is None else evaluate_hand(hand) for hand in hands]
+    best_rank = max(hand_ranks)
+    return [1 if rank == best_rank else 0 for rank in hand_ranks]
+
+# The keys of the ranks 2, 3, ..., A. The sum of the keys of any 7 ranks, in
+# which each rank appears at most 4 times, is unique, so it is a perfect hash
+# of the ranks of 7 cards
+RANK_KEYS = np.array([0, 1, 5, 22, 98, 453, 2031, 8698, 22854, 83661, 262349, 636345, 1479181], dtype=np.int64)
+RANK_ORDER = '23456789TJQKA'
+
+# The cards are indexed as in card2index.json, i.e., suit index * 13 + rank
+# index, with the suits in the order SHDC and the ranks in the order A2...K
+SUIT_ORDER = 'SHDC'
+CARD_INDEX = {suit + rank: i * 13 + j for i, suit in enumerate(SUIT_ORDER) for j, rank in enumerate('A23456789TJQK')}
+
+# The lookup tables, built on the first evaluation
+_lookup_tables = None
+
+def evaluate_hand(cards):
+    ''' Evaluate seven cards with the lookup tables
+
+    Args:
+        cards (list): Seven cards, e.g., ['CT', 'ST', 'H9', 'S9', 'C2', 'C8', 'C7']
+
+    Returns:
+        (int): The 16-bit rank of the best five cards, from 1 to 4824. A
+          higher rank is a better hand, and equal ranks are a draw
     '''
-    Find out the winners from those who didn't fold
+    if len(cards) != 7:
+        raise ValueError('There are not enough 7 cards in this hand')
+    rank_table, flush_table = _get_lookup_tables()
+    ranks = [RANK_ORDER.index(card[1]) for card in cards]
+    suits = [card[0] for card in cards]
+    for suit in set(suits):
+        if suits.count(suit) >= 5:
+            mask = 0
+            for rank, card_suit in zip(ranks, suits):
+                if card_suit == suit:
+                    mask |= 1 << rank
+            return int(flush_table[mask])
+    return int(rank_table[RANK_KEYS[ranks].sum()])
+
+def evaluate_hands(cards):
+    ''' Evaluate many hands of seven cards at once
+
     Args:
-        hands(list): cards of those players with same highest hand_catagory.
-        e.g. hands = [['CT', 'ST', 'H9', 'B9', 'C2', 'C8', 'C7'], ['CJ', 'SJ', 'H9', 'B9', 'C2', 'C8', 'C7'], ['CT', 'ST', 'H9', 'B9', 'C2', 'C8', 'C7']]
-        potential_winner_index(list): index of those with same max card_catagory in all_players
-        all_players(list): a list of all the player's win/lose situation, 0 for lose and 1 for win
+        cards (numpy.array): An integer array of shape (..., 7) of the
+          indexes of the cards in CARD_INDEX
+
     Returns:
-        [0, 1, 0]: player1 wins
-        [1, 0, 0]: player0 wins
-        [1, 1, 1]: draw
-        [1, 1, 0]: player1 and player0 draws
+        (numpy.array): The ranks of the hands as in evaluate_hand, of shape (...)
+    '''
+    cards = np.asarray(cards, dtype=np.int64)
+    if cards.shape[-1] != 7:
+        raise ValueError('There are not enough 7 cards in each hand')
+    rank_table, flush_table = _get_lookup_tables()
+    ranks = (cards % 13 + 12) % 13
+    suits = cards // 13
+    suit_counts = (suits[..., None] == np.arange(4)).sum(axis=-2)
+    flush_suit = np.argmax(suit_counts, axis=-1)
+    is_flush = np.max(suit_counts, axis=-1) >= 5
+    masks = np.where(suits == flush_suit[..., None], 1 << ranks, 0).sum(axis=-1)
+    return np.where(is_flush, flush_table[masks], rank_table[RANK_KEYS[ranks].sum(axis=-1)])
+
+def _get_lookup_tables():
+    ''' Build or get the lookup tables. The hands without a flush are ranked
+        by the perfect hash of their ranks, and the flushes by the bit mask
+        of the ranks of the flush suit
 
-    if hands[0] == None:
-        return [0, 1]
-    elif hands[1] == None:
-        return [1, 0]
+    Returns:
+        (tuple): The table of the hands without a flush, indexed by the sum
+          of RANK_KEYS, and the table of the flushes, indexed by the mask
+    '''
+    global _lookup_tables
+    if _lookup_tables is not None:
+        return _lookup_tables
+
+    hand_keys, hand_scores = [], []
+    for ranks in itertools.combinations_with_replacement(range(13), 7):
+        counts = [0] * 13
+        for rank in ranks:
+            counts[rank] += 1
+        if max(counts) <= 4:
+            hand_keys.append(RANK_KEYS[list(ranks)].sum())
+            hand_scores.append(_score_ranks(counts))
+    flush_masks, flush_scores = [], []
+    for mask in range(1 << 13):
+        if bin(mask).count('1') >= 5:
+            flush_masks.append(mask)
+            flush_scores.append(_score_flush(mask))
+
+    # Number the scores from the worst to the best hand
+    score_index = {score: i + 1 for i, score in enumerate(sorted(set(hand_scores + flush_scores)))}
+    rank_table = np.zeros(max(hand_keys) + 1, dtype=np.uint16)
+    rank_table[hand_keys] = [score_index[score] for score in hand_scores]
+    flush_table = np.zeros(1 << 13, dtype=np.uint16)
+    flush_table[flush_masks] = [score_index[score] for score in flush_scores]
+    _lookup_tables = (rank_table, flush_table)
+    return _lookup_tables
+
+def _straight_high(mask):
+    ''' Get the highest rank of the best straight in a bit mask of ranks,
+        or -1 if there is no straight. The ace can be low in 5-4-3-2-A
+    '''
+    for high in range(12, 3, -1):
+        straight = 0b11111 << (high - 4)
+        if mask & straight == straight:
+            return high
+    wheel = 0b1000000001111
+    return 3 if mask & wheel == wheel else -1
+
+def _score_ranks(counts):
+    ''' Score the best five cards of seven cards without a flush. The score
+        is a tuple of the category, from 1 for high card to 8 for four of a
+        kind, and the ranks that break the ties within the category
+
+    Args:
+        counts (list): The number of cards of each rank
+    '''
+    groups = sorted(((count, rank) for rank, count in enumerate(counts) if count > 0), reverse=True)
+    singles = sorted((rank for rank, count in enumerate(counts) if count > 0), reverse=True)
+    (first_count, first), (second_count, second) = groups[0], groups[1]
+    if first_count == 4:
+        return (8, first, max(rank for rank in singles if rank != first))
+    if first_count == 3 and second_count >= 2:
+        return (7, first, second)
+    straight = _straight_high(sum(1 << rank for rank in singles))
+    if straight >= 0:
+        return (5, straight)
+    if first_count == 3:
+        return (4, first) + tuple(rank for rank in singles if rank != first)[:2]
+    if first_count == 2 and second_count == 2:
+        return (3, first, second) + tuple(rank for rank in singles if rank not in (first, second))[:1]
+    if first_count == 2:
+        return (2, first) + tuple(rank for rank in singles if rank != first)[:3]
+    return (1,) + tuple(singles[:5])
+
+def _score_flush(mask):
+    ''' Score the best five cards of a flush, given the bit mask of the ranks
+        of the flush suit. Straight flushes have the category 9 and the other
+        flushes the category 6
     '''
-    if len(potential_winner_index) == 1:
-        all_players[potential_winner_index[0]] = 1
-        return all_players
-    elif len(potential_winner_index) > 1:
-        # compare when having equal max categories
-        equal_hands = []
-        for _ in potential_winner_index:
-            equal_hands.append(hands[_])
-        if hands[potential_winner_index[0]].category == 9 or hands[potential_winner_index[0]].category == 5 or hands[potential_winner_index[0]].category == 8:
-            return determine_winner([0], equal_hands, all_players, potential_winner_index)
-        if hands[potential_winner_index[0]].category == 7:
-            return determine_winner([2, 0], equal_hands, all_players, potential_winner_index)
-        if hands[potential_winner_index[0]].category == 4:
-            return determine_winner([2, 1, 0], equal_hands, all_players, potential_winner_index)
-        if hands[potential_winner_index[0]].category == 3:
-            return determine_winner([4, 2, 0], equal_hands, all_players, potential_winner_index)
-        if hands[potential_winner_index[0]].category == 2:
-            return determine_winner([4, 2, 1, 0], equal_hands, all_players, potential_winner_index)
-        if hands[potential_winner_index[0]].category == 1 or hands[potential_winner_index[0]].category == 6:
-            return determine_winner([4, 3, 2, 1, 0], equal_hands, all_players, potential_winner_index)
+    straight = _straight_high(mask)
+    if straight >= 0:
+        return (9, straight)
+    return (6,) + tuple(rank for rank in range(12, -1, -1) if mask & (1 << rank))[:5]
@@ -1,5 +1,5 @@
 import numpy as np
-from copy import deepcopy
+from copy import copy
 
 from rlcard.games.mahjong import Dealer
 from rlcard.games.mahjong import Player
@@ -59,12 +59,16 @@ class MahjongGame(object):
                 (dict): next player's state
                 (int): next plater's id
         '''
-        # First snapshot the current state
+        # First log the fields that the action may change, so that step_back
+        # can revert them without copying the dealer, round and players. An
+        # action deals at most one card and takes at most one card from the table
         if self.allow_step_back:
-            hist_dealer = deepcopy(self.dealer)
-            hist_round = deepcopy(self.round)
-            hist_players = deepcopy(self.players)
-            self.history.append((hist_dealer, hist_players, hist_round))
+            r = self.round
+            self.history.append((r.current_player, r.last_player, r.player_before_act, r.valid_act,
+                                 r.last_cards, [copy(p.hand) for p in self.players],
+                                 [len(p.pile) for p in self.players], len(self.dealer.table),
+                                 self.dealer.table[-1:], len(self.dealer.deck), self.dealer.deck[-1:],
+                                 self.cur_state))
         self.round.proceed_round(self.players, action)
         state = self.get_state(self.round.current_player)
         self.cur_state = state
@@ -78,9 +82,61 @@ class MahjongGame(object):
         '''
         if not self.history:
             return False
-        self.dealer, self.players, self.round = self.history.pop()
+        r = self.round
+        (r.current_player, r.last_player, r.player_before_act, r.valid_act, r.last_cards,
+         hands, pile_nums, table_num, table_top, deck_num, deck_top, self.cur_state) = self.history.pop()
+        for player, hand, pile_num in zip(self.players, hands, pile_nums):
+            player.hand[:] = hand
+            del player.pile[pile_num:]
+        del self.dealer.table[table_num:]
+        if len(self.dealer.table) < table_num:
+            self.dealer.table.extend(table_top)
+        if len(self.dealer.deck) < deck_num:
+            self.dealer.deck.extend(deck_top)
         return True
 
+    def get_snapshot(self):
+        ''' Get a compact record of the current state of the game
+
+        Returns:
+            (tuple): The snapshot, which can be passed to restore
+        '''
+        r = self.round
+        return ((r.current_player, r.last_player, r.player_before_act, r.valid_act, r.last_cards),
+                tuple((tuple(p.hand), tuple(p.pile)) for p in self.players),
+                tuple(self.dealer.table), tuple(self.dealer.deck), tuple(self.history))
+
+    def restore(self, snapshot):
+        ''' Restore the game to a snapshot taken by get_snapshot
+
+        Args:
+            snapshot (tuple): A snapshot returned by get_snapshot
+        '''
+        r = self.round
+        round_fields, players, table, deck, history = snapshot
+        r.current_player, r.last_player, r.player_before_act, r.valid_act, r.last_cards = round_fields
+        for player, (hand, pile) in zip(self.players, players):
+            player.hand, player.pile = list(hand), list(pile)
+        self.dealer.table = list(table)
+        self.dealer.deck = list(deck)
+        self.history = list(history)
+        self.cur_state = self.get_state(r.current_player)
+
+    def clone(self):
+        ''' Copy the game without deepcopy. The clone shares the random
+            number generator with the game
+
+        Returns:
+            (MahjongGame): The clone
+        '''
+        game = copy(self)
+        game.dealer = copy(self.dealer)
+        game.players = [copy(p) for p in self.players]
+        game.round = copy(self.round)
+        game.round.dealer = game.dealer
+        game.restore(self.get_snapshot())
+        return game
+
     def get_state(self, player_id):
         ''' Return player's state
 
@@ -1,5 +1,6 @@
 import numpy as np
 from rlcard.games.mahjong.card import MahjongCard as Card
+from rlcard.utils.card_set import CardCounts
 
 
 card_encoding_dict = {}
@@ -58,11 +59,144 @@ def cards2list(cards):
     return cards_list
 
 
+def tile2index(card):
+    ''' Get the index of a tile in the 34 kinds of tiles
+
+    Args:
+        card (MahjongCard or str): The tile or its string, e.g., 'bamboo-3'
+
+    Returns:
+        (int): The index of the tile in card_encoding_dict
+    '''
+    if isinstance(card, str):
+        return card_encoding_dict[card]
+    return card_encoding_dict[card.type + '-' + card.trait]
+
+def cards2counts(cards):
+    ''' Count the tiles of each kind
+
+    Args:
+        cards (list): A list of MahjongCard objects or strings of tiles
+
+    Returns:
+        (CardCounts): The counts of the 34 kinds of tiles
+    '''
+    return CardCounts(34, tile2index, cards)
+
 def encode_cards(cards):
-    plane = np.zeros((34,4), dtype=int)
-    cards = cards2list(cards)
-    for card in list(set(cards)):
-        index = card_encoding_dict[card]
-        num = cards.count(card)
-        plane[index][:num] = 1
-    return plane
+    return cards2counts(cards).to_plane()
+
+# The lookup table of the suit patterns. The counts of the nine tiles of a suit
+# are mapped to the maximum number of sets (chows and pongs) without a pair, and
+# with exactly one pair, or -1 if there is no pair. The table is filled as the
+# patterns are met, so every pattern is decomposed only once
+SUIT_TABLE = {}
+
+def lookup_suit(counts):
+    ''' Look up the sets of the tiles of a suit
+
+    Args:
+        counts (tuple): The counts of the nine tiles of the suit
+
+    Returns:
+        (tuple): Tuple containing:
+
+            (int): The maximum number of sets
+            (int): The maximum number of sets besides a pair, or -1 without pairs
+    '''
+    value = SUIT_TABLE.get(counts)
+    if value is None:
+        value = SUIT_TABLE[counts] = _decompose_suit(counts)
+    return value
+
+def _next_patterns(counts):
+    ''' Get the patterns left by the choices for the first tile of a pattern
+
+    Returns:
+        (list): List of (pattern, sets, pairs) for leaving the first tile out,
+          and taking the pong, the chow or the pair of the first tile
+    '''
+    i = next(i for i, count in enumerate(counts) if count)
+    patterns = []
+    rest = list(counts)
+    rest[i] -= 1
+    patterns.append((tuple(rest), 0, 0))
+    if counts[i] >= 3:
+        rest = list(counts)
+        rest[i] -= 3
+        patterns.append((tuple(rest), 1, 0))
+    if i <= 6 and counts[i+1] and counts[i+2]:
+        rest = list(counts)
+        rest[i] -= 1
+        rest[i+1] -= 1
+        rest[i+2] -= 1
+        patterns.append((tuple(rest), 1, 0))
+    if counts[i] >= 2:
+        rest = list(counts)
+        rest[i] -= 2
+        patterns.append((tuple(rest), 0, 1))
+    return patterns
+
+def _decompose_suit(counts):
+    ''' Compute the entry of a pattern in SUIT_TABLE from the entries of the
+        patterns left by the choices for its first tile
+    '''
+    if not any(counts):
+        return 0, -1
+    sets, pair_sets = 0, -1
+    for rest, num, pair in _next_patterns(counts):
+        rest_sets, rest_pair_sets = lookup_suit(rest)
+        if pair:
+            pair_sets = max(pair_sets, rest_sets)
+        else:
+            sets = max(sets, rest_sets + num)
+            if rest_pair_sets >= 0:
+                pair_sets = max(pair_sets, rest_pair_sets + num)
+    return sets, pair_sets
+
+def count_sets(counts):
+    ''' Count the sets of the tiles in a hand with the lookup table of the
+        suits, and the pongs of the dragons and the winds
+
+    Args:
+        counts (list): The counts of the 34 kinds of tiles, e.g.,
+          cards2counts(cards).counts
+
+    Returns:
+        (tuple): Tuple containing:
+
+            (int): The maximum number of sets
+            (int): The maximum number of sets besides a pair, or -1 without pairs
+    '''
+    sets, gain = 0, None
+    for start in (0, 9, 18):
+        suit_sets, pair_sets = lookup_suit(tuple(counts[start:start+9]))
+        sets += suit_sets
+        if pair_sets >= 0 and (gain is None or pair_sets - suit_sets > gain):
+            gain = pair_sets - suit_sets
+    for count in counts[27:]:
+        if count >= 3:
+            sets += 1
+        if count >= 2 and (gain is None or -(count >= 3) > gain):
+            gain = -(count >= 3)
+    return sets, -1 if gain is None else sets + gain
+
+def decompose_suit(counts):
+    ''' Find the sets of a suit achieving the maximum number in SUIT_TABLE
+
+    Args:
+        counts (tuple): The counts of the nine tiles of the suit
+
+    Returns:
+        (list): The sets as lists of the indexes of the tiles in the suit
+    '''
+    sets = []
+    while any(counts):
+        target = lookup_suit(counts)[0]
+        for rest, num, pair in _next_patterns(counts):
+            if not pair and lookup_suit(rest)[0] + num == target:
+                if num:
+                    sets.append([i for i in range(9) for _ in range(counts[i] - rest[i])])
+                counts = rest
+                break
+    return sets
@@ -1,7 +1,7 @@
 from enum import Enum
 
 import numpy as np
-from copy import deepcopy
+from copy import copy
 from rlcard.games.limitholdem import Game
 from rlcard.games.limitholdem import PlayerStatus
 
@@ -118,13 +118,7 @@ class NolimitholdemGame(Game):
 
         if self.allow_step_back:
             # First snapshot the current state
-            r = deepcopy(self.round)
-            b = self.game_pointer
-            r_c = self.round_counter
-            d = deepcopy(self.dealer)
-            p = deepcopy(self.public_cards)
-            ps = deepcopy(self.players)
-            self.history.append((r, b, r_c, d, p, ps))
+            self.history.append(self._get_state_snapshot())
 
         # Then we proceed to the next round
         self.game_pointer = self.round.proceed_round(self.players, action)
@@ -196,10 +190,67 @@ class NolimitholdemGame(Game):
             (bool): True if the game steps back successfully
         '''
         if len(self.history) > 0:
-            self.round, self.game_pointer, self.round_counter, self.dealer, self.public_cards, self.players = self.history.pop()
+            self._restore_state(self.history.pop())
             return True
         return False
 
+    def get_snapshot(self):
+        ''' Get a compact record of the current state of the game, including
+            the history of the previous states for step_back
+
+        Returns:
+            (tuple): The snapshot, which can be passed to restore
+        '''
+        return self._get_state_snapshot(), tuple(self.history)
+
+    def restore(self, snapshot):
+        ''' Restore the game to a snapshot taken by get_snapshot
+
+        Args:
+            snapshot (tuple): A snapshot returned by get_snapshot
+        '''
+        state_snapshot, history = snapshot
+        self._restore_state(state_snapshot)
+        self.history = list(history)
+
+    def _get_state_snapshot(self):
+        ''' Get a record of the current state without the history. It is the
+            entry of the history recorded by step
+        '''
+        r = self.round
+        return (self.game_pointer, self.round_counter, self.stage, self.dealer.pot,
+                (r.game_pointer, r.not_raise_num, tuple(r.raised)),
+                tuple((tuple(p.hand), p.in_chips, p.remained_chips, p.status) for p in self.players),
+                tuple(self.public_cards), tuple(self.dealer.deck))
+
+    def _restore_state(self, state_snapshot):
+        ''' Restore the state recorded by _get_state_snapshot, keeping the history
+        '''
+        r = self.round
+        (self.game_pointer, self.round_counter, self.stage, self.dealer.pot, round_fields,
+         players, public_cards, deck) = state_snapshot
+        r.game_pointer, r.not_raise_num, raised = round_fields
+        r.raised = list(raised)
+        for player, (hand, in_chips, remained_chips, status) in zip(self.players, players):
+            player.hand, player.in_chips, player.remained_chips, player.status = list(hand), in_chips, remained_chips, status
+        self.public_cards = list(public_cards)
+        self.dealer.deck = list(deck)
+
+    def clone(self):
+        ''' Copy the game without deepcopy. The clone shares the random
+            number generator with the game
+
+        Returns:
+            (NolimitholdemGame): The clone
+        '''
+        game = copy(self)
+        game.dealer = copy(self.dealer)
+        game.players = [copy(p) for p in self.players]
+        game.round = copy(self.round)
+        game.round.dealer = game.dealer
+        game.restore(self.get_snapshot())
+        return game
+
     def get_payoffs(self):
         ''' Return the payoffs of the game
 
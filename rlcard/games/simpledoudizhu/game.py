@@ -3,6 +3,7 @@
 '''
 
 import functools
+from copy import copy
 from heapq import merge
 import numpy as np
 
@@ -114,6 +115,59 @@ class SimpleDoudizhuGame(object):
         self.state = self.get_state(self.round.current_player)
         return True
 
+    def get_snapshot(self):
+        ''' Get a compact record of the current state of the game. The
+            playable cards of the judger are kept as frozensets, and the
+            player who played the current biggest cards as its id
+
+        Returns:
+            (tuple): The snapshot, which can be passed to restore
+        '''
+        r = self.round
+        greater_player_id = None if r.greater_player is None else r.greater_player.player_id
+        return (self.winner_id, self.state,
+                (r.current_player, greater_player_id, tuple(r.trace), r.played_cards.copy(),
+                 tuple(r.public['played_cards'])),
+                tuple((tuple(p._current_hand), p.played_cards, p.singles, tuple(p._recorded_played_cards))
+                      for p in self.players),
+                tuple(frozenset(cards) for cards in self.judger.playable_cards),
+                tuple(tuple(removed) for removed in self.judger._recorded_removed_playable_cards))
+
+    def restore(self, snapshot):
+        ''' Restore the game to a snapshot taken by get_snapshot
+
+        Args:
+            snapshot (tuple): A snapshot returned by get_snapshot
+        '''
+        r = self.round
+        self.winner_id, self.state, round_fields, players, playable_cards, removed_playable_cards = snapshot
+        r.current_player, greater_player_id, trace, played_cards, public_played_cards = round_fields
+        r.greater_player = None if greater_player_id is None else self.players[greater_player_id]
+        r.trace = list(trace)
+        r.played_cards = played_cards.copy()
+        r.public = dict(r.public, trace=r.trace, played_cards=list(public_played_cards))
+        for player, (current_hand, played, singles, recorded) in zip(self.players, players):
+            player._current_hand = list(current_hand)
+            player.played_cards, player.singles = played, singles
+            player._recorded_played_cards = list(recorded)
+        self.judger.playable_cards = [set(cards) for cards in playable_cards]
+        self.judger._recorded_removed_playable_cards = [list(removed) for removed in removed_playable_cards]
+
+    def clone(self):
+        ''' Copy the game without deepcopy. The clone shares the random
+            number generator and the dealer, which is not used after the
+            cards are dealt, with the game
+
+        Returns:
+            (SimpleDoudizhuGame): The clone
+        '''
+        game = copy(self)
+        game.players = [copy(p) for p in self.players]
+        game.round = copy(self.round)
+        game.judger = copy(self.judger)
+        game.restore(self.get_snapshot())
+        return game
+
     def get_state(self, player_id):
         ''' Return player's state
 
@@ -1,4 +1,4 @@
-from copy import deepcopy
+from copy import copy
 import numpy as np
 
 from rlcard.games.uno import Dealer
@@ -29,6 +29,10 @@ class UnoGame(object):
         # Initialize a dealer that can deal cards
         self.dealer = Dealer(self.np_random)
 
+        # Index the cards for the snapshots. The color of a wild card is
+        # changed when it is drawn, so the wild cards are recorded apart
+        self._set_cards(self.dealer.deck)
+
         # Initialize four players to play the game
         self.players = [Player(i, self.np_random) for i in range(self.num_players)]
 
@@ -65,10 +69,7 @@ class UnoGame(object):
 
         if self.allow_step_back:
             # First snapshot the current state
-            his_dealer = deepcopy(self.dealer)
-            his_round = deepcopy(self.round)
-            his_players = deepcopy(self.players)
-            self.history.append((his_dealer, his_players, his_round))
+            self.history.append(self._get_state_snapshot())
 
         self.round.proceed_round(self.players, action)
         player_id = self.round.current_player
@@ -83,9 +84,85 @@ class UnoGame(object):
         '''
         if not self.history:
             return False
-        self.dealer, self.players, self.round = self.history.pop()
+        self._restore_state(self.history.pop())
         return True
 
+    def get_snapshot(self):
+        ''' Get a compact record of the current state of the game, including
+            the history of the previous states for step_back. The piles
+            are recorded as the indexes of the cards, and the colors of all
+            the wild cards are recorded, since the color of a wild card is
+            chosen when it is drawn or flipped
+
+        Returns:
+            (tuple): The snapshot, which can be passed to restore
+        '''
+        return self._get_state_snapshot(), tuple(self.history)
+
+    def restore(self, snapshot):
+        ''' Restore the game to a snapshot taken by get_snapshot
+
+        Args:
+            snapshot (tuple): A snapshot returned by get_snapshot
+        '''
+        state_snapshot, history = snapshot
+        self._restore_state(state_snapshot)
+        self.history = list(history)
+
+    def _get_state_snapshot(self):
+        ''' Get a record of the current state without the history. It is the
+            entry of the history recorded by step
+        '''
+        r = self.round
+        index = self._card_indexes
+        return (tuple(self.payoffs), tuple(index[card] for card in self.dealer.deck),
+                tuple(tuple(index[card] for card in p.hand) for p in self.players),
+                (index[r.target], r.current_player, r.direction, tuple(index[card] for card in r.played_cards),
+                 r.is_over, r.winner), tuple(card.color for card in self._wild_cards))
+
+    def _restore_state(self, state_snapshot):
+        ''' Restore the state recorded by _get_state_snapshot, keeping the history
+        '''
+        r = self.round
+        cards = self._cards
+        payoffs, deck, hands, round_fields, wild_colors = state_snapshot
+        target, r.current_player, r.direction, played_cards, r.is_over, r.winner = round_fields
+        r.target = cards[target]
+        r.played_cards = [cards[index] for index in played_cards]
+        for player, hand in zip(self.players, hands):
+            player.hand = [cards[index] for index in hand]
+        for card, color in zip(self._wild_cards, wild_colors):
+            card.color = color
+        self.payoffs = list(payoffs)
+        self.dealer.deck = [cards[index] for index in deck]
+
+    def clone(self):
+        ''' Copy the game without deepcopy. The clone shares the random
+            number generator and the cards with the game, except for the
+            wild cards, whose colors are changed in the game
+
+        Returns:
+            (UnoGame): The clone
+        '''
+        game = copy(self)
+        game.dealer = copy(self.dealer)
+        game.players = [copy(p) for p in self.players]
+        game.round = copy(self.round)
+        game.round.dealer = game.dealer
+        game._set_cards([copy(card) if card.type == 'wild' else card for card in self._cards])
+        game.restore(self.get_snapshot())
+        return game
+
+    def _set_cards(self, cards):
+        ''' Set the cards of the game, which are indexed in the snapshots
+
+        Args:
+            cards (list): The list of all the UnoCards of the game
+        '''
+        self._cards = list(cards)
+        self._card_indexes = {card: index for index, card in enumerate(self._cards)}
+        self._wild_cards = [card for card in self._cards if card.type == 'wild']
+
     def get_state(self, player_id):
         ''' Return player's state
 
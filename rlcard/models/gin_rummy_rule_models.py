@@ -91,16 +91,13 @@ class GinRummyNoviceRuleAgent(object):
         final_deadwood_count = 999
         env_hand = state['obs'][0]
         hand = utils.decode_cards(env_cards=env_hand)
+        hand_mask = melding.get_hand_mask(hand=hand)
         for discard_action_event in discard_action_events:
             discard_card = discard_action_event.card
-            next_hand = [card for card in hand if card != discard_card]
-            meld_clusters = melding.get_meld_clusters(hand=next_hand)
-            deadwood_counts = []
-            for meld_cluster in meld_clusters:
-                deadwood_count = utils.get_deadwood_count(hand=next_hand, meld_cluster=meld_cluster)
-                deadwood_counts.append(deadwood_count)
-            best_deadwood_count = min(deadwood_counts,
-                                      default=utils.get_deadwood_count(hand=next_hand, meld_cluster=[]))
+            discard_card_id = utils.get_card_id(discard_card)
+            next_meld_cluster_masks = melding.update_meld_cluster_masks(hand_mask=hand_mask, card_id=discard_card_id)
+            best_deadwood_count, _ = melding.get_best_deadwood_of_meld_cluster_masks(
+                hand_mask=hand_mask & ~(1 << discard_card_id), meld_cluster_masks=next_meld_cluster_masks)
             if best_deadwood_count < final_deadwood_count:
                 final_deadwood_count = best_deadwood_count
                 best_discards = [discard_card]
@@ -0,0 +1,249 @@
+''' Compact sets of cards. A set of distinct cards of a 52 or 54-card deck is
+    stored as the bits of an integer, and a multiset of cards, such as the
+    tiles of Mahjong, as a vector of counts
+'''
+import numpy as np
+
+from rlcard.core import Card
+
+SUIT_LIST = ['S', 'H', 'D', 'C']
+RANK_LIST = ['A', '2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K']
+JOKER_LIST = ['BJ', 'RJ']
+
+# the masks of the cards of each suit and of each rank
+SUIT_MASKS = [0x1FFF << (13 * i) for i in range(len(SUIT_LIST))]
+RANK_MASKS = [sum(1 << (13 * j + i) for j in range(len(SUIT_LIST))) for i in range(len(RANK_LIST))]
+
+_CARD_INDEX = {(suit, rank): 13 * i + j for i, suit in enumerate(SUIT_LIST) for j, rank in enumerate(RANK_LIST)}
+_CARD_INDEX.update({(suit, ''): 52 + i for i, suit in enumerate(JOKER_LIST)})
+_BITS = np.arange(54, dtype=np.uint64)
+
+def card2index(card):
+    ''' Get the index of a card in the deck of init_54_deck, i.e.,
+        13 * suit + rank, and 52 and 53 for the black and red jokers
+
+    Args:
+        card (Card): A Card object
+
+    Returns:
+        (int): The index of the card
+    '''
+    return _CARD_INDEX[(card.suit, card.rank)]
+
+def index2card(index):
+    ''' Get the card of an index as in card2index
+
+    Args:
+        index (int): The index of the card
+
+    Returns:
+        (Card): A new Card object
+    '''
+    if index >= 52:
+        return Card(JOKER_LIST[index - 52], '')
+    return Card(SUIT_LIST[index // 13], RANK_LIST[index % 13])
+
+def popcount(mask):
+    ''' Count the bits of an integer
+    '''
+    return bin(mask).count('1')
+
+
+class CardSet(object):
+    ''' A set of distinct cards of a 52 or 54-card deck, stored as the bits of
+        an integer. Adding, removing and checking a card take constant time,
+        and the set operations and the counts of the ranks and the suits take
+        a few integer operations
+    '''
+
+    __slots__ = ('mask',)
+
+    def __init__(self, cards=(), mask=0):
+        ''' Initialize a set of cards
+
+        Args:
+            cards (list): A list of Card objects
+            mask (int): The bits of the cards by their indexes in card2index
+        '''
+        for card in cards:
+            mask |= 1 << _CARD_INDEX[(card.suit, card.rank)]
+        self.mask = mask
+
+    @classmethod
+    def from_indexes(cls, indexes):
+        ''' Make a set from the indexes of the cards in card2index
+        '''
+        mask = 0
+        for index in indexes:
+            mask |= 1 << index
+        return cls(mask=mask)
+
+    def add(self, card):
+        self.mask |= 1 << card2index(card)
+
+    def remove(self, card):
+        ''' Remove a card from the set. Raise KeyError if it is not in the set
+        '''
+        bit = 1 << card2index(card)
+        if not self.mask & bit:
+            raise KeyError(str(card))
+        self.mask ^= bit
+
+    def discard(self, card):
+        self.mask &= ~(1 << card2index(card))
+
+    def copy(self):
+        return CardSet(mask=self.mask)
+
+    def __contains__(self, card):
+        return bool(self.mask >> card2index(card) & 1)
+
+    def __len__(self):
+        return popcount(self.mask)
+
+    def __bool__(self):
+        return self.mask != 0
+
+    def __iter__(self):
+        ''' Iterate the cards as new Card objects in the order of their indexes
+        '''
+        return (index2card(index) for index in self.indexes())
+
+    def indexes(self):
+        ''' Get the indexes of the cards in ascending order
+
+        Returns:
+            (list): The indexes of the cards in card2index
+        '''
+        mask, indexes = self.mask, []
+        while mask:
+            low = mask & -mask
+            indexes.append(low.bit_length() - 1)
+            mask ^= low
+        return indexes
+
+    def __eq__(self, other):
+        if isinstance(other, CardSet):
+            return self.mask == other.mask
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.mask)
+
+    def __or__(self, other):
+        return CardSet(mask=self.mask | other.mask)
+
+    def __and__(self, other):
+        return CardSet(mask=self.mask & other.mask)
+
+    def __sub__(self, other):
+        return CardSet(mask=self.mask & ~other.mask)
+
+    def __xor__(self, other):
+        return CardSet(mask=self.mask ^ other.mask)
+
+    def issubset(self, other):
+        return self.mask & ~other.mask == 0
+
+    def issuperset(self, other):
+        return other.mask & ~self.mask == 0
+
+    def rank_counts(self):
+        ''' Count the cards of each rank, not including the jokers
+
+        Returns:
+            (list): The counts of the ranks in the order of RANK_LIST
+        '''
+        return [popcount(self.mask & rank_mask) for rank_mask in RANK_MASKS]
+
+    def suit_counts(self):
+        ''' Count the cards of each suit, not including the jokers
+
+        Returns:
+            (list): The counts of the suits in the order of SUIT_LIST
+        '''
+        return [popcount(self.mask & suit_mask) for suit_mask in SUIT_MASKS]
+
+    def to_array(self, size=54):
+        ''' Encode the set as a binary vector
+
+        Args:
+            size (int): The size of the deck, 52 or 54
+
+        Returns:
+            (numpy.array): The vector, whose i-th entry is 1 if the card of
+              index i is in the set
+        '''
+        return ((np.uint64(self.mask) >> _BITS[:size]) & np.uint64(1)).astype(np.int8)
+
+    def __repr__(self):
+        return 'CardSet([{}])'.format(', '.join(card.get_index() for card in self))
+
+
+class CardCounts(object):
+    ''' A multiset of cards stored as a vector of counts, e.g., the 34 tiles of
+        Mahjong. Adding, removing and counting a card take constant time
+    '''
+
+    __slots__ = ('counts', 'total', 'index')
+
+    def __init__(self, size, index, cards=()):
+        ''' Initialize a multiset of cards
+
+        Args:
+            size (int): The number of distinct cards
+            index (function): A function mapping a card to its index in range(size)
+            cards (list): The cards in the multiset
+        '''
+        self.counts = [0] * size
+        self.total = 0
+        self.index = index
+        for card in cards:
+            self.counts[index(card)] += 1
+            self.total += 1
+
+    def add(self, card, num=1):
+        self.counts[self.index(card)] += num
+        self.total += num
+
+    def remove(self, card, num=1):
+        ''' Remove copies of a card. Raise ValueError if there are fewer copies
+        '''
+        i = self.index(card)
+        if self.counts[i] < num:
+            raise ValueError('Not enough copies of {} to remove'.format(card))
+        self.counts[i] -= num
+        self.total -= num
+
+    def count(self, card):
+        return self.counts[self.index(card)]
+
+    def copy(self):
+        other = CardCounts(len(self.counts), self.index)
+        other.counts = self.counts.copy()
+        other.total = self.total
+        return other
+
+    def __contains__(self, card):
+        return self.counts[self.index(card)] > 0
+
+    def __len__(self):
+        return self.total
+
+    def issuperset(self, other):
+        return all(a >= b for a, b in zip(self.counts, other.counts))
+
+    def to_array(self):
+        return np.array(self.counts, dtype=np.int8)
+
+    def to_plane(self, max_count=4):
+        ''' Encode the counts as a binary plane, whose row of each card has a
+            one for each copy of the card
+
+        Args:
+            max_count (int): The maximum number of copies of a card
+
+        Returns:
+            (numpy.array): The plane of shape (number of distinct cards, max_count)
+        '''
+        return (np.arange(max_count) < np.array(self.counts)[:, None]).astype(int)
@@ -0,0 +1,107 @@
+''' Equity of Texas Hold'em hands against random hands of the opponents
+'''
+
+import itertools
+
+import numpy as np
+
+from rlcard.games.limitholdem.utils import CARD_INDEX, evaluate_hands
+
+def state_equity(state, opponent_num=None, **kwargs):
+    ''' Compute the equity of the current player in a raw state of
+        limit-holdem or no-limit-holdem
+
+    Args:
+        state (dict): The raw state, i.e., state['raw_obs'] of the
+          environment, or the extracted state if it includes the raw state
+        opponent_num (int): The number of opponents. By default, all the
+          other players in state['all_chips']
+        kwargs: The other arguments of hand_equity, e.g., sample_num
+
+    Returns:
+        (tuple): The probabilities of winning and tying, as in hand_equity
+    '''
+    state = state.get('raw_obs', state)
+    if opponent_num is None:
+        opponent_num = len(state['all_chips']) - 1
+    return hand_equity(state['hand'], state['public_cards'], opponent_num, **kwargs)
+
+def hand_equity(hand, public_cards=(), opponent_num=1, sample_num=100000, exhaustive=None,
+                batch_size=100000, np_random=None):
+    ''' Compute the probabilities that the hole cards win and tie at the
+        showdown against the random hole cards of the opponents. The unseen
+        public cards and the hole cards of the opponents are sampled from the
+        rest of the deck in batches, and all the hands of a batch are
+        evaluated at once with the lookup tables of evaluate_hands
+
+    Args:
+        hand (list): The two hole cards, e.g., ['SA', 'HK']
+        public_cards (list): The public cards dealt so far
+        opponent_num (int): The number of opponents
+        sample_num (int): The number of sampled runouts
+        exhaustive (boolean): True if all the runouts are enumerated instead
+          of sampled, which is only supported against one opponent. By
+          default, they are enumerated on the turn and the river
+        batch_size (int): The number of runouts evaluated at once
+        np_random (RandomState): The random number generator for sampling
+
+    Returns:
+        (tuple): Tuple containing:
+
+            (float): The probability of having the strictly best hand
+            (float): The probability of tying with the best hand of the opponents
+    '''
+    if len(hand) != 2 or len(public_cards) > 5:
+        raise ValueError('There should be 2 hole cards and at most 5 public cards')
+    if opponent_num < 1:
+        raise ValueError('There should be at least one opponent')
+    known = [CARD_INDEX[card] for card in list(hand) + list(public_cards)]
+    deck = np.setdiff1d(np.arange(52), known)
+    missing = 5 - len(public_cards)
+    if exhaustive is None:
+        exhaustive = missing <= 1 and opponent_num == 1
+    if exhaustive and opponent_num != 1:
+        raise ValueError('The runouts can only be enumerated against one opponent')
+    if np_random is None:
+        np_random = np.random
+
+    wins, ties, total = 0, 0, 0
+    for runouts in (_enumerate_runouts(deck, missing) if exhaustive
+                    else _sample_runouts(deck, missing + 2 * opponent_num, sample_num, batch_size, np_random)):
+        board = np.broadcast_to(known[2:], (len(runouts), len(known) - 2))
+        board = np.concatenate([board, runouts[:, :missing]], axis=1)
+        hero = evaluate_hands(np.concatenate([np.broadcast_to(known[:2], (len(runouts), 2)), board], axis=1))
+        best = np.zeros(len(runouts), dtype=hero.dtype)
+        for i in range(opponent_num):
+            hole_cards = runouts[:, missing + 2 * i:missing + 2 * i + 2]
+            best = np.maximum(best, evaluate_hands(np.concatenate([hole_cards, board], axis=1)))
+        wins += np.count_nonzero(hero > best)
+        ties += np.count_nonzero(hero == best)
+        total += len(runouts)
+    return wins / total, ties / total
+
+def _sample_runouts(deck, card_num, sample_num, batch_size, np_random):
+    ''' Sample the runouts in batches. Each runout is card_num distinct cards
+        of the deck, drawn by taking the smallest of random keys
+
+    Returns:
+        (generator): A generator of integer arrays of shape (batch, card_num)
+    '''
+    for start in range(0, sample_num, batch_size):
+        num = min(batch_size, sample_num - start)
+        keys = np_random.random_sample((num, len(deck)))
+        yield deck[np.argpartition(keys, card_num - 1, axis=1)[:, :card_num]]
+
+def _enumerate_runouts(deck, missing):
+    ''' Enumerate all the runouts against one opponent, i.e., the missing
+        public cards followed by the two hole cards of the opponent. Each
+        combination of cards is split in all the ways into the public cards
+        and the hole cards, so that every runout appears once
+
+    Returns:
+        (generator): A generator of one integer array of shape (n, missing + 2)
+    '''
+    combos = np.array(list(itertools.combinations(deck, missing + 2)))
+    splits = [list(board) + [i for i in range(missing + 2) if i not in board]
+              for board in itertools.combinations(range(missing + 2), missing)]
+    yield np.concatenate([combos[:, split] for split in splits])
@@ -1,22 +1,186 @@
-import random
+''' Exact exploitability of policies in two-player zero-sum games
+'''
+
+import itertools
+
 import numpy as np
-from rlcard.agents.best_response_agent import BRAgent
-from copy import deepcopy
-
-
-def exploitability(env, agent):
-    state, player_id = env.init_game()
-    num_players = env.player_num
-    if num_players != 2:
-        raise "Not two-players game"
-
-    agents_1 = [BRAgent(env, agent), agent]
-    agents_2 = [agent, BRAgent(env, agent)]
-    env.set_agents(agents_1)
-    value_sum = 0
-    val1 = agents_1[0].value(player_id, state, 0)
-
-    env.set_agents(agents_2)
-    val2 = agents_2[1].value(player_id, state, 1)
-    print("Val:", val1, val2)
-    print("-----------------")
+
+from rlcard.games.leducholdem.game import LeducholdemGame
+from rlcard.utils.game_tree import GameTree
+
+# The merged game trees of all the deals, cached by the type of the environment
+_forests = {}
+
+def exploitability(env, policy):
+    ''' Compute the exploitability of a policy, i.e., the average over the
+        players of the value of a best response against the policy of the
+        other player. It is zero for a Nash equilibrium
+
+    Args:
+        env (Env): Env class. The environment should allow step_back, and its
+          deals should be enumerable by enumerate_deals
+        policy (object): An agent whose eval_step returns the action
+          probabilities, e.g., CFRAgent, NFSPAgent or DeepCFR, or a list of
+          such agents, one for each player
+
+    Returns:
+        (float): The exploitability
+    '''
+    return float(np.mean(best_response_values(env, policy)))
+
+def best_response_values(env, policy):
+    ''' Compute the values of the best responses of both players against the
+        policy. All the deals are merged into one forest, so that the nodes of
+        a depth level hold the private cards of all the deals that share a
+        public history. The reach probabilities of the chance and the opponent
+        are propagated down the forest, and the counterfactual values are
+        backed up with one sweep per player. At the nodes of the best
+        responder, the action maximizing the summed counterfactual value over
+        the information set is chosen. The information set of the best
+        responder is its observation together with the public action history
+
+    Args:
+        env (Env): Env class. The environment should allow step_back
+        policy (object): An agent, or a list of agents, one for each player
+
+    Returns:
+        (numpy.array): The value of the best response of each player
+    '''
+    if env.player_num != 2:
+        raise ValueError('Exploitability is only supported for two-player games')
+    forest = _get_forest(env)
+    probs = forest.action_probs(_policy_table(forest, policy, env.action_num))
+    reach = forest.reach_probs(probs)
+
+    values = np.zeros(env.player_num)
+    for player_id in range(env.player_num):
+        opponent_reach = forest.chance_probs * reach[:, 1 - player_id]
+        counterfactual_values = opponent_reach * forest.payoffs[:, player_id]
+        infosets = forest.best_response_infosets
+        for level in reversed(forest.levels):
+            mine = forest.parent_player[level] == player_id
+
+            # The opponent plays its policy, which is already in the reach probabilities
+            nodes = level[~mine]
+            counterfactual_values += np.bincount(forest.parent[nodes], weights=counterfactual_values[nodes],
+                                                 minlength=len(forest))
+
+            # The best responder takes the best action of each information set
+            nodes = level[mine]
+            if len(nodes) == 0:
+                continue
+            parent_infosets, rows = np.unique(infosets[forest.parent[nodes]], return_inverse=True)
+            action_values = np.full((len(parent_infosets), env.action_num), -np.inf)
+            action_values[rows, forest.action[nodes]] = 0.0
+            np.add.at(action_values, (rows, forest.action[nodes]), counterfactual_values[nodes])
+            chosen = nodes[forest.action[nodes] == np.argmax(action_values, axis=1)[rows]]
+            counterfactual_values[forest.parent[chosen]] += counterfactual_values[chosen]
+        values[player_id] = counterfactual_values[forest.roots].sum()
+    return values
+
+def enumerate_deals(env):
+    ''' Enumerate all the deals of the game. Each deal is set up in the
+        environment in turn, and all the deals are equally likely. Only Leduc
+        Hold'em is supported, since the deals of larger games such as Limit
+        Texas Hold'em are far too many to be enumerated
+
+    Args:
+        env (Env): Env class
+
+    Returns:
+        (generator): A generator that yields after setting up each deal
+    '''
+    if not isinstance(env.game, LeducholdemGame):
+        raise ValueError('Enumerating the deals is only supported for Leduc Hold\'em')
+    env.reset()
+    game = env.game
+    cards = sorted([player.hand for player in game.players] + game.dealer.deck, key=str)
+    for small_blind in range(game.num_players):
+        for deal in itertools.permutations(range(len(cards)), game.num_players + 1):
+            env.reset()
+            # The last card of the deal is the public card, dealt from the top of the deck
+            game.dealer.deck = [card for i, card in enumerate(cards) if i not in deal] + [cards[deal[-1]]]
+            for player, i in zip(game.players, deal):
+                player.hand = cards[i]
+                player.in_chips = game.small_blind
+            game.players[(small_blind + 1) % game.num_players].in_chips = game.big_blind
+            game.game_pointer = small_blind
+            game.round.start_new_round(game_pointer=small_blind, raised=[p.in_chips for p in game.players])
+            yield
+
+def _get_forest(env):
+    ''' Build or get the cached forest of all the deals
+
+    Args:
+        env (Env): Env class
+
+    Returns:
+        (GameTree): The forest
+    '''
+    forest = _forests.get(type(env))
+    if forest is not None:
+        return forest
+
+    obs_index = {}
+    def intern(key):
+        return obs_index.setdefault(key, len(obs_index))
+    trees = [GameTree(env, intern, record_states=True) for _ in enumerate_deals(env)]
+    forest = GameTree.merge(trees)
+    forest.chance_probs = np.full(len(forest), 1.0 / len(trees))
+
+    # The policy is queried for each acting player, observation and set of
+    # legal actions, since the same observation may have different legal actions
+    legal = np.zeros(len(forest), dtype=np.int64)
+    np.add.at(legal, forest.parent[forest.children], 2 ** forest.action[forest.children])
+    legal_sets, legal = np.unique(legal, return_inverse=True)
+    forest.infoset, _ = _unique_rows(forest.infoset, forest.player + 1, forest.player_num + 1)
+    forest.infoset, first = _unique_rows(forest.infoset, legal, len(legal_sets))
+    forest.policy_states = [(forest.player[node], forest.states[node]) for node in first]
+
+    # The public history of a node is the sequence of actions from its root
+    history = np.zeros(len(forest), dtype=np.int64)
+    history_num = 1
+    for level in forest.levels:
+        codes = history[forest.parent[level]] * env.action_num + forest.action[level]
+        unique_codes, inverse = np.unique(codes, return_inverse=True)
+        history[level] = history_num + inverse
+        history_num += len(unique_codes)
+    forest.best_response_infosets = _unique_rows(forest.infoset, history, history_num)[0]
+    forest.states = None
+    _forests[type(env)] = forest
+    return forest
+
+def _unique_rows(first, second, second_num):
+    ''' Number the distinct pairs of two integer arrays, where the entries of
+        the second array are in [0, second_num)
+
+    Returns:
+        (tuple): The number of the pair of each entry, and the first entry of each number
+    '''
+    _, first_index, inverse = np.unique(first * second_num + second, return_index=True, return_inverse=True)
+    return inverse, first_index
+
+def _policy_table(forest, policy, action_num):
+    ''' Query the action probabilities of all the information sets of the forest
+
+    Args:
+        forest (GameTree): The forest
+        policy (object): An agent, or a list of agents, one for each player
+        action_num (int): The size of the action space
+
+    Returns:
+        (numpy.array): The policy table of shape (num_infosets, action_num)
+    '''
+    agents = policy if isinstance(policy, (list, tuple)) else [policy] * forest.player_num
+    table = np.zeros((len(forest.policy_states), action_num))
+    for player_id, agent in enumerate(agents):
+        rows = [i for i, (player, state) in enumerate(forest.policy_states) if player == player_id]
+        states = [forest.policy_states[i][1] for i in rows]
+        if len(rows) == 0:
+            continue
+        if hasattr(agent, 'batch_eval_step'):
+            _, probs = agent.batch_eval_step(states)
+        else:
+            probs = [agent.eval_step(state)[1] for state in states]
+        table[rows] = np.array(probs)
+    return table
@@ -0,0 +1,218 @@
+''' Array-backed game trees for CFR-style algorithms
+'''
+
+import numpy as np
+
+
+class GameTree(object):
+    ''' The game tree of one chance outcome, i.e., the game after env.reset()
+        has dealt the cards. The tree is built once with env.step/env.step_back
+        and stored in flat arrays indexed by node, in depth-first order with the
+        root at index 0:
+
+          parent (n,): The parent node, -1 for the root
+          action (n,): The action leading to the node, -1 for the root
+          player (n,): The acting player, -1 for terminal nodes
+          infoset (n,): The information set index of the acting player, -1 for terminal nodes
+          payoffs (n, player_num): The payoffs of terminal nodes, zeros otherwise
+
+        self.dealt_num is the largest number of cards dealt from the deck of
+        the dealer below the root, e.g., 1 for the public card of Leduc Hold'em.
+
+        The traversals are then done with array sweeps, one depth level at a
+        time, without touching the environment. The trees of several chance
+        outcomes can also be merged into one forest with GameTree.merge.
+    '''
+
+    def __init__(self, env, intern, record_states=False):
+        ''' Build the tree from the current state of the environment. The
+            environment is restored to the current state afterwards
+
+        Args:
+            env (Env): Env class. The environment should allow step_back
+            intern (function): A function that maps the state_str of an
+              information set to its index, e.g., InfosetTable.intern
+            record_states (boolean): True if the state of the acting player
+              is kept in self.states for each node, None for terminal nodes
+        '''
+        self.player_num = env.player_num
+        self.states = [] if record_states else None
+        parents, actions, players, infosets, depths = [], [], [], [], []
+        payoffs = {}
+        deck_nums = []
+
+        def build(parent, action, depth):
+            node = len(parents)
+            parents.append(parent)
+            actions.append(action)
+            depths.append(depth)
+            deck_nums.append(len(getattr(getattr(env.game, 'dealer', None), 'deck', [])))
+            if env.is_over():
+                players.append(-1)
+                infosets.append(-1)
+                payoffs[node] = env.get_payoffs()
+                if record_states:
+                    self.states.append(None)
+                return
+            current_player = env.get_player_id()
+            state = env.get_state(current_player)
+            if record_states:
+                self.states.append(state)
+            players.append(current_player)
+            infosets.append(intern(state['obs'].tobytes()))
+            for legal_action in state['legal_actions']:
+                env.step(legal_action)
+                build(node, legal_action, depth + 1)
+                env.step_back()
+
+        build(-1, -1, 0)
+
+        self.dealt_num = deck_nums[0] - min(deck_nums)
+        self.parent = np.array(parents, dtype=np.int64)
+        self.action = np.array(actions, dtype=np.int64)
+        self.player = np.array(players, dtype=np.int64)
+        self.infoset = np.array(infosets, dtype=np.int64)
+        self.payoffs = np.zeros((len(parents), self.player_num))
+        for node, payoff in payoffs.items():
+            self.payoffs[node] = payoff
+
+        depths = np.array(depths, dtype=np.int64)
+        self.roots = np.zeros(1, dtype=np.int64)
+        self.levels = [np.flatnonzero(depths == depth) for depth in range(1, depths.max() + 1)]
+        self._index_children()
+
+    def _index_children(self):
+        ''' Index the non-root nodes and the acting player at the parent of each node
+        '''
+        self.children = np.flatnonzero(self.parent >= 0)
+        self.parent_player = np.full(len(self.parent), -1, dtype=np.int64)
+        self.parent_player[self.children] = self.player[self.parent[self.children]]
+
+    @classmethod
+    def merge(cls, trees):
+        ''' Merge the trees of several chance outcomes into one forest, so
+            that a sweep covers all the outcomes at once. The node arrays are
+            concatenated, self.roots holds the root of each tree, and each
+            level holds the nodes of the same depth in all the trees
+
+        Args:
+            trees (list): A list of GameTree objects of the same game
+
+        Returns:
+            (GameTree): The forest
+        '''
+        forest = cls.__new__(cls)
+        forest.player_num = trees[0].player_num
+        forest.dealt_num = max(tree.dealt_num for tree in trees)
+        offsets = np.cumsum([0] + [len(tree) for tree in trees])
+        forest.roots = offsets[:-1]
+        forest.parent = np.concatenate([np.where(tree.parent >= 0, tree.parent + offset, -1)
+                                        for tree, offset in zip(trees, offsets)])
+        forest.action = np.concatenate([tree.action for tree in trees])
+        forest.player = np.concatenate([tree.player for tree in trees])
+        forest.infoset = np.concatenate([tree.infoset for tree in trees])
+        forest.payoffs = np.concatenate([tree.payoffs for tree in trees])
+        forest.states = None
+        if all(tree.states is not None for tree in trees):
+            forest.states = [state for tree in trees for state in tree.states]
+        forest.levels = [np.concatenate([tree.levels[depth] + offset for tree, offset in zip(trees, offsets)
+                                         if depth < len(tree.levels)])
+                         for depth in range(max(len(tree.levels) for tree in trees))]
+        forest._index_children()
+        return forest
+
+    def __len__(self):
+        return len(self.parent)
+
+    def action_probs(self, policy):
+        ''' Get the probability of the action leading to each node. The policy
+            is renormalized over the legal actions, as remove_illegal does
+
+        Args:
+            policy (numpy.array): The policy table of shape (num_infosets, action_num)
+
+        Returns:
+            (numpy.array): The action probabilities of shape (n,), 1 for the root
+        '''
+        probs = np.ones(len(self))
+        nodes = self.children
+        parent = self.parent[nodes]
+        probs[nodes] = policy[self.infoset[parent], self.action[nodes]]
+        sums = np.bincount(parent, weights=probs[nodes], minlength=len(self))[parent]
+        counts = np.bincount(parent, minlength=len(self))[parent]
+        probs[nodes] = np.where(sums > 0, probs[nodes] / np.where(sums > 0, sums, 1.0), 1.0 / counts)
+        return probs
+
+    def reach_probs(self, probs):
+        ''' Propagate the reach probabilities of all the players from the root
+
+        Args:
+            probs (numpy.array): The action probabilities returned by action_probs
+
+        Returns:
+            (numpy.array): The reach probabilities of shape (n, player_num)
+        '''
+        reach = np.ones((len(self), self.player_num))
+        for level in self.levels:
+            reach[level] = reach[self.parent[level]]
+            reach[level, self.parent_player[level]] *= probs[level]
+        return reach
+
+    def values(self, probs):
+        ''' Back up the expected utilities of all the players from the leaves
+
+        Args:
+            probs (numpy.array): The action probabilities returned by action_probs
+
+        Returns:
+            (numpy.array): The expected utilities of shape (n, player_num)
+        '''
+        values = self.payoffs.copy()
+        for level in reversed(self.levels):
+            parent = self.parent[level]
+            weighted = probs[level, None] * values[level]
+            for player_id in range(self.player_num):
+                values[:, player_id] += np.bincount(parent, weights=weighted[:, player_id], minlength=len(self))
+        return values
+
+    def update(self, table, player_id, average_weight):
+        ''' Do one CFR traversal for a player. It is equivalent to
+            CFRAgent.traverse_tree but accumulates the regrets and the average
+            policy of all the information sets of the player at once
+
+        Args:
+            table (InfosetTable): The table of the regrets and the policies
+            player_id (int): The player to update
+            average_weight (float): The weight of the average policy
+        '''
+        probs = self.action_probs(table.policy)
+        reach = self.reach_probs(probs)
+        values = self.values(probs)
+
+        nodes = np.flatnonzero(self.parent_player == player_id)
+        parent = self.parent[nodes]
+        rows = self.infoset[parent]
+        counterfactual_probs = np.prod(np.delete(reach[parent], player_id, axis=1), axis=1)
+        regrets = counterfactual_probs * (values[nodes, player_id] - values[parent, player_id])
+        np.add.at(table.regrets, (rows, self.action[nodes]), regrets)
+        np.add.at(table.average_policy, (rows, self.action[nodes]),
+                  average_weight * reach[parent, player_id] * probs[nodes])
+
+def chance_key(env, dealt_num=None):
+    ''' Get a key of the chance outcome dealt by env.reset(). It consists of
+        the perfect information at the root and the cards that will be dealt
+        later from the end of the deck of the dealer, e.g., the public cards
+
+    Args:
+        env (Env): Env class. The environment should implement get_perfect_information
+        dealt_num (int): The number of cards dealt later, e.g., GameTree.dealt_num,
+          or None to use the whole deck
+
+    Returns:
+        (str): The key
+    '''
+    dealer = getattr(env.game, 'dealer', None)
+    deck = getattr(dealer, 'deck', [])
+    if dealt_num is not None:
+        deck = deck[len(deck) - dealt_num:]
+    return repr(env.get_perfect_information()) + repr([str(card) for card in deck])
@@ -0,0 +1,181 @@
+''' Fixed-size storage of records in columns of NumPy arrays, used by the replay
+    and reservoir buffers of the agents. With a path, every column is an
+    np.memmap .npy file in that directory, so that a buffer can exceed the
+    memory, persist across restarts, and be opened read-only by other processes
+'''
+import collections
+import json
+import os
+
+import numpy as np
+
+META_NAME = 'meta.json'
+
+class ArrayStorage(object):
+    ''' Records of fixed fields, e.g., namedtuples, stored by columns. Each
+        column is allocated on the first write, with the shape and the dtype
+        of the field in the first record
+    '''
+
+    def __init__(self, capacity, path=None, mode='w+'):
+        ''' Initialize the storage
+
+        Args:
+            capacity (int): The maximum number of records
+            path (str): The directory of the memory-mapped columns. The columns
+              are kept in memory if it is None
+            mode (str): 'w+' to create the files, overwriting existing ones,
+              'r+' to open existing files, or 'r' to open them read-only
+        '''
+        if mode not in ('w+', 'r+', 'r'):
+            raise ValueError('Unknown storage mode {}'.format(mode))
+        if path is None and mode != 'w+':
+            raise ValueError('Only a storage with a path can be opened')
+        self.capacity = capacity
+        self.path = path
+        self.mode = mode
+        self.columns = None
+        self.record_type = None
+        self.size = 0
+        self.meta = {}
+        if mode != 'w+':
+            self._open()
+
+    def allocate(self, name, fields):
+        ''' Allocate the columns
+
+        Args:
+            name (str): The name of the type of the records
+            fields (list): List of (field name, shape, dtype) of the columns
+        '''
+        self.record_type = collections.namedtuple(name, [field for field, _, _ in fields])
+        self.columns = collections.OrderedDict()
+        for field, shape, dtype in fields:
+            shape = (self.capacity,) + tuple(shape)
+            if self.path is None:
+                self.columns[field] = np.zeros(shape, dtype=dtype)
+            else:
+                os.makedirs(self.path, exist_ok=True)
+                self.columns[field] = np.lib.format.open_memmap(
+                    os.path.join(self.path, field + '.npy'), mode='w+', dtype=dtype, shape=shape)
+        self.flush()
+
+    def allocate_like(self, record):
+        ''' Allocate the columns for records like the given namedtuple
+        '''
+        fields = []
+        for field, value in zip(record._fields, record):
+            value = np.asarray(value)
+            fields.append((field, value.shape, value.dtype))
+        self.allocate(type(record).__name__, fields)
+        self.record_type = type(record)
+
+    def __len__(self):
+        return self.size
+
+    def __setitem__(self, index, record):
+        if self.columns is None:
+            self.allocate_like(record)
+        for column, value in zip(self.columns.values(), record):
+            column[index] = value
+
+    def __getitem__(self, index):
+        return self.record_type(*(column[index] for column in self.columns.values()))
+
+    def append(self, record):
+        ''' Write a record after the last one
+        '''
+        if self.size >= self.capacity:
+            raise ValueError('The storage is full with {} records'.format(self.capacity))
+        self[self.size] = record
+        self.size += 1
+
+    def extend(self, records):
+        ''' Write records after the last one
+
+        Args:
+            records (namedtuple): The fields of the records, each stacked along the first axis
+        '''
+        num = len(records[0])
+        if not num:
+            return
+        if self.size + num > self.capacity:
+            raise ValueError('The storage is full with {} records'.format(self.capacity))
+        self.set_columns(np.arange(self.size, self.size + num), records)
+        self.size += num
+
+    def set_columns(self, indexes, records):
+        ''' Write records by their indexes, setting each column at once
+
+        Args:
+            indexes (numpy.array): The distinct indexes of the records
+            records (namedtuple): The fields of the records, each stacked along the first axis
+        '''
+        if self.columns is None:
+            self.allocate_like(type(records)(*(np.asarray(values)[0] for values in records)))
+        for column, values in zip(self.columns.values(), records):
+            column[indexes] = values
+
+    def get_columns(self, indexes):
+        ''' Get records by their indexes as stacked arrays
+
+        Args:
+            indexes (numpy.array or slice): The indexes of the records
+
+        Returns:
+            (namedtuple): The arrays of the fields, stacked along the first axis
+        '''
+        return self.record_type(*(column[indexes] for column in self.columns.values()))
+
+    def get_records(self, indexes):
+        ''' Get records by their indexes, gathering each column at once
+
+        Args:
+            indexes (numpy.array): The indexes of the records
+
+        Returns:
+            (list): A list of records
+        '''
+        if self.columns is None:
+            return []
+        return [self.record_type(*values) for values in
+                zip(*(column[indexes] for column in self.columns.values()))]
+
+    def __iter__(self):
+        return iter(self.get_records(np.arange(self.size)))
+
+    def clear(self):
+        self.size = 0
+        self.meta = {}
+
+    def flush(self):
+        ''' Write the memory-mapped columns and the counters to the files
+        '''
+        if self.path is None:
+            return
+        if self.columns is not None:
+            for column in self.columns.values():
+                column.flush()
+        if self.mode == 'r':
+            return
+        os.makedirs(self.path, exist_ok=True)
+        meta = {'name': None if self.record_type is None else self.record_type.__name__,
+                'fields': [] if self.columns is None else list(self.columns),
+                'size': self.size,
+                'meta': self.meta}
+        with open(os.path.join(self.path, META_NAME), 'w') as f:
+            json.dump(meta, f)
+
+    def _open(self):
+        ''' Open the columns and the counters of an existing storage
+        '''
+        with open(os.path.join(self.path, META_NAME)) as f:
+            meta = json.load(f)
+        self.size = meta['size']
+        self.meta = meta['meta']
+        if meta['fields']:
+            self.record_type = collections.namedtuple(meta['name'], meta['fields'])
+            self.columns = collections.OrderedDict(
+                (field, np.load(os.path.join(self.path, field + '.npy'), mmap_mode=self.mode))
+                for field in meta['fields'])
+            self.capacity = len(next(iter(self.columns.values())))
@@ -1,3 +1,4 @@
+from collections import Counter, OrderedDict
 import numpy as np
 
 from rlcard.core import Card, Player
@@ -127,13 +128,14 @@ def get_cards_from_ranks(player, ranks):
 
     Note: This function will not affect the player's original hand.
     '''
-    chosen_cards = []
-    remained_cards = player.hand.copy()
-    for rank in ranks:
-        for card in remained_cards:
-            if card.rank == rank:
-                chosen_cards.append(card)
-                remained_cards.pop(remained_cards.index(card))
+    rank_cards = OrderedDict((rank, []) for rank in ranks)
+    remained_cards = []
+    for card in player.hand:
+        if card.rank in rank_cards:
+            rank_cards[card.rank].append(card)
+        else:
+            remained_cards.append(card)
+    chosen_cards = [card for cards in rank_cards.values() for card in cards]
     return chosen_cards, remained_cards
 
 def take_out_cards(cards, remove_cards):
@@ -153,13 +155,23 @@ def take_out_cards(cards, remove_cards):
         which means to take out one kind of cards with the same suit and rank in 'cards' list,
         you need to have the same number of cards with the same suit and rank in 'remove_cards' list.
     '''
-    remove_cards_cp = remove_cards
+    remained = Counter((card.suit, card.rank) for card in remove_cards)
+    kept_cards = []
     for card in cards:
-        for remove_card in remove_cards_cp:
-            if card.rank == remove_card.rank and card.suit == remove_card.suit:
-                cards.pop(cards.index(card))
-                remove_cards_cp.pop(remove_cards_cp.index(remove_card))
-    return remove_cards_cp
+        key = (card.suit, card.rank)
+        if remained[key] > 0:
+            remained[key] -= 1
+        else:
+            kept_cards.append(card)
+    cards[:] = kept_cards
+    # The last copies of the remove cards are the ones not taken out
+    missed_cards = []
+    for card in reversed(remove_cards):
+        key = (card.suit, card.rank)
+        if remained[key] > 0:
+            remained[key] -= 1
+            missed_cards.append(card)
+    return missed_cards[::-1]
 
 def is_in_cards(origin_cards, check_cards):
     ''' Check if a list of Card objects contains another list of Card objects
@@ -171,19 +183,9 @@ def is_in_cards(origin_cards, check_cards):
     Returns:
         (boolean): True if the cards are in the original cards.
     '''
-    check_cards_pos = set()
-    for check_card in check_cards:
-        found = False
-        for i, _ in enumerate(origin_cards):
-            if i in check_cards_pos:
-                continue
-            if check_card.rank == origin_cards[i].rank and check_card.suit == origin_cards[i].suit:
-                found = True
-                check_cards_pos.add(i)
-                break
-        if not found:
-            return False
-    return True
+    counts = Counter((card.suit, card.rank) for card in origin_cards)
+    counts.subtract((card.suit, card.rank) for card in check_cards)
+    return min(counts.values(), default=0) >= 0
 
 def elegent_form(card):
     ''' Get a elegent form of a card string
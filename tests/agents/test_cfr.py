@@ -1,8 +1,9 @@
 import unittest
+import shutil
 import numpy as np
 
 import rlcard
-from rlcard.agents.cfr_agent import CFRAgent
+from rlcard.agents.cfr_agent import CFRAgent, InfosetTable, CompactInfosetTable
 
 class TestNFSP(unittest.TestCase):
 
@@ -35,3 +36,74 @@ class TestNFSP(unittest.TestCase):
         self.assertEqual(len(agent.regrets), len(new_agent.regrets))
         self.assertEqual(agent.iteration, new_agent.iteration)
 
+    def test_save_and_load_compact(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back':True})
+        agent = CFRAgent(env, model_path='./cfr_compact_model')
+
+        for _ in range(100):
+            agent.train()
+
+        agent.save(compact=True)
+
+        new_agent = CFRAgent(env, model_path='./cfr_compact_model')
+        new_agent.load()
+        self.assertIsInstance(new_agent.table, CompactInfosetTable)
+        self.assertEqual(len(agent.table), len(new_agent.table))
+        self.assertEqual(agent.iteration, new_agent.iteration)
+        for key in agent.table.keys:
+            np.testing.assert_array_almost_equal(agent.action_probs(key, [0, 1, 2], agent.table.average_policy),
+                                                 new_agent.action_probs(key, [0, 1, 2], new_agent.table.average_policy))
+        self.assertIsNone(new_agent.table.lookup(b'unknown'))
+
+        new_agent.load(mmap_mode=None)
+        self.assertIsInstance(new_agent.table, InfosetTable)
+        new_agent.train()
+        self.assertEqual(new_agent.iteration, agent.iteration + 1)
+        shutil.rmtree('./cfr_compact_model')
+
+    def test_variants(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back':True})
+        for variant in ['cfr+', 'linear', 'discounted']:
+            agent = CFRAgent(env, variant=variant, alternating=True)
+            for _ in range(10):
+                agent.train()
+            self.assertEqual(agent.iteration, 10)
+            if variant == 'cfr+':
+                self.assertGreaterEqual(agent.table.regrets.min(), 0)
+
+        with self.assertRaises(ValueError):
+            CFRAgent(env, variant='unknown')
+
+    def test_infoset_table(self):
+        table = InfosetTable(3, capacity=1)
+        self.assertEqual(table.intern(b'a'), 0)
+        self.assertEqual(table.intern(b'b'), 1)
+        self.assertEqual(table.intern(b'a'), 0)
+        self.assertEqual(len(table), 2)
+
+        table.regrets[0] = [1., -1., 3.]
+        table.regret_matching()
+        np.testing.assert_array_almost_equal(table.policy[0], [0.25, 0., 0.75])
+        np.testing.assert_array_almost_equal(table.policy[1], [1/3, 1/3, 1/3])
+
+        new_table = InfosetTable.from_dicts(3, table.to_dict(table.policy), table.to_dict(table.average_policy), table.to_dict(table.regrets))
+        self.assertEqual(new_table.keys, table.keys)
+        np.testing.assert_array_equal(new_table.regrets[:2], table.regrets[:2])
+
+    def test_cache_tree(self):
+        agents = []
+        for cache_tree, tree_cache_size in [(False, 0), (True, 4096), (True, 3)]:
+            env = rlcard.make('leduc-holdem', config={'allow_step_back':True, 'seed':0})
+            agent = CFRAgent(env, cache_tree=cache_tree, tree_cache_size=tree_cache_size)
+            for _ in range(20):
+                agent.train()
+            agents.append(agent)
+
+        self.assertGreater(len(agents[1].trees), 0)
+        self.assertEqual(agents[1].dealt_num, 1)
+        self.assertEqual(len(agents[2].trees), 3)
+        n = len(agents[0].table)
+        for agent in agents[1:]:
+            self.assertEqual(agents[0].table.keys, agent.table.keys)
+            np.testing.assert_array_almost_equal(agents[0].table.regrets[:n], agent.table.regrets[:n])
+            np.testing.assert_array_almost_equal(agents[0].table.average_policy[:n], agent.table.average_policy[:n])
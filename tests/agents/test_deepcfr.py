@@ -3,7 +3,7 @@ import tensorflow as tf
 import numpy as np
 import rlcard
 
-from rlcard.agents.deep_cfr_agent import DeepCFR, FixedSizeRingBuffer
+from rlcard.agents.deep_cfr_agent import DeepCFR, FixedSizeRingBuffer, AdvantageMemory
 
 class TestUtilsMethos(unittest.TestCase):
 
@@ -67,6 +67,58 @@ class TestUtilsMethos(unittest.TestCase):
         sess.close()
         tf.reset_default_graph()
 
+    def test_train_batch_traversal(self):
+
+        sess = tf.InteractiveSession()
+        env = rlcard.make('leduc-holdem')
+        agent = DeepCFR(session=sess,
+                        env=env,
+                        policy_network_layers=(32,32),
+                        advantage_network_layers=(32,32),
+                        num_traversals=20,
+                        num_step=2,
+                        batch_size_advantage=64,
+                        batch_size_strategy=64,
+                        memory_capacity=int(1e4),
+                        batch_traversal=True)
+
+        adv_loss, policy_loss = agent.train()
+        self.assertIsNotNone(adv_loss)
+        self.assertIsNotNone(policy_loss)
+
+        for p in range(env.player_num):
+            samples = agent._advantage_memories[p].get_batch()
+            self.assertEqual(samples.info_state.shape[1:], (np.prod(env.state_shape),))
+            self.assertEqual(samples.iteration[0], p + 1)
+            self.assertTrue(np.all(samples.action < env.action_num))
+        samples = agent._strategy_memories.get_batch()
+        self.assertTrue(np.allclose(samples.strategy_action_probs.sum(axis=1), 1))
+
+        sess.close()
+        tf.reset_default_graph()
+
+    def test_fixed_size_ring_buffer_batch(self):
+        buf = FixedSizeRingBuffer(10, array_storage=True)
+        buf.add_batch(AdvantageMemory(np.arange(6)[:, None], np.ones(6), np.zeros(6), np.arange(6)))
+        self.assertEqual(len(buf), 6)
+        buf.add_batch(AdvantageMemory(np.arange(6, 13)[:, None], np.ones(7), np.zeros(7), np.arange(6, 13)))
+        self.assertEqual(len(buf), 10)
+        self.assertEqual(sorted(buf.get_batch().action.tolist()), list(range(3, 13)))
+        buf.add_batch(AdvantageMemory(np.arange(13, 40)[:, None], np.ones(27), np.zeros(27), np.arange(13, 40)))
+        self.assertEqual(sorted(buf.get_batch().action.tolist()), list(range(30, 40)))
+
+        samples = buf.sample_batch(4)
+        self.assertEqual(samples.info_state.shape, (4, 1))
+        self.assertTrue(np.all(samples.action == samples.info_state[:, 0]))
+        with self.assertRaises(ValueError):
+            buf.sample_batch(100)
+
+        # A list-backed buffer returns the same arrays
+        buf = FixedSizeRingBuffer(10)
+        buf.add_batch(AdvantageMemory(np.arange(3)[:, None], np.ones(3), np.zeros(3), np.arange(3)))
+        self.assertEqual(buf.get_batch().info_state.tolist(), [[0], [1], [2]])
+        self.assertEqual(buf.sample_batch(2).action.shape, (2,))
+
     def test_fixed_size_ring_buffer(self):
         buf = FixedSizeRingBuffer(10)
 
@@ -1,8 +1,10 @@
+import shutil
+import tempfile
 import unittest
 import tensorflow as tf
 import numpy as np
 
-from rlcard.agents.dqn_agent import DQNAgent
+from rlcard.agents.dqn_agent import DQNAgent, Memory, PrioritizedMemory, SumTree
 
 class TestDQN(unittest.TestCase):
 
@@ -35,6 +37,55 @@ class TestDQN(unittest.TestCase):
         sess.close()
         tf.reset_default_graph()
 
+    def test_memory(self):
+        memory = Memory(memory_size=3, batch_size=8, action_num=4)
+        for i in range(5):
+            memory.save(np.full((2,), i), i, float(i), np.full((2,), i + 1), i == 4, [i % 4])
+        self.assertEqual(len(memory), 3)
+        self.assertEqual(memory.states.dtype, np.full((2,), 0).dtype)
+        # the oldest transitions 0 and 1 are overwritten
+        self.assertEqual(sorted(memory.actions.tolist()), [2, 3, 4])
+        state_batch, action_batch, reward_batch, next_state_batch, done_batch, legal_actions_batch = memory.sample()
+        self.assertEqual(state_batch.shape, (8, 2))
+        self.assertTrue(np.all(state_batch[:, 0] == action_batch))
+        self.assertTrue(np.all(next_state_batch[:, 0] == action_batch + 1))
+        self.assertTrue(np.all(reward_batch == action_batch))
+        self.assertTrue(np.all(done_batch == (action_batch == 4)))
+        self.assertTrue(np.all(legal_actions_batch.sum(axis=1) == 1))
+        self.assertTrue(np.all(legal_actions_batch[np.arange(8), action_batch % 4]))
+
+    def test_memory_storage(self):
+        path = tempfile.mkdtemp()
+        memory = Memory(memory_size=3, batch_size=2, action_num=2, storage_path=path)
+        for i in range(4):
+            memory.save(np.full((2,), i), i % 2, float(i), np.full((2,), i + 1), False, [0])
+        memory.flush()
+        memory = Memory(memory_size=3, batch_size=2, action_num=2, storage_path=path, storage_mode='r')
+        self.assertEqual(len(memory), 3)
+        self.assertEqual(memory.pointer, 1)
+        self.assertEqual(sorted(memory.rewards.tolist()), [1., 2., 3.])
+        self.assertEqual(memory.sample()[0].shape, (2, 2))
+        shutil.rmtree(path)
+
+    def test_sum_tree(self):
+        tree = SumTree(5)
+        tree.update(np.arange(5), [1., 2., 3., 4., 0.])
+        tree.update([1, 1], [5., 2.])
+        self.assertEqual(tree.total(), 10.)
+        self.assertEqual(tree.find([0., 0.99, 1., 2.99, 3., 5.99, 6., 9.99]).tolist(), [0, 0, 1, 1, 2, 2, 3, 3])
+
+    def test_prioritized_memory(self):
+        memory = PrioritizedMemory(memory_size=4, batch_size=2, action_num=2)
+        for i in range(4):
+            memory.save(np.full((2,), i), i % 2, 0., np.full((2,), i), False)
+        memory.update_priorities(np.arange(4), np.array([0., 0., 0., 1.]))
+        *batches, weights, indexes = memory.sample(beta=1.)
+        self.assertEqual(indexes.tolist(), [3, 3])
+        self.assertTrue(np.all(batches[0][:, 0] == 3))
+        self.assertTrue(np.allclose(weights, 1.))
+        memory.save(np.full((2,), 4), 0, 0., np.full((2,), 4), False)
+        self.assertEqual(memory.tree.get([0])[0], memory.max_priority)
+
     def test_train(self):
 
         memory_init_size = 100
@@ -48,7 +99,8 @@ class TestDQN(unittest.TestCase):
                          replay_memory_init_size=memory_init_size,
                          update_target_estimator_every=100,
                          state_shape=[2],
-                         mlp_layers=[10,10])
+                         mlp_layers=[10,10],
+                         prioritized_replay=True)
         sess.run(tf.global_variables_initializer())
 
         predicted_action, _ = agent.eval_step({'obs': np.random.random_sample((2,)), 'legal_actions': [0, 1]})
@@ -65,3 +117,23 @@ class TestDQN(unittest.TestCase):
 
         sess.close()
         tf.reset_default_graph()
+
+    def test_batch_step(self):
+        sess = tf.InteractiveSession()
+        tf.Variable(0, name='global_step', trainable=False)
+        agent = DQNAgent(sess=sess,
+                         scope='dqn',
+                         state_shape=[2],
+                         mlp_layers=[10,10])
+        sess.run(tf.global_variables_initializer())
+
+        states = [{'obs': np.random.random_sample((2,)), 'legal_actions': [1]} for _ in range(5)]
+        actions = agent.batch_step(states)
+        self.assertEqual(actions, [1] * 5)
+        actions, probs = agent.batch_eval_step(states)
+        self.assertEqual(actions, [1] * 5)
+        self.assertEqual(len(probs), 5)
+
+        sess.close()
+        tf.reset_default_graph()
+
@@ -40,7 +40,8 @@ class TestDQN(unittest.TestCase):
                          update_target_estimator_every=100,
                          state_shape=[2],
                          mlp_layers=[10,10],
-                         device=torch.device('cpu'))
+                         device=torch.device('cpu'),
+                         prioritized_replay=True)
 
         predicted_action, _ = agent.eval_step({'obs': np.random.random_sample((2,)), 'legal_actions': [0, 1]})
         self.assertGreaterEqual(predicted_action, 0)
@@ -55,3 +56,17 @@ class TestDQN(unittest.TestCase):
         predicted_action = agent.step({'obs': np.random.random_sample((2,)), 'legal_actions': [0, 1]})
         self.assertGreaterEqual(predicted_action, 0)
         self.assertLessEqual(predicted_action, 1)
+
+    def test_batch_step(self):
+        agent = DQNAgent(scope='dqn',
+                         state_shape=[2],
+                         mlp_layers=[10,10],
+                         device=torch.device('cpu'))
+
+        states = [{'obs': np.random.random_sample((2,)), 'legal_actions': [1]} for _ in range(5)]
+        actions = agent.batch_step(states)
+        self.assertEqual(actions, [1] * 5)
+        actions, probs = agent.batch_eval_step(states)
+        self.assertEqual(actions, [1] * 5)
+        self.assertEqual(len(probs), 5)
+
@@ -1,4 +1,7 @@
+import shutil
+import tempfile
 import unittest
+import collections
 import tensorflow as tf
 import numpy as np
 
@@ -79,6 +82,49 @@ class TestNFSP(unittest.TestCase):
         buff.clear()
         self.assertEqual(len(buff), 0)
 
+    def test_reservoir_buffer_storage(self):
+        path = tempfile.mkdtemp()
+        Transition = collections.namedtuple('Transition', 'info_state action_probs')
+        buff = ReservoirBuffer(10, storage_path=path)
+        for i in range(20):
+            buff.add(Transition(np.full(3, i), np.full(2, 0.5)))
+        self.assertEqual(len(buff), 10)
+        sampled_data = buff.sample(4)
+        self.assertEqual([t.info_state.shape for t in sampled_data], [(3,)] * 4)
+        buff.flush()
+        saved = [t.info_state[0] for t in buff]
+
+        # continue with the saved buffer
+        buff = ReservoirBuffer(10, storage_path=path, storage_mode='r+')
+        self.assertEqual(len(buff), 10)
+        self.assertEqual(buff._add_calls, 20)
+        self.assertEqual([t.info_state[0] for t in buff], saved)
+        shutil.rmtree(path)
+
+    def test_reservoir_buffer_add_batch(self):
+        buff = ReservoirBuffer(10, array_storage=True)
+        buff.add_batch(np.arange(6)[:, None], np.ones((6, 2)))
+        self.assertEqual(len(buff), 6)
+        self.assertEqual([t.info_state[0] for t in buff], list(range(6)))
+        buff.add_batch(np.arange(6, 100)[:, None], np.ones((94, 2)))
+        self.assertEqual(len(buff), 10)
+        self.assertEqual(buff._add_calls, 100)
+        self.assertEqual(len(set(t.info_state[0] for t in buff)), 10)
+
+        info_states, action_probs = buff.sample_batch(4)
+        self.assertEqual(info_states.shape, (4, 1))
+        self.assertEqual(action_probs.shape, (4, 2))
+        with self.assertRaises(ValueError):
+            buff.sample_batch(100)
+
+        # every element is kept with the same probability
+        counts = np.zeros(50)
+        for _ in range(1000):
+            buff = ReservoirBuffer(5, array_storage=True)
+            buff.add_batch(np.arange(50)[:, None], np.zeros((50, 1)))
+            counts[[t.info_state[0] for t in buff]] += 1
+        self.assertLess(np.abs(counts / 1000 - 0.1).max(), 0.06)
+
     def test_evaluate_with(self):
         # Test average policy and value error here
         sess = tf.InteractiveSession()
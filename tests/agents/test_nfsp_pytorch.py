@@ -49,3 +49,19 @@ class TestNFSP(unittest.TestCase):
             agent.feed(ts)
         state_dict = agent.get_state_dict()
         self.assertIsInstance(state_dict, dict)
+
+    def test_batch_step(self):
+        agent = NFSPAgent(scope='nfsp',
+                         action_num=2,
+                         state_shape=[2],
+                         hidden_layers_sizes=[10,10],
+                         q_mlp_layers=[10,10],
+                         device=torch.device('cpu'))
+
+        states = [{'obs': np.random.random_sample((2,)), 'legal_actions': [1]} for _ in range(5)]
+        actions = agent.batch_step(states)
+        self.assertEqual(actions, [1] * 5)
+        actions, probs = agent.batch_eval_step(states)
+        self.assertEqual(actions, [1] * 5)
+        self.assertEqual(len(probs), 5)
+
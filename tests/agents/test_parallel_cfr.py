@@ -0,0 +1,30 @@
+import unittest
+import numpy as np
+
+import rlcard
+from rlcard.agents.parallel_cfr_agent import ParallelCFRAgent
+
+class TestParallelCFR(unittest.TestCase):
+
+    def test_train(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back':True, 'seed':0})
+        agent = ParallelCFRAgent(env, process_num=2, deals_per_process=2, cache_tree=True)
+
+        for _ in range(20):
+            agent.train()
+        agent.close()
+
+        self.assertEqual(agent.iteration, 20)
+        self.assertGreater(len(agent.table), 0)
+        n = len(agent.table)
+        np.testing.assert_array_almost_equal(agent.table.policy[:n].sum(axis=1), np.ones(n))
+
+        state, _ = env.reset()
+        action, probs = agent.eval_step(state)
+        self.assertIn(action, state['legal_actions'])
+        self.assertAlmostEqual(np.sum(probs), 1.0)
+
+    def test_process_num(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back':True})
+        with self.assertRaises(ValueError):
+            ParallelCFRAgent(env, process_num=0)
@@ -0,0 +1,32 @@
+import rlcard
+import numpy as np
+
+def get_observations(env):
+    return [env.get_state(player_id)['obs'].tobytes() for player_id in range(env.player_num)]
+
+def play_out(env, state):
+    while not env.is_over():
+        state, _ = env.step(np.random.choice(state['legal_actions']))
+
+def is_restorable(env_name, num_games=5):
+    ''' Check that restoring the snapshots of a game in any order, and
+        playing out its clones, give back the same observations
+    '''
+    env = rlcard.make(env_name, config={'seed': 0})
+    for _ in range(num_games):
+        state, _ = env.reset()
+        snapshots, observations = [], []
+        while not env.is_over():
+            snapshots.append(env.get_snapshot())
+            observations.append(get_observations(env))
+            state, _ = env.step(np.random.choice(state['legal_actions']))
+
+        for i in np.random.permutation(len(snapshots)):
+            state, _ = env.restore(snapshots[i])
+            if get_observations(env) != observations[i]:
+                return False
+            clone = env.clone()
+            play_out(clone, state)
+            if get_observations(env) != observations[i] or env.is_over():
+                return False
+    return True
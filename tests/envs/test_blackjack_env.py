@@ -4,6 +4,7 @@ import numpy as np
 import rlcard
 from rlcard.agents.random_agent import RandomAgent
 from .determism_util import is_deterministic
+from .snapshot_util import is_restorable
 
 class TestBlackjackEnv(unittest.TestCase):
 
@@ -16,6 +17,9 @@ class TestBlackjackEnv(unittest.TestCase):
     def test_is_deterministic(self):
         self.assertTrue(is_deterministic('blackjack'))
 
+    def test_snapshot(self):
+        self.assertTrue(is_restorable('blackjack'))
+
     def test_decode_action(self):
         env = rlcard.make('blackjack')
         self.assertEqual(env._decode_action(0), 'hit')
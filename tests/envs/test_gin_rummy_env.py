@@ -10,6 +10,7 @@ import numpy as np
 import rlcard
 from rlcard.agents.random_agent import RandomAgent
 from .determism_util import is_deterministic
+from .snapshot_util import is_restorable
 
 
 class TestGinRummyEnv(unittest.TestCase):
@@ -22,6 +23,9 @@ class TestGinRummyEnv(unittest.TestCase):
     def test_is_deterministic(self):
         self.assertTrue(is_deterministic('gin-rummy'))
 
+    def test_snapshot(self):
+        self.assertTrue(is_restorable('gin-rummy'))
+
     def test_get_legal_actions(self):
         env = rlcard.make('gin-rummy')
         env.set_agents([RandomAgent(env.action_num) for _ in range(env.player_num)])
@@ -4,6 +4,7 @@ import numpy as np
 import rlcard
 from rlcard.agents.random_agent import RandomAgent
 from .determism_util import is_deterministic
+from .snapshot_util import is_restorable
 
 
 class TestLeducholdemEnv(unittest.TestCase):
@@ -18,6 +19,9 @@ class TestLeducholdemEnv(unittest.TestCase):
     def test_is_deterministic(self):
         self.assertTrue(is_deterministic('leduc-holdem'))
 
+    def test_snapshot(self):
+        self.assertTrue(is_restorable('leduc-holdem'))
+
     def test_get_legal_actions(self):
         env = rlcard.make('leduc-holdem')
         env.reset()
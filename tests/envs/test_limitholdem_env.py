@@ -3,6 +3,7 @@ import unittest
 import rlcard
 from rlcard.agents.random_agent import RandomAgent
 from .determism_util import is_deterministic
+from .snapshot_util import is_restorable
 
 
 class TestLimitholdemEnv(unittest.TestCase):
@@ -17,6 +18,9 @@ class TestLimitholdemEnv(unittest.TestCase):
     def test_is_deterministic(self):
         self.assertTrue(is_deterministic('limit-holdem'))
 
+    def test_snapshot(self):
+        self.assertTrue(is_restorable('limit-holdem'))
+
     def test_get_legal_actions(self):
         env = rlcard.make('limit-holdem')
         env.reset()
@@ -4,6 +4,7 @@ import numpy as np
 import rlcard
 from rlcard.agents.random_agent import RandomAgent
 from .determism_util import is_deterministic
+from .snapshot_util import is_restorable
 
 class TestMahjongEnv(unittest.TestCase):
 
@@ -15,6 +16,9 @@ class TestMahjongEnv(unittest.TestCase):
     def test_is_deterministic(self):
         self.assertTrue(is_deterministic('mahjong'))
 
+    def test_snapshot(self):
+        self.assertTrue(is_restorable('mahjong'))
+
     def test_get_legal_actions(self):
         env = rlcard.make('mahjong')
         env.set_agents([RandomAgent(env.action_num) for _ in range(env.player_num)])
@@ -4,6 +4,7 @@ import rlcard
 from rlcard.agents.random_agent import RandomAgent
 from rlcard.games.nolimitholdem.round import Action
 from .determism_util import is_deterministic
+from .snapshot_util import is_restorable
 
 
 class TestNolimitholdemEnv(unittest.TestCase):
@@ -16,6 +17,9 @@ class TestNolimitholdemEnv(unittest.TestCase):
     def test_is_deterministic(self):
         self.assertTrue(is_deterministic('no-limit-holdem'))
 
+    def test_snapshot(self):
+        self.assertTrue(is_restorable('no-limit-holdem'))
+
     def test_get_legal_actions(self):
         env = rlcard.make('no-limit-holdem')
         env.reset()
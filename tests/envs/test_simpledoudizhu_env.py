@@ -4,6 +4,7 @@ import rlcard
 from rlcard.utils.utils import get_downstream_player_id
 from rlcard.agents.random_agent import RandomAgent
 from .determism_util import is_deterministic
+from .snapshot_util import is_restorable
 
 
 class TestSimpleDoudizhuEnv(unittest.TestCase):
@@ -16,6 +17,9 @@ class TestSimpleDoudizhuEnv(unittest.TestCase):
     def test_is_deterministic(self):
         self.assertTrue(is_deterministic('simple-doudizhu'))
 
+    def test_snapshot(self):
+        self.assertTrue(is_restorable('simple-doudizhu'))
+
     def test_get_legal_actions(self):
         env = rlcard.make('simple-doudizhu')
         env.set_agents([RandomAgent(env.action_num) for _ in range(env.player_num)])
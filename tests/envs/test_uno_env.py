@@ -5,6 +5,7 @@ import rlcard
 from rlcard.agents.random_agent import RandomAgent
 from rlcard.games.uno.utils import ACTION_LIST
 from .determism_util import is_deterministic
+from .snapshot_util import is_restorable, play_out
 
 
 class TestUnoEnv(unittest.TestCase):
@@ -17,6 +18,9 @@ class TestUnoEnv(unittest.TestCase):
     def test_is_deterministic(self):
         self.assertTrue(is_deterministic('uno'))
 
+    def test_snapshot(self):
+        self.assertTrue(is_restorable('uno'))
+
     def test_get_legal_actions(self):
         env = rlcard.make('uno')
         env.set_agents([RandomAgent(env.action_num) for _ in range(env.player_num)])
@@ -47,6 +51,41 @@ class TestUnoEnv(unittest.TestCase):
         # env.step_back()
         self.assertRaises(Exception, env.step_back)
 
+    def test_step_back_wild_cards(self):
+        def get_states(env):
+            game = env.game
+            return ([game.get_state(player_id) for player_id in range(env.player_num)],
+                    [card.get_str() for card in game.dealer.deck])
+
+        env = rlcard.make('uno', config={'allow_step_back':True, 'seed': 0})
+        wild_targets = 0
+        for _ in range(20):
+            state, _ = env.reset()
+            snapshots, states = [], []
+            while not env.is_over():
+                snapshots.append(env.get_snapshot())
+                states.append(get_states(env))
+                state, _ = env.step(np.random.choice(state['legal_actions']))
+                wild_targets += env.game.round.target.type == 'wild'
+
+            # Clones played out concurrently do not change the game
+            final_states = get_states(env)
+            for snapshot in snapshots[::7]:
+                clone = env.clone()
+                clone.restore(snapshot)
+                play_out(clone, clone.get_state(clone.get_player_id()))
+                self.assertEqual(get_states(env), final_states)
+
+            for i in np.random.permutation(len(snapshots)):
+                env.restore(snapshots[i])
+                self.assertEqual(get_states(env), states[i])
+            env.restore(snapshots[-1])
+            env.step(np.random.choice(env.get_state(env.get_player_id())['legal_actions']))
+            for i in reversed(range(len(snapshots))):
+                self.assertTrue(env.step_back())
+                self.assertEqual(get_states(env), states[i])
+        self.assertGreater(wild_targets, 0)
+
     def test_run(self):
         env = rlcard.make('uno')
         env.set_agents([RandomAgent(env.action_num) for _ in range(env.player_num)])
@@ -3,6 +3,7 @@ import numpy as np
 
 import rlcard
 from rlcard.agents import RandomAgent
+from rlcard.envs.vec_env import agent_batch_step
 from .determism_util import is_deterministic
 
 class TestVecEnv(unittest.TestCase):
@@ -14,5 +15,73 @@ class TestVecEnv(unittest.TestCase):
         self.assertEqual(len(payoffs), 4)
         trajectories, payoffs = env.run(is_training=True)
 
+    def test_envs_per_worker(self):
+        env = rlcard.make('leduc-holdem', config={'env_num': 5, 'envs_per_worker': 2, 'shared_memory': True})
+        self.assertEqual(env.worker_num, 3)
+        env.set_agents([RandomAgent(env.action_num) for _ in range(env.player_num)])
+        trajectories, payoffs = env.run(is_training=True)
+        self.assertEqual(len(payoffs), 5)
+        states, _ = env.reset()
+        states, _, dones, infos = env.step(RandomAgent(env.action_num).batch_step(states))
+        self.assertEqual(len(states), 5)
+        env.close()
+
+        with self.assertRaises(ValueError):
+            rlcard.make('leduc-holdem', config={'env_num': 2, 'envs_per_worker': 0})
+
+    def test_shared_memory(self):
+        env = rlcard.make('doudizhu', config={'env_num': 2, 'shared_memory': True, 'seed': 0})
+        env.set_agents([RandomAgent(env.action_num) for _ in range(env.player_num)])
+        trajectories, payoffs = env.run(is_training=False)
+        self.assertEqual(len(payoffs), 2)
+        for transition in trajectories[0]:
+            self.assertEqual(transition[0]['obs'].shape, (6, 5, 15))
+            self.assertGreater(len(transition[0]['legal_actions']), 0)
+        env.close()
+
+    def test_step(self):
+        env = rlcard.make('leduc-holdem', config={'env_num': 2, 'seed': 0})
+        agent = RandomAgent(env.action_num)
+        states, player_ids = env.reset()
+        self.assertEqual(len(states), 2)
+        self.assertEqual(len(player_ids), 2)
+        episodes = 0
+        while episodes < 4:
+            states, player_ids, dones, infos = env.step(agent.batch_step(states))
+            for done, info in zip(dones, infos):
+                if done:
+                    episodes += 1
+                    self.assertEqual(len(info['payoffs']), env.player_num)
+                    self.assertEqual(len(info['final_states']), env.player_num)
+                else:
+                    self.assertEqual(info, {})
+
+        # Asynchronous steps
+        env.step_async(agent.batch_step(states))
+        with self.assertRaises(ValueError):
+            env.step_async(agent.batch_step(states[:1]), indices=[0])
+        indices, next_states, _, _, _ = env.step_wait()
+        self.assertGreaterEqual(len(indices), 1)
+        self.assertEqual(len(indices), len(next_states))
+        indices, _, _, _, _ = env.step_wait(min_num=2)
+        self.assertEqual(len(env.waiting), 0)
+        env.close()
+
+    def test_agent_batch_step(self):
+        agent = RandomAgent(2)
+        states = [{'obs': np.zeros(2), 'legal_actions': [1]} for _ in range(3)]
+        self.assertEqual(agent_batch_step(agent, states, is_training=True), [1, 1, 1])
+        self.assertEqual(agent_batch_step(agent, states, is_training=False), [1, 1, 1])
+
+        class SingleStepAgent(object):
+            use_raw = False
+            def step(self, state):
+                return state['legal_actions'][0]
+            def eval_step(self, state):
+                return state['legal_actions'][0], None
+        agent = SingleStepAgent()
+        self.assertEqual(agent_batch_step(agent, states, is_training=True), [1, 1, 1])
+        self.assertEqual(agent_batch_step(agent, states, is_training=False), [1, 1, 1])
+
 if __name__ == '__main__':
     unittest.main()
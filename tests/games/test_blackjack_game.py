@@ -57,6 +57,17 @@ class TestBlackjackGame(unittest.TestCase):
         success = game.step_back()
         self.assertEqual(success, False)
 
+    def test_step_back_stand(self):
+        game = Game(allow_step_back=True)
+        state, _ = game.init_game()
+        deck_num = len(game.dealer.deck)
+        game.step('stand')
+        self.assertTrue(game.is_over())
+        game.step_back()
+        self.assertFalse(game.is_over())
+        self.assertEqual(game.get_state(0), state)
+        self.assertEqual(len(game.dealer.deck), deck_num)
+
     def test_get_state(self):
         game = Game()
         game.init_game()
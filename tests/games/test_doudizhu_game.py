@@ -6,6 +6,8 @@ from rlcard.utils.utils import get_downstream_player_id, get_upstream_player_id
 from rlcard.games.doudizhu.game import DoudizhuGame as Game
 from rlcard.games.doudizhu.utils import get_landlord_score, encode_cards
 from rlcard.games.doudizhu.utils import get_optimal_action, doudizhu_sort_str
+from rlcard.games.doudizhu.utils import get_action_tables, compile_action_tables, TABLE_NAMES
+from rlcard.games.doudizhu.utils import SPECIFIC_MAP, CARD_TYPE, TYPE_CARD, ACTION_SPACE, ACTION_LIST
 from rlcard.games.doudizhu.judger import DoudizhuJudger as Judger
 
 
@@ -149,6 +151,18 @@ class TestDoudizhuGame(unittest.TestCase):
         self.assertEqual(plane[1][13], 1)
         self.assertEqual(plane[1][14], 1)
 
+    def test_action_tables(self):
+        # The compiled tables are up to date with the json files
+        arrays = compile_action_tables()
+        for name in TABLE_NAMES:
+            self.assertTrue(np.array_equal(get_action_tables().arrays[name], arrays[name]))
+        self.assertEqual(SPECIFIC_MAP['33344'], ['333**'])
+        self.assertEqual(SPECIFIC_MAP['pass'], ['pass'])
+        self.assertEqual(ACTION_LIST[ACTION_SPACE['333*']], '333*')
+        self.assertEqual(CARD_TYPE[0]['33344'], [['trio_pair', '1']])
+        self.assertIn('33344', TYPE_CARD['trio_pair']['1'])
+        self.assertNotIn('34', SPECIFIC_MAP)
+
     def test_judge_payoffs(self):
         payoffs = Judger.judge_payoffs(0, 0)
         self.assertEqual(payoffs[0], 1)
@@ -1,6 +1,7 @@
 import unittest
+import numpy as np
 
-from rlcard.games.doudizhu.utils import CARD_TYPE
+from rlcard.games.doudizhu.utils import CARD_TYPE, CARD_RANK_STR_INDEX, contains_cards
 from rlcard.games.doudizhu.judger import DoudizhuJudger as Judger
 
 class TestDoudizhuGame(unittest.TestCase):
@@ -155,5 +156,13 @@ class TestDoudizhuGame(unittest.TestCase):
             self.assertIn(c, playable_cards)
         self.assertEqual(len(playable_cards), len(all_cards_list))
 
+    def test_playable_cards_from_random_hands(self):
+        deck = list('3333444455556666777788889999TTTTJJJJQQQQKKKKAAAA2222BR')
+        np_random = np.random.RandomState(0)
+        for num in [1, 5, 17, 20]:
+            hand = ''.join(sorted(np_random.choice(deck, num, replace=False), key=CARD_RANK_STR_INDEX.get))
+            playable_cards = Judger.playable_cards_from_hand(hand)
+            self.assertEqual(playable_cards, set(c for c in CARD_TYPE[1] if contains_cards(hand, c)))
+
 if __name__ == '__main__':
     unittest.main()
@@ -18,6 +18,8 @@ from rlcard.games.gin_rummy.utils.action_event import draw_card_action_id, pick_
 from rlcard.games.gin_rummy.utils.action_event import declare_dead_hand_action_id
 from rlcard.games.gin_rummy.utils.action_event import gin_action_id, discard_action_id, knock_action_id
 from rlcard.games.gin_rummy.utils.melding import get_all_set_melds, get_all_run_melds, get_meld_clusters
+from rlcard.games.gin_rummy.utils.melding import get_best_deadwood, get_hand_mask, get_meld_cluster_masks
+from rlcard.games.gin_rummy.utils.melding import clear_meld_cluster_cache, update_meld_cluster_masks
 from rlcard.games.gin_rummy.utils.settings import Setting, Settings
 from rlcard.games.gin_rummy.utils.thinker import Thinker
 
@@ -213,6 +215,31 @@ class TestGinRummyGame(unittest.TestCase):
         correct_result_as_set = frozenset([frozenset(meld_pile) for meld_pile in correct_result])
         self.assertEqual(result_as_set, correct_result_as_set)
 
+    def test_meld_cluster_cache(self):
+        hand_text = ['9H', 'TH', 'JH', 'QH', '3C', '3D', '3H', '3S', '8C', '8D']
+        hand = [utils.card_from_text(x) for x in hand_text]
+        hand_mask = get_hand_mask(hand=hand)
+        deadwood_count, best_meld_cluster_masks = get_best_deadwood(hand_mask=hand_mask)
+        self.assertEqual(deadwood_count, 16)
+        self.assertEqual(len(best_meld_cluster_masks), 1)
+        meld_cluster_masks = get_meld_cluster_masks(hand_mask=hand_mask)
+        for card_id in range(52):
+            # incremental update from the cached hand agrees with enumerating the next hand
+            next_meld_cluster_masks = update_meld_cluster_masks(hand_mask=hand_mask, card_id=card_id)
+            clear_meld_cluster_cache()
+            self.assertEqual(next_meld_cluster_masks, get_meld_cluster_masks(hand_mask=hand_mask ^ (1 << card_id)))
+            self.assertEqual(meld_cluster_masks, get_meld_cluster_masks(hand_mask=hand_mask))
+
+        player = GinRummyPlayer(player_id=0, np_random=np.random.RandomState())
+        player.hand = hand[:-1]
+        player.did_populate_hand()
+        player.add_card_to_hand(card=hand[-1])
+        player.remove_card_from_hand(card=hand[0])
+        self.assertEqual(player.hand_mask, get_hand_mask(hand=hand[1:]))
+        clear_meld_cluster_cache()
+        self.assertEqual(player.meld_cluster_masks, get_meld_cluster_masks(hand_mask=player.hand_mask))
+        self.assertEqual(len(player.get_meld_clusters()), len(get_meld_clusters(hand=hand[1:])))
+
 
 if __name__ == '__main__':
     unittest.main()
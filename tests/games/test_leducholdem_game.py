@@ -59,6 +59,19 @@ class TestLeducholdemMethods(unittest.TestCase):
         self.assertEqual(game.game_pointer, player_id)
         self.assertEqual(game.step_back(), False)
 
+    def test_step_back_to_root(self):
+        game = Game(allow_step_back=True)
+        state, player_id = game.init_game()
+        deck = [str(card) for card in game.dealer.deck]
+        while not game.is_over():
+            game.step(np.random.choice(game.get_legal_actions()))
+        while game.step_back():
+            pass
+        self.assertEqual(game.get_state(player_id), state)
+        self.assertEqual(game.round.raise_amount, game.raise_amount)
+        self.assertIsNone(game.public_card)
+        self.assertEqual([str(card) for card in game.dealer.deck], deck)
+
     def test_judge_game(self):
         np_random = np.random.RandomState()
         players = [Player(0, np_random), Player(1, np_random)]
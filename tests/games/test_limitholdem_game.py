@@ -100,6 +100,19 @@ class TestLimitholdemMethods(unittest.TestCase):
             action = np.random.choice(legal_actions)
             game.step(action)
 
+    def test_step_back_to_root(self):
+        game = Game(allow_step_back=True)
+        state, player_id = game.init_game()
+        deck = [str(card) for card in game.dealer.deck]
+        while not game.is_over():
+            game.step(np.random.choice(game.get_legal_actions()))
+        while game.step_back():
+            pass
+        self.assertEqual(game.get_state(player_id), state)
+        self.assertEqual(game.round_counter, 0)
+        self.assertEqual(game.public_cards, [])
+        self.assertEqual([str(card) for card in game.dealer.deck], deck)
+
     def test_payoffs(self):
         game = Game()
         np.random.seed(0)
@@ -3,6 +3,9 @@ import numpy as np
 
 from rlcard.games.mahjong.game import MahjongGame as Game
 from rlcard.games.mahjong.player import MahjongPlayer as Player
+from rlcard.games.mahjong.card import MahjongCard as Card
+from rlcard.games.mahjong.judger import MahjongJudger as Judger
+from rlcard.games.mahjong.utils import lookup_suit, decompose_suit
 
 class TestMahjongMethods(unittest.TestCase):
 
@@ -72,5 +75,32 @@ class TestMahjongMethods(unittest.TestCase):
         player = Player(0, np.random.RandomState())
         self.assertEqual(0, player.get_player_id())
 
+    def test_judge_hu(self):
+        judger = Judger(np.random.RandomState())
+        player = Player(0, np.random.RandomState())
+        # 111 + 23 is not a win but 11 + 123 is
+        tiles = ['dots-1', 'dots-1', 'dots-1', 'dots-2', 'dots-3', 'bamboo-4', 'bamboo-5', 'bamboo-6',
+                 'characters-7', 'characters-7', 'characters-7', 'winds-east', 'winds-east', 'winds-east']
+        player.hand = [Card(*tile.split('-')) for tile in tiles]
+        self.assertEqual(judger.judge_hu(player), (True, 4))
+        player.hand[-1] = Card('dragons', 'red')
+        self.assertEqual(judger.judge_hu(player), (False, 3))
+        set_count, sets = judger.cal_set(tiles[:-1])
+        self.assertEqual(set_count, 3)
+        self.assertEqual(len(sets), 9)
+
+    def test_suit_table(self):
+        self.assertEqual(lookup_suit((3, 1, 1, 0, 0, 0, 0, 0, 0)), (1, 1))
+        self.assertEqual(lookup_suit((0, 0, 0, 0, 0, 0, 0, 0, 2)), (0, 0))
+        self.assertEqual(lookup_suit((1, 1, 0, 0, 0, 0, 0, 0, 0)), (0, -1))
+        self.assertEqual(lookup_suit((3, 1, 1, 1, 1, 1, 1, 1, 3)), (4, 3))
+        np_random = np.random.RandomState(0)
+        for _ in range(100):
+            counts = tuple(np_random.randint(0, 5, 9))
+            sets = decompose_suit(counts)
+            self.assertEqual(len(sets), lookup_suit(counts)[0])
+            used = np.bincount([i for _set in sets for i in _set], minlength=9)
+            self.assertTrue(np.all(used <= counts))
+
 if __name__ == '__main__':
     unittest.main()
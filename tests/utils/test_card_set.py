@@ -0,0 +1,62 @@
+import unittest
+import numpy as np
+
+from rlcard.core import Card
+from rlcard.utils.utils import init_54_deck, init_standard_deck
+from rlcard.utils.card_set import CardSet, CardCounts, card2index, index2card
+
+class TestCardSet(unittest.TestCase):
+
+    def test_card2index(self):
+        deck = init_54_deck()
+        self.assertEqual([card2index(card) for card in deck], list(range(54)))
+        for index, card in enumerate(deck):
+            self.assertEqual(index2card(index), card)
+
+    def test_card_set(self):
+        cards = CardSet([Card('S', 'A'), Card('H', 'A'), Card('C', 'K'), Card('BJ', '')])
+        self.assertEqual(len(cards), 4)
+        self.assertIn(Card('H', 'A'), cards)
+        self.assertNotIn(Card('D', 'A'), cards)
+        self.assertEqual(cards.rank_counts()[0], 2)
+        self.assertEqual(cards.suit_counts(), [1, 1, 0, 1])
+        self.assertEqual([card.get_index() for card in cards], ['SA', 'HA', 'CK', 'BJ'])
+
+        cards.add(Card('D', 'A'))
+        cards.remove(Card('S', 'A'))
+        self.assertEqual(cards.indexes(), [13, 26, 51, 52])
+        with self.assertRaises(KeyError):
+            cards.remove(Card('S', 'A'))
+        cards.discard(Card('S', 'A'))
+        self.assertEqual(len(cards), 4)
+
+        deck = CardSet(init_standard_deck())
+        self.assertEqual(len(deck), 52)
+        self.assertTrue((cards - CardSet([Card('BJ', '')])).issubset(deck))
+        self.assertFalse(deck.issuperset(cards))
+        self.assertEqual(len(deck | cards), 53)
+        self.assertEqual(len(deck & cards), 3)
+        self.assertEqual(CardSet.from_indexes(cards.indexes()), cards)
+
+        array = cards.to_array()
+        self.assertEqual(array.shape, (54,))
+        self.assertEqual(list(np.flatnonzero(array)), cards.indexes())
+
+    def test_card_counts(self):
+        counts = CardCounts(4, int, [0, 1, 1, 3])
+        self.assertEqual(len(counts), 4)
+        self.assertEqual(counts.count(1), 2)
+        counts.add(2, 3)
+        counts.remove(1)
+        self.assertEqual(counts.counts, [1, 1, 3, 1])
+        self.assertNotIn(0, CardCounts(4, int))
+        with self.assertRaises(ValueError):
+            counts.remove(0, 2)
+        self.assertTrue(counts.issuperset(CardCounts(4, int, [2, 2])))
+        self.assertFalse(counts.issuperset(CardCounts(4, int, [0, 0])))
+        plane = counts.to_plane()
+        self.assertEqual(plane.shape, (4, 4))
+        self.assertEqual(list(plane.sum(axis=1)), [1, 1, 3, 1])
+
+if __name__ == '__main__':
+    unittest.main()
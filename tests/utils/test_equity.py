@@ -0,0 +1,46 @@
+import unittest
+import numpy as np
+
+import rlcard
+from rlcard.utils.equity import hand_equity, state_equity
+
+class TestEquity(unittest.TestCase):
+
+    def test_hand_equity(self):
+        win, tie = hand_equity(['SA', 'HA'], sample_num=20000, np_random=np.random.RandomState(0))
+        self.assertAlmostEqual(win, 0.85, delta=0.01)
+        self.assertLess(tie, 0.02)
+        win, _ = hand_equity(['SA', 'HA'], opponent_num=3, sample_num=20000)
+        self.assertAlmostEqual(win, 0.64, delta=0.02)
+
+        # The nuts on the river never lose
+        win, tie = hand_equity(['SA', 'SK'], ['SQ', 'SJ', 'ST', 'H2', 'D3'])
+        self.assertEqual((win, tie), (1.0, 0.0))
+        # Playing the board always ties
+        win, tie = hand_equity(['H2', 'D3'], ['SA', 'SK', 'SQ', 'SJ', 'ST'])
+        self.assertEqual((win, tie), (0.0, 1.0))
+
+        with self.assertRaises(ValueError):
+            hand_equity(['SA'])
+        with self.assertRaises(ValueError):
+            hand_equity(['SA', 'HA'], ['S2', 'S3', 'S4', 'S5'], opponent_num=2, exhaustive=True)
+
+    def test_exhaustive(self):
+        hand, public_cards = ['SA', 'HK'], ['S2', 'S3', 'D9', 'CQ']
+        win, tie = hand_equity(hand, public_cards)
+        # 46 river cards times 990 hole cards of the opponent
+        self.assertAlmostEqual(win * 45540, round(win * 45540))
+        sampled_win, sampled_tie = hand_equity(hand, public_cards, exhaustive=False, sample_num=50000)
+        self.assertAlmostEqual(win, sampled_win, delta=0.01)
+        self.assertAlmostEqual(tie, sampled_tie, delta=0.005)
+
+    def test_state_equity(self):
+        env = rlcard.make('no-limit-holdem', config={'allow_raw_data': True})
+        state, _ = env.reset()
+        win, tie = state_equity(state, sample_num=1000)
+        self.assertTrue(0 <= win + tie <= 1)
+        self.assertEqual(state_equity(state['raw_obs'], sample_num=1000, np_random=np.random.RandomState(0)),
+                         state_equity(state, sample_num=1000, np_random=np.random.RandomState(0)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+import numpy as np
+
+import rlcard
+from rlcard.agents.cfr_agent import CFRAgent
+from rlcard.agents.random_agent import RandomAgent
+from rlcard.utils.exploitability import exploitability, best_response_values, enumerate_deals
+
+class TestExploitability(unittest.TestCase):
+
+    def test_enumerate_deals(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back':True})
+        deals = set()
+        for _ in enumerate_deals(env):
+            game = env.game
+            deals.add((str(game.players[0].hand), str(game.players[1].hand), str(game.dealer.deck[-1]), game.game_pointer))
+        self.assertEqual(len(deals), 240)
+
+        with self.assertRaises(ValueError):
+            list(enumerate_deals(rlcard.make('limit-holdem', config={'allow_step_back':True})))
+
+    def test_exploitability(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back':True})
+        random_agent = RandomAgent(env.action_num)
+        values = best_response_values(env, random_agent)
+        self.assertAlmostEqual(values[0], values[1])
+        random_exploitability = exploitability(env, [random_agent, random_agent])
+        self.assertAlmostEqual(random_exploitability, values[0])
+
+        agent = CFRAgent(env, cache_tree=True)
+        for _ in range(100):
+            agent.train()
+        self.assertGreater(exploitability(env, agent), 0)
+        self.assertLess(exploitability(env, agent), random_exploitability)
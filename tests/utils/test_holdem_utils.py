@@ -1,6 +1,7 @@
 import unittest
 from rlcard.games.limitholdem.utils import compare_hands
 from rlcard.games.limitholdem.utils import Hand as Hand
+from rlcard.games.limitholdem.utils import evaluate_hand, evaluate_hands, CARD_INDEX
 ''' Combinations selected for testing compare_hands function
 Royal straight flush ['CJ', 'CT', 'CQ', 'CK', 'C9', 'C8', 'CA']
 Straight flush ['CJ', 'CT', 'CQ', 'CK', 'C9', 'C8', 'C7']
@@ -27,6 +28,22 @@ class TestHoldemUtils(unittest.TestCase):
         hand.product = 20
         self.assertEqual(hand._has_high_card(), False)
 
+    def test_evaluate_hands(self):
+        hands = [['SA', 'S2', 'S3', 'S4', 'S5', 'HK', 'DK'],
+                 ['HA', 'H2', 'D3', 'C4', 'S5', 'HK', 'DK'],
+                 ['S6', 'H2', 'D3', 'C4', 'S5', 'HK', 'DK'],
+                 ['CJ', 'SJ', 'HJ', 'DJ', 'C9', 'C8', 'C7'],
+                 ['CQ', 'SQ', 'H9', 'D3', 'C2', 'C8', 'C6'],
+                 ['CJ', 'S5', 'H9', 'D4', 'C2', 'C8', 'C7']]
+        ranks = evaluate_hands([[CARD_INDEX[card] for card in hand] for hand in hands])
+        self.assertEqual(list(ranks), [evaluate_hand(hand) for hand in hands])
+        # Straight flush, four of a kind, 6-high straight, wheel, one pair, high card
+        order = [0, 3, 2, 1, 4, 5]
+        self.assertTrue(all(ranks[i] > ranks[j] for i, j in zip(order, order[1:])))
+        self.assertEqual(evaluate_hand(['CA', 'CK', 'CQ', 'CJ', 'CT', 'D2', 'D3']), 4824)
+        with self.assertRaises(ValueError):
+            evaluate_hands([[0, 1, 2, 3, 4, 5]])
+
     def test_compare_hands(self):
 
         winner = compare_hands( [['CJ', 'SJ', 'H9', 'B3', 'C2', 'C8', 'C7'], ['CQ', 'SQ', 'H9', 'B3', 'C2', 'C8', 'C6']])
@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import unittest
+import collections
+import numpy as np
+
+from rlcard.utils.storage import ArrayStorage
+
+Record = collections.namedtuple('Record', 'obs action')
+
+class TestStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_memory_storage(self):
+        storage = ArrayStorage(4)
+        for i in range(3):
+            storage.append(Record(np.full(2, i, dtype=np.float32), i))
+        self.assertEqual(len(storage), 3)
+        self.assertEqual(storage.columns['obs'].dtype, np.float32)
+        self.assertEqual(storage[1].action, 1)
+        records = storage.get_records(np.array([2, 0]))
+        self.assertEqual([record.action for record in records], [2, 0])
+        self.assertEqual([record.action for record in storage], [0, 1, 2])
+        storage.append(Record(np.zeros(2), 3))
+        with self.assertRaises(ValueError):
+            storage.append(Record(np.zeros(2), 4))
+        with self.assertRaises(ValueError):
+            ArrayStorage(4, mode='r')
+
+    def test_columns(self):
+        storage = ArrayStorage(4)
+        storage.extend(Record(np.arange(6).reshape(3, 2), np.arange(3)))
+        self.assertEqual(len(storage), 3)
+        storage.set_columns(np.array([0, 2]), Record(np.full((2, 2), 9), np.array([7, 8])))
+        columns = storage.get_columns(np.array([2, 1, 0]))
+        self.assertEqual(columns.obs.tolist(), [[9, 9], [2, 3], [9, 9]])
+        self.assertEqual(columns.action.tolist(), [8, 1, 7])
+        with self.assertRaises(ValueError):
+            storage.extend(Record(np.zeros((2, 2)), np.zeros(2)))
+
+    def test_memmap_storage(self):
+        storage = ArrayStorage(4, self.path)
+        for i in range(3):
+            storage.append(Record(np.full(2, i), i))
+        storage.meta['count'] = 3
+        storage.flush()
+        self.assertTrue(os.path.exists(os.path.join(self.path, 'obs.npy')))
+
+        reader = ArrayStorage(0, self.path, mode='r')
+        self.assertEqual(reader.capacity, 4)
+        self.assertEqual(len(reader), 3)
+        self.assertEqual(reader.meta['count'], 3)
+        self.assertEqual(reader[2].obs.tolist(), [2, 2])
+        self.assertEqual(type(reader[2]).__name__, 'Record')
+        with self.assertRaises(ValueError):
+            reader[0] = Record(np.zeros(2), 0)
+
+        writer = ArrayStorage(0, self.path, mode='r+')
+        writer.append(Record(np.full(2, 3), 3))
+        writer.flush()
+        self.assertEqual(len(ArrayStorage(0, self.path, mode='r')), 4)
+
+if __name__ == '__main__':
+    unittest.main()